@@ -1,105 +1,334 @@
+import io
 import os
+import time
 import logging
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
-from werkzeug.utils import secure_filename
+import threading
+from flask import Flask, Request, Response, current_app, g, render_template, request, jsonify, flash, redirect, url_for, send_file
 from werkzeug.middleware.proxy_fix import ProxyFix
-import pytesseract
-from PIL import Image
 from scam_detector import ScamDetector
 from link_analyzer import LinkAnalyzer
 from language_support import LanguageSupport
+from result_cache import AnalysisCache
+from conversation_sessions import ConversationStore
+from metrics import registry as metrics_registry, REQUESTS, REQUEST_DURATION, CACHE_LOOKUPS, OCR_PENDING_JOBS, CHAT_SESSIONS, time_stage
+from request_profiler import RequestProfiler
+from structured_logging import configure_logging
+from process_stats import StartupTimer, memory_usage, process_age
+from text_normalizer import normalize
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# The OCR stack (PIL, pytesseract) and the HTTP client (requests) are imported
+# on first use, so processes that never see an image or fetch a link skip them
 
-# Create Flask app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "cyberrakshak-ai-secret-key")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+class InMemoryUploadRequest(Request):
+    """Request that keeps uploaded files in memory instead of spooling them to disk"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Uploads are bounded by MAX_CONTENT_LENGTH, so memory use is bounded too
+        return io.BytesIO()
 
 # Configuration
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 5000))  # Messages per /analyze_batch request
+ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYSIS_CACHE_SIZE', 10000))  # Cached message results
+ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', 3600))  # Seconds
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 0)) or None  # Per web worker; defaults to its share of the cores
+OCR_QUEUE_DEPTH = int(os.environ.get('OCR_QUEUE_DEPTH', 0)) or None  # For all web workers; defaults to 4 jobs per OCR process
+OCR_JOB_TTL = int(os.environ.get('OCR_JOB_TTL', 600))  # Seconds results stay available for polling
+OCR_JOB_DIR = os.environ.get('OCR_JOB_DIR') or None  # Private directory for job states shared by web workers
+OCR_TIMEOUT = float(os.environ.get('OCR_TIMEOUT', 60))  # Seconds /analyze_image waits for its OCR
+MAX_OCR_WAIT = float(os.environ.get('OCR_MAX_WAIT', 5))  # Longest long-poll in seconds; each one holds a worker thread
+IMAGE_CACHE_SIZE = int(os.environ.get('IMAGE_CACHE_SIZE', 1024))  # Screenshots remembered by perceptual hash, ~32KB each (0 disables)
+IMAGE_CACHE_DISTANCE = int(os.environ.get('IMAGE_CACHE_DISTANCE', 4))  # Max differing hash bits for a candidate copy
+IMAGE_CACHE_PIXEL_DIFFERENCE = int(os.environ.get('IMAGE_CACHE_PIXEL_DIFFERENCE', 8))  # Max thumbnail block difference of a copy
+CHAT_SESSION_MEMORY = int(os.environ.get('CHAT_SESSION_MEMORY', 16 * 1024 * 1024))  # Bytes of conversation state per worker
+CHAT_SESSION_IDLE = int(os.environ.get('CHAT_SESSION_IDLE', 1800))  # Seconds before an idle conversation is dropped
+SESSION_SECRET = os.environ.get("SESSION_SECRET", "cyberrakshak-ai-secret-key")  # Signs cookies and conversation state tokens
+
+class Services:
+    """
+    Analysis components shared by all requests of an app
+    
+    The detectors are built eagerly so a preloaded gunicorn master compiles
+    them once and its forked workers share them copy-on-write. The OCR job
+    pool and the screenshot cache pull in the imaging stack and start worker
+    processes, so they are created on first use in the process serving it.
+    """
+    
+    def __init__(self):
+        self.scam_detector = ScamDetector()
+        self.link_analyzer = LinkAnalyzer()
+        self.language_support = LanguageSupport()
+        self.analysis_cache = AnalysisCache(max_entries=ANALYSIS_CACHE_SIZE, ttl_seconds=ANALYSIS_CACHE_TTL)
+        self.request_profiler = RequestProfiler.from_env()
+        # Each worker keeps its own conversations; signed state tokens let any worker continue them
+        self.chat_sessions = ConversationStore(
+            self.scam_detector.start_conversation, max_bytes=CHAT_SESSION_MEMORY, idle_seconds=CHAT_SESSION_IDLE,
+            restore=self.scam_detector.resume_conversation, secret=SESSION_SECRET
+        )
+        self._image_hash_cache = None
+        self._ocr_job_queue = None
+        self._lock = threading.Lock()
+    
+    @property
+    def image_hash_cache(self):
+        """Perceptual-hash cache of recent screenshots"""
+        if self._image_hash_cache is None:
+            with self._lock:
+                if self._image_hash_cache is None:
+                    from image_hash_cache import PerceptualHashCache
+                    self._image_hash_cache = PerceptualHashCache(
+                        max_entries=IMAGE_CACHE_SIZE, max_distance=IMAGE_CACHE_DISTANCE,
+                        max_pixel_difference=IMAGE_CACHE_PIXEL_DIFFERENCE
+                    )
+        return self._image_hash_cache
+    
+    @property
+    def ocr_job_queue(self):
+        """Background OCR queue behind /ocr_jobs"""
+        if self._ocr_job_queue is None:
+            with self._lock:
+                if self._ocr_job_queue is None:
+                    from ocr_jobs import OCRJobQueue
+                    self._ocr_job_queue = OCRJobQueue(
+                        max_workers=OCR_WORKERS, max_pending=OCR_QUEUE_DEPTH, result_ttl=OCR_JOB_TTL,
+                        job_dir=OCR_JOB_DIR
+                    )
+        return self._ocr_job_queue
+    
+    def collect_metrics(self):
+        """Mirror the cache counters, OCR queue depth and chat sessions of this worker into the metrics"""
+        caches = [('analysis', self.analysis_cache)]
+        if self._image_hash_cache is not None:
+            caches.append(('image', self._image_hash_cache))
+        for name, cache in caches:
+            CACHE_LOOKUPS.set_total(cache.hits, name, 'hit')
+            CACHE_LOOKUPS.set_total(cache.misses, name, 'miss')
+        OCR_PENDING_JOBS.set(self._ocr_job_queue.depth() if self._ocr_job_queue is not None else 0)
+        CHAT_SESSIONS.set(len(self.chat_sessions))
+
+def get_services() -> Services:
+    """Components of the app handling the current request"""
+    return current_app.extensions['scamshield']
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+def create_app(services: Services = None) -> Flask:
+    """
+    Build the Flask app and its analysis components
+    
+    Args:
+        services: Components to serve with; built from the environment if omitted
+    
+    Returns:
+        The configured app; startup timings are kept in app.config['STARTUP']
+    """
+    timer = StartupTimer()
+    
+    # Configure logging: background JSON writer, WARNING unless LOG_LEVEL says otherwise
+    configure_logging()
+    
+    app = Flask(__name__)
+    app.request_class = InMemoryUploadRequest
+    app.secret_key = SESSION_SECRET
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+    timer.mark('flask')
+    
+    services = services or Services()
+    app.extensions['scamshield'] = services
+    timer.mark('components')
+    
+    register_routes(app, services)
+    
+    # Share metrics between gunicorn workers so any of them can answer /metrics
+    metrics_registry.add_collector(services.collect_metrics)
+    metrics_registry.enable_sharing()
+    timer.mark('routes')
+    
+    app.config['STARTUP'] = timer.report()
+    logging.info("App created in %.1fms", app.config['STARTUP']['total_ms'],
+                 extra={'event': 'startup', **app.config['STARTUP']})
+    return app
+
+def register_routes(app: Flask, services: Services):
+    """Attach the request hooks, views and error handlers to an app"""
+    profile = services.request_profiler.profile
+    
+    app.before_request(start_request_timer)
+    app.after_request(record_request_metrics)
+    
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule('/chatbot', view_func=chatbot)
+    app.add_url_rule('/analyze_text', view_func=profile(analyze_text), methods=['POST'])
+    app.add_url_rule('/analyze_batch', view_func=analyze_batch, methods=['POST'])
+    app.add_url_rule('/analyze_image', view_func=profile(analyze_image), methods=['POST'])
+    app.add_url_rule('/ocr_jobs', view_func=submit_ocr_job, methods=['POST'])
+    app.add_url_rule('/ocr_jobs/<job_id>', view_func=get_ocr_job)
+    app.add_url_rule('/chatbot_query', view_func=chatbot_query, methods=['POST'])
+    app.add_url_rule('/cache_stats', view_func=cache_stats)
+    app.add_url_rule('/ocr_stats', view_func=ocr_stats)
+    app.add_url_rule('/process_stats', view_func=process_stats)
+    app.add_url_rule('/metrics', view_func=metrics)
+    app.add_url_rule('/profiles', view_func=list_profiles)
+    app.add_url_rule('/profiles/<profile_id>', view_func=download_profile)
+    app.register_error_handler(413, too_large)
 
-# Ensure upload directory exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+def start_request_timer():
+    """Remember when the request started for the latency metrics"""
+    g.request_started = time.perf_counter()
 
-# Initialize components
-scam_detector = ScamDetector()
-link_analyzer = LinkAnalyzer()
-language_support = LanguageSupport()
+def record_request_metrics(response):
+    """Count the request and record its latency"""
+    started = g.get('request_started')
+    endpoint = request.endpoint or 'unknown'
+    if started is not None:
+        REQUEST_DURATION.observe(time.perf_counter() - started, endpoint)
+    REQUESTS.inc(endpoint, str(response.status_code))
+    return response
 
 def allowed_file(filename):
     """Check if uploaded file has allowed extension"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_image(image_path):
-    """Extract text from image using OCR"""
-    try:
-        # Open and process image
-        image = Image.open(image_path)
-        
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Extract text using pytesseract
-        extracted_text = pytesseract.image_to_string(image, lang='eng+hin')
-        
-        return extracted_text.strip()
-    except Exception as e:
-        logging.error(f"OCR extraction failed: {str(e)}")
-        return ""
+def extract_image_text(image_data, languages=None):
+    """
+    Extract text from an image, reusing the OCR result of a recently seen copy
+    
+    Recompressed and rescaled copies of a screenshot are found by perceptual
+    hash and confirmed on a thumbnail, so chats with the same layout and
+    different text do not share a result. Only the extracted text is kept
+    per image; the analysis of that text is then served by the analysis cache, which also tracks rule changes.
+    languages are the Tesseract languages used when the script of the
+    image cannot be detected. OCR itself runs on the OCR job pool, so it
+    counts toward the same cores and depth limit as queued jobs.
+    
+    Raises:
+        QueueFullError: If the OCR queue is at its depth limit
+    """
+    from image_hash_cache import image_signature
+    
+    services = get_services()
+    signature = None
+    if IMAGE_CACHE_SIZE > 0:
+        try:
+            with time_stage('image_hash'):
+                signature = image_signature(image_data, languages)
+        except Exception as e:
+            logging.error(f"Image hashing failed: {str(e)}")
+    
+    if signature is not None:
+        cached = services.image_hash_cache.lookup(signature)
+        if cached is not None:
+            (extracted_text, ocr_language), distance = cached
+            return {
+                'text': extracted_text,
+                'stats': {'image_cache_hit': True, 'hamming_distance': distance, 'ocr_language': ocr_language}
+            }
+    
+    ocr_result = services.ocr_job_queue.run(image_data, languages, timeout=OCR_TIMEOUT)
+    if signature is not None and ocr_result['text']:
+        services.image_hash_cache.add(signature, (ocr_result['text'], ocr_result['stats'].get('ocr_language')))
+    ocr_result['stats']['image_cache_hit'] = False
+    return ocr_result
+
+def analysis_version(services):
+    """
+    Version of everything a cached analysis depends on
+    
+    Combines the rules (and model) of the scam detector with the version of
+    the link checks, so a rule reload or a new blocklist build stops cached
+    results from being served. Live reputation verdicts change on their own
+    schedule, so with reputation checks on link results are not cached.
+    """
+    live_links = 'live-links' if services.link_analyzer.check_reputation else 'cached-links'
+    return f"{services.scam_detector.rule_version}/{services.link_analyzer.version}/{live_links}"
+
+def analyze_message(text):
+    """Run the scam and link analyzers on a message, reusing cached results"""
+    services = get_services()
+    cache_links = not services.link_analyzer.check_reputation
+    
+    def compute():
+        # Both analyzers read the same normalized view
+        view = normalize(text)
+        links = services.link_analyzer.analyze_links_in_text(view) if cache_links else None
+        return services.scam_detector.analyze_text(view), links
+    
+    scam_result, link_results = services.analysis_cache.get_or_compute(text, analysis_version(services), compute)
+    if link_results is None:
+        link_results = services.link_analyzer.analyze_links_in_text(text)
+    return scam_result, link_results
+
+def analyze_messages(texts):
+    """Run the analyzers on many messages, batching only the cache misses"""
+    services = get_services()
+    version = analysis_version(services)
+    cache_links = not services.link_analyzer.check_reputation
+    results = [services.analysis_cache.get(text, version) for text in texts]
+    missing = [index for index, result in enumerate(results) if result is None]
+    
+    if missing:
+        missing_views = [normalize(texts[index]) for index in missing]
+        scam_results = services.scam_detector.analyze_batch(missing_views)
+        link_results = services.link_analyzer.analyze_links_in_batch(missing_views) if cache_links \
+            else [None] * len(missing)
+        for index, scam_result, links in zip(missing, scam_results, link_results):
+            results[index] = (scam_result, links)
+            services.analysis_cache.put(texts[index], version, results[index])
+    
+    if not cache_links:
+        # One reputation deadline for the links of the whole batch
+        link_results = services.link_analyzer.analyze_links_in_batch(texts)
+        results = [(scam_result, links) for (scam_result, _), links in zip(results, link_results)]
+    return results
+
+def build_analysis_response(scam_result, link_results, language):
+    """Build the JSON response for one analyzed message"""
+    services = get_services()
+    return {
+        'success': True,
+        'is_scam': scam_result['is_scam'],
+        'scam_type': scam_result['scam_type'],
+        'confidence': scam_result['confidence'],
+        'explanation': services.language_support.get_scam_explanation(
+            scam_result['scam_type'], language
+        ),
+        'keywords_found': scam_result['keywords_found'],
+        'link_analysis': link_results,
+        'warning_message': services.language_support.get_warning_message(
+            scam_result['scam_type'], language
+        ) if scam_result['is_scam'] else None,
+        'model_score': scam_result.get('model_score'),
+        'rule_version': scam_result['rule_version']
+    }
 
-@app.route('/')
 def index():
     """Main page with upload and text input forms"""
     return render_template('index.html')
 
-@app.route('/chatbot')
 def chatbot():
     """Chatbot interface page"""
     return render_template('chatbot.html')
 
-@app.route('/analyze_text', methods=['POST'])
 def analyze_text():
     """Analyze text input for scams"""
+    services = get_services()
     try:
         data = request.get_json()
         text = data.get('text', '').strip()
         language = data.get('language', 'en')
+        services.request_profiler.record_input(text)
         
         if not text:
             return jsonify({
                 'success': False,
-                'error': language_support.get_text('empty_text_error', language)
+                'error': services.language_support.get_text('empty_text_error', language)
             })
         
-        # Detect scam
-        scam_result = scam_detector.analyze_text(text)
-        
-        # Analyze links if present
-        link_results = link_analyzer.analyze_links_in_text(text)
+        # Detect scam and analyze links if present
+        scam_result, link_results = analyze_message(text)
         
         # Prepare response
-        response = {
-            'success': True,
-            'is_scam': scam_result['is_scam'],
-            'scam_type': scam_result['scam_type'],
-            'confidence': scam_result['confidence'],
-            'explanation': language_support.get_scam_explanation(
-                scam_result['scam_type'], language
-            ),
-            'keywords_found': scam_result['keywords_found'],
-            'link_analysis': link_results,
-            'warning_message': language_support.get_warning_message(
-                scam_result['scam_type'], language
-            ) if scam_result['is_scam'] else None
-        }
+        response = build_analysis_response(scam_result, link_results, language)
         
         return jsonify(response)
         
@@ -107,19 +336,70 @@ def analyze_text():
         logging.error(f"Text analysis error: {str(e)}")
         return jsonify({
             'success': False,
-            'error': language_support.get_text('analysis_error', language)
+            'error': services.language_support.get_text('analysis_error', language)
+        })
+
+def analyze_batch():
+    """Analyze a batch of text messages for scams in one request"""
+    services = get_services()
+    language = 'en'
+    try:
+        data = request.get_json()
+        texts = data.get('texts', [])
+        language = data.get('language', 'en')
+        
+        if not isinstance(texts, list) or not texts:
+            return jsonify({
+                'success': False,
+                'error': services.language_support.get_text('empty_batch_error', language)
+            })
+        
+        if len(texts) > MAX_BATCH_SIZE:
+            return jsonify({
+                'success': False,
+                'error': services.language_support.get_text('batch_too_large_error', language)
+            }), 413
+        
+        texts = [text.strip() if isinstance(text, str) else '' for text in texts]
+        
+        # Analyze the whole batch at once so rule and URL setup is shared
+        analyses = analyze_messages(texts)
+        
+        results = []
+        for text, (scam_result, links) in zip(texts, analyses):
+            if not text:
+                results.append({
+                    'success': False,
+                    'error': services.language_support.get_text('empty_text_error', language)
+                })
+            else:
+                results.append(build_analysis_response(scam_result, links, language))
+        
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results
+        })
+        
+    except Exception as e:
+        logging.error(f"Batch analysis error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': services.language_support.get_text('analysis_error', language)
         })
 
-@app.route('/analyze_image', methods=['POST'])
 def analyze_image():
     """Analyze uploaded image for scams"""
+    services = get_services()
     try:
-        language = request.form.get('language', 'en')
+        # Parsing the multipart body is where the upload is read from the client
+        with time_stage('upload'):
+            language = request.form.get('language', 'en')
         
         if 'file' not in request.files:
             return jsonify({
                 'success': False,
-                'error': language_support.get_text('no_file_error', language)
+                'error': services.language_support.get_text('no_file_error', language)
             })
         
         file = request.files['file']
@@ -127,127 +407,313 @@ def analyze_image():
         if file.filename == '':
             return jsonify({
                 'success': False,
-                'error': language_support.get_text('no_file_selected_error', language)
+                'error': services.language_support.get_text('no_file_selected_error', language)
             })
         
         if not allowed_file(file.filename):
             return jsonify({
                 'success': False,
-                'error': language_support.get_text('invalid_file_type_error', language)
+                'error': services.language_support.get_text('invalid_file_type_error', language)
             })
         
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        image_data = file.stream.getvalue()
+        services.request_profiler.record_input(image_data)
         
+        # Extract text straight from the in-memory upload
+        from ocr_jobs import QueueFullError
         try:
-            # Extract text from image
-            extracted_text = extract_text_from_image(filepath)
-            
-            if not extracted_text:
-                return jsonify({
-                    'success': False,
-                    'error': language_support.get_text('no_text_found_error', language)
-                })
-            
-            # Analyze extracted text
-            scam_result = scam_detector.analyze_text(extracted_text)
-            link_results = link_analyzer.analyze_links_in_text(extracted_text)
-            
-            response = {
-                'success': True,
-                'extracted_text': extracted_text,
-                'is_scam': scam_result['is_scam'],
-                'scam_type': scam_result['scam_type'],
-                'confidence': scam_result['confidence'],
-                'explanation': language_support.get_scam_explanation(
-                    scam_result['scam_type'], language
-                ),
-                'keywords_found': scam_result['keywords_found'],
-                'link_analysis': link_results,
-                'warning_message': language_support.get_warning_message(
-                    scam_result['scam_type'], language
-                ) if scam_result['is_scam'] else None
-            }
-            
-            return jsonify(response)
-            
-        finally:
-            # Clean up uploaded file
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                
+            ocr_result = extract_image_text(
+                image_data, services.language_support.get_ocr_language(language)
+            )
+        except QueueFullError as e:
+            logging.warning(str(e))
+            return jsonify({
+                'success': False,
+                'error': services.language_support.get_text('ocr_queue_full_error', language)
+            }), 503
+        extracted_text = ocr_result['text']
+        
+        if not extracted_text:
+            return jsonify({
+                'success': False,
+                'error': services.language_support.get_text('no_text_found_error', language)
+            })
+        
+        # Analyze extracted text
+        scam_result, link_results = analyze_message(extracted_text)
+        
+        response = build_analysis_response(scam_result, link_results, language)
+        response['extracted_text'] = extracted_text
+        response['ocr_language'] = ocr_result['stats'].get('ocr_language')
+        response['ocr_stats'] = ocr_result['stats']
+        
+        return jsonify(response)
+        
     except Exception as e:
         logging.error(f"Image analysis error: {str(e)}")
         return jsonify({
             'success': False,
-            'error': language_support.get_text('analysis_error', language)
+            'error': services.language_support.get_text('analysis_error', language)
+        })
+
+def submit_ocr_job():
+    """Queue an uploaded image for OCR and return a job id to poll"""
+    services = get_services()
+    try:
+        language = request.form.get('language', 'en')
+        
+        if 'file' not in request.files:
+            return jsonify({
+                'success': False,
+                'error': services.language_support.get_text('no_file_error', language)
+            })
+        
+        file = request.files['file']
+        
+        if file.filename == '':
+            return jsonify({
+                'success': False,
+                'error': services.language_support.get_text('no_file_selected_error', language)
+            })
+        
+        if not allowed_file(file.filename):
+            return jsonify({
+                'success': False,
+                'error': services.language_support.get_text('invalid_file_type_error', language)
+            })
+        
+        from ocr_jobs import QueueFullError
+        try:
+            job_id = services.ocr_job_queue.submit(
+                file.read(), services.language_support.get_ocr_language(language)
+            )
+        except QueueFullError as e:
+            logging.warning(str(e))
+            return jsonify({
+                'success': False,
+                'error': services.language_support.get_text('ocr_queue_full_error', language)
+            }), 503
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'poll_url': url_for('get_ocr_job', job_id=job_id)
+        }), 202
+        
+    except Exception as e:
+        logging.error(f"OCR job submission error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': services.language_support.get_text('analysis_error', language)
+        })
+
+def get_ocr_job(job_id):
+    """Poll an OCR job; pass ?wait=<seconds> to long-poll until it finishes"""
+    services = get_services()
+    language = request.args.get('language', 'en')
+    try:
+        wait_seconds = min(max(request.args.get('wait', 0, type=float), 0), MAX_OCR_WAIT)
+        job = services.ocr_job_queue.get(job_id, wait_seconds)
+        
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': services.language_support.get_text('ocr_job_not_found_error', language)
+            }), 404
+        
+        if job['status'] in ('queued', 'running'):
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': job['status']
+            })
+        
+        if job['status'] == 'failed' or not job['extracted_text']:
+            error_key = 'analysis_error' if job['status'] == 'failed' else 'no_text_found_error'
+            return jsonify({
+                'success': False,
+                'job_id': job_id,
+                'status': job['status'],
+                'error': services.language_support.get_text(error_key, language)
+            })
+        
+        # OCR is done; the text analysis itself is cheap and cached
+        extracted_text = job['extracted_text']
+        scam_result, link_results = analyze_message(extracted_text)
+        
+        response = build_analysis_response(scam_result, link_results, language)
+        response['job_id'] = job_id
+        response['status'] = job['status']
+        response['extracted_text'] = extracted_text
+        response['ocr_language'] = job.get('ocr_stats', {}).get('ocr_language')
+        response['ocr_stats'] = job.get('ocr_stats', {})
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        logging.error(f"OCR job poll error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': services.language_support.get_text('analysis_error', language)
         })
 
-@app.route('/chatbot_query', methods=['POST'])
 def chatbot_query():
     """Handle chatbot queries"""
+    services = get_services()
     try:
         data = request.get_json()
         query = data.get('query', '').strip()
         language = data.get('language', 'en')
+        session_id = data.get('session_id')
+        session_token = data.get('session_token')
         
         if not query:
             return jsonify({
                 'success': False,
-                'error': language_support.get_text('empty_query_error', language)
+                'error': services.language_support.get_text('empty_query_error', language)
             })
         
-        # Simple chatbot logic
-        response_text = process_chatbot_query(query, language)
+        # Every message joins its conversation, so a scam spread over several turns is caught
+        view = normalize(query)
+        with services.chat_sessions.session(session_id if isinstance(session_id, str) else None,
+                                            session_token) as session:
+            conversation = services.scam_detector.analyze_turn(session.state, view)
+            response_text = process_chatbot_query(view, language, conversation)
+            session_token = services.chat_sessions.token(session)
         
         return jsonify({
             'success': True,
-            'response': response_text
+            'response': response_text,
+            'session_id': session.session_id,
+            'session_token': session_token,
+            # The conversation sent was unknown or expired and has started over
+            'session_reset': session.status == 'reset',
+            'conversation': {
+                'is_scam': conversation['is_scam'],
+                'scam_type': conversation['scam_type'],
+                'confidence': conversation['confidence'],
+                'turns': conversation['turns']
+            }
         })
         
     except Exception as e:
         logging.error(f"Chatbot query error: {str(e)}")
         return jsonify({
             'success': False,
-            'error': language_support.get_text('chatbot_error', language)
+            'error': services.language_support.get_text('chatbot_error', language)
         })
 
-def process_chatbot_query(query, language):
-    """Process chatbot queries and provide responses"""
-    query_lower = query.lower()
+def process_chatbot_query(query, language, conversation=None):
+    """
+    Process chatbot queries and provide responses
+    
+    Args:
+        query: The user's message, or its normalized view
+        language: Language code of the reply
+        conversation: Verdict on the conversation so far, including this
+            message; the message is analyzed on its own if None
+    """
+    services = get_services()
+    view = normalize(query)
+    query_lower = view.text
+    
+    # Warn as soon as the conversation as a whole turns into a scam
+    if conversation is not None and conversation['is_scam'] and conversation.get('became_scam'):
+        return (
+            services.language_support.get_text('chatbot_scam_detected', language) +
+            " " + services.language_support.get_scam_explanation(conversation['scam_type'], language)
+        )
     
     # Check if query contains text to analyze
     if any(keyword in query_lower for keyword in ['check', 'analyze', 'scam', 'fraud']):
         # Try to extract potential scam text from query
-        scam_result = scam_detector.analyze_text(query)
+        scam_result = conversation if conversation is not None else services.scam_detector.analyze_text(view)
         
         if scam_result['is_scam']:
             return (
-                language_support.get_text('chatbot_scam_detected', language) +
-                " " + language_support.get_scam_explanation(scam_result['scam_type'], language)
+                services.language_support.get_text('chatbot_scam_detected', language) +
+                " " + services.language_support.get_scam_explanation(scam_result['scam_type'], language)
             )
         else:
-            return language_support.get_text('chatbot_no_scam', language)
+            return services.language_support.get_text('chatbot_no_scam', language)
     
     # General responses
     if any(keyword in query_lower for keyword in ['hello', 'hi', 'help', 'namaste']):
-        return language_support.get_text('chatbot_greeting', language)
+        return services.language_support.get_text('chatbot_greeting', language)
     
     if any(keyword in query_lower for keyword in ['upi', 'payment', 'money']):
-        return language_support.get_text('chatbot_upi_info', language)
+        return services.language_support.get_text('chatbot_upi_info', language)
     
     if any(keyword in query_lower for keyword in ['phishing', 'link', 'click']):
-        return language_support.get_text('chatbot_phishing_info', language)
+        return services.language_support.get_text('chatbot_phishing_info', language)
     
     if any(keyword in query_lower for keyword in ['job', 'work', 'employment']):
-        return language_support.get_text('chatbot_job_info', language)
+        return services.language_support.get_text('chatbot_job_info', language)
     
     # Default response
-    return language_support.get_text('chatbot_default', language)
+    return services.language_support.get_text('chatbot_default', language)
+
+def cache_stats():
+    """Report analysis and screenshot cache hit/miss counters"""
+    services = get_services()
+    # The screenshot cache, and the imaging stack behind it, only exist once an image was analyzed
+    image_cache = services._image_hash_cache
+    return jsonify({
+        'analysis': services.analysis_cache.stats(),
+        'image': image_cache.stats() if image_cache is not None else None,
+        'chat_sessions': services.chat_sessions.stats()
+    })
+
+def ocr_stats():
+    """Report cumulative preprocessing savings for OCR run in this worker"""
+    from ocr import preprocessor
+    return jsonify(preprocessor.get_totals())
+
+def process_stats():
+    """Report how long startup took and the memory this worker uses"""
+    startup = current_app.config['STARTUP']
+    age = process_age()
+    return jsonify({
+        'pid': os.getpid(),
+        # With gunicorn --preload the app is built once in the master and shared by the workers
+        'preloaded': startup['pid'] != os.getpid(),
+        'startup': startup,
+        'uptime_seconds': round(age, 1) if age is not None else None,
+        'memory': memory_usage()
+    })
+
+def metrics():
+    """Expose request, stage latency, cache and OCR queue metrics of all workers for Prometheus"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+def profiles_authorized():
+    """Check the profiling token sent as a header or ?token= parameter"""
+    services = get_services()
+    supplied = request.headers.get('X-Profile-Token') or request.args.get('token')
+    return services.request_profiler.is_authorized(supplied)
+
+def list_profiles():
+    """List stored request profiles (requires the profiling token)"""
+    services = get_services()
+    if not profiles_authorized():
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    return jsonify({'success': True, 'profiles': services.request_profiler.list_profiles()})
+
+def download_profile(profile_id):
+    """
+    Download a request profile in pstats format for snakeviz, flameprof or
+    gprof2dot; ?format=text returns the top functions by cumulative time
+    """
+    services = get_services()
+    path = services.request_profiler.profile_path(profile_id) if profiles_authorized() else None
+    if path is None:
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    if request.args.get('format') == 'text':
+        return Response(services.request_profiler.summary(path), mimetype='text/plain')
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f'{profile_id}.prof')
 
-@app.errorhandler(413)
 def too_large(e):
     """Handle file too large error"""
     return jsonify({
@@ -256,4 +722,5 @@ def too_large(e):
     }), 413
 
 if __name__ == '__main__':
+    app = create_app()
     app.run(host='0.0.0.0', port=5000, debug=True)
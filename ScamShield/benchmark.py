@@ -0,0 +1,344 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import statistics
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Committed results of `python benchmark.py --write-baseline` (small corpus). Timings depend on
+# the machine: refresh it with the same command after an intended performance change, or write a
+# local baseline with --baseline before comparing on different hardware.
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+SCAM_PHRASES = [
+    'congratulations you have won a lottery prize', 'your kyc has expired update now',
+    'share the otp to receive cashback', 'urgent: your account will be blocked today',
+    'invest now and get guaranteed returns', 'aapka khata band ho jayega', 'click here to claim reward'
+]
+PLAIN_PHRASES = [
+    'are we meeting for lunch tomorrow', 'please send the report by evening', 'happy birthday bhai',
+    'the train is running late by twenty minutes', 'call me when you reach home', 'ok sounds good'
+]
+URL_HOSTS = [
+    'bit.ly', 'example.com', 'sbi.co.in', 'secure-login-verify.tk', 'paytm.com',
+    '192.168.10.4', 'a1b2c3.xyz', 'www.amazon.in'
+]
+
+class Corpus:
+    """Deterministic synthetic messages for the benchmarks"""
+
+    def __init__(self, seed: int = 42):
+        self.random = random.Random(seed)
+
+    def url(self, unique: bool = False) -> str:
+        """Random link; unique links get a fresh subdomain so no host cache helps"""
+        host = self.random.choice(URL_HOSTS)
+        if unique:
+            host = f"h{self.random.getrandbits(40):x}.{host}"
+        path = self.random.choice(['', '/login', '/verify/account', '/offer?id=7', '/a/b/c'])
+        return f"{self.random.choice(['http', 'https'])}://{host}{path}"
+
+    def sms(self, count: int) -> List[str]:
+        """Short SMS-sized messages, about half of them scams"""
+        messages = []
+        for _ in range(count):
+            phrases = SCAM_PHRASES if self.random.random() < 0.5 else PLAIN_PHRASES
+            message = self.random.choice(phrases)
+            if self.random.random() < 0.3:
+                message += ' ' + self.url()
+            messages.append(message)
+        return messages
+
+    def chats(self, count: int, lines: int = 200) -> List[str]:
+        """Long chat exports of many lines each"""
+        return ['\n'.join(self.sms(lines)) for _ in range(count)]
+
+    def url_texts(self, count: int, urls_per_text: int = 50) -> List[str]:
+        """Messages stuffed with links"""
+        return [' '.join(f"see {self.url(unique=True)}" for _ in range(urls_per_text)) for _ in range(count)]
+
+    def keywords(self, count: int) -> List[str]:
+        """Made-up rule keywords for growing the detector's rule set"""
+        letters = 'abcdefghijklmnopqrstuvwxyz'
+        return [''.join(self.random.choice(letters) for _ in range(self.random.randint(5, 12)))
+                for _ in range(count)]
+
+def synthetic_screenshot(width: int = 1080, height: int = 2340, lines: int = 40, seed: int = 7) -> bytes:
+    """PNG of a phone-sized screenshot with lines of dark text; the seed picks the messages"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    corpus = Corpus(seed=seed)
+    for index, message in enumerate(corpus.sms(lines)):
+        draw.text((40, 120 + index * (height - 200) // lines), message, fill=(20, 20, 20))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+class Benchmark:
+    """A named workload timed over a corpus of operations"""
+
+    def __init__(self, name: str, setup: Callable[[], Callable[[], Any]], operations: int,
+                 requires: Optional[Callable[[], Optional[str]]] = None):
+        """
+        Args:
+            name: Dotted benchmark name, e.g. 'detector.analyze_text.sms'
+            setup: Builds the workload and returns a callable running it once
+            operations: Operations one run of the workload performs
+            requires: Returns why the benchmark cannot run here, or None if it can
+        """
+        self.name = name
+        self.setup = setup
+        self.operations = operations
+        self.requires = requires
+
+    def run(self, repeat: int) -> Dict[str, Any]:
+        """
+        Time the workload after one warm-up run
+
+        Per-operation figures use the fastest run, which is the least
+        disturbed by other load on the machine and so the most comparable.
+        """
+        workload = self.setup()
+        workload()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            workload()
+            timings.append(time.perf_counter() - started)
+
+        fastest = min(timings)
+        return {
+            'operations': self.operations,
+            'repeat': repeat,
+            'min_ms': round(fastest * 1000, 3),
+            'median_ms': round(statistics.median(timings) * 1000, 3),
+            'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+            'us_per_op': round(fastest * 1e6 / self.operations, 3),
+            'ops_per_second': round(self.operations / fastest, 1) if fastest > 0 else 0.0
+        }
+
+def _tesseract_missing() -> Optional[str]:
+    """Reason OCR cannot run, if the tesseract binary is unavailable"""
+    import pytesseract
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return "tesseract is not installed"
+    return None
+
+def _numpy_missing() -> Optional[str]:
+    """Reason the statistical model cannot run, if NumPy is unavailable"""
+    from statistical_model import np
+    return "numpy is not installed" if np is None else None
+
+def build_benchmarks(sizes: Dict[str, int]) -> List[Benchmark]:
+    """Create the benchmark catalogue"""
+    corpus = Corpus()
+    benchmarks = []
+
+    def train_model(texts):
+        """Fit an n-gram model on the corpus, labeled by the keyword rules, and return its path"""
+        import tempfile
+        from scam_detector import ScamDetector
+        from statistical_model import save_model, train
+        labels = [result['scam_type'] for result in ScamDetector().analyze_batch(texts)]
+        path = tempfile.mkdtemp(prefix='benchmark-model-')
+        save_model(path, train(texts, labels, epochs=1))
+        return path
+
+    def detector_workload(texts, extra_keywords=0, batch=False, model=False):
+        def setup():
+            from scam_detector import ScamDetector
+            detector = ScamDetector(model_path=train_model(texts) if model else None)
+            if extra_keywords:
+                detector.add_custom_keywords('phishing', corpus.keywords(extra_keywords))
+            if batch:
+                return lambda: detector.analyze_batch(texts)
+            return lambda: [detector.analyze_text(text) for text in texts]
+        return setup
+
+    sms = corpus.sms(sizes['sms'])
+    chats = corpus.chats(sizes['chats'])
+    benchmarks.append(Benchmark('detector.analyze_text.sms', detector_workload(sms), len(sms)))
+    benchmarks.append(Benchmark('detector.analyze_text.chat', detector_workload(chats), len(chats)))
+    benchmarks.append(Benchmark('detector.analyze_text.many_keywords',
+                                detector_workload(sms, extra_keywords=sizes['keywords']), len(sms)))
+    benchmarks.append(Benchmark('detector.analyze_batch.sms', detector_workload(sms, batch=True), len(sms)))
+    benchmarks.append(Benchmark('detector.analyze_batch.sms_with_model', detector_workload(sms, batch=True, model=True),
+                                len(sms), requires=_numpy_missing))
+
+    url_texts = corpus.url_texts(sizes['url_texts'])
+    urls = [corpus.url(unique=True) for _ in range(sizes['urls'])]
+    repeated_urls = [corpus.url() for _ in range(sizes['urls'])]
+
+    def link_workload(method, items, cold_cache=False):
+        def setup():
+            from link_analyzer import LinkAnalyzer
+            analyzer = LinkAnalyzer(check_reputation=False)
+            call = getattr(analyzer, method)
+            def workload():
+                if cold_cache:
+                    analyzer.classifier.classify_host.cache_clear()
+                return [call(item) for item in items]
+            return workload
+        return setup
+
+    benchmarks.append(Benchmark('links.extract_links', link_workload('extract_links', url_texts), len(url_texts)))
+    benchmarks.append(Benchmark('links.analyze_url.unique_hosts', link_workload('analyze_url', urls, cold_cache=True), len(urls)))
+    benchmarks.append(Benchmark('links.analyze_url.repeated_hosts',
+                                link_workload('analyze_url', repeated_urls), len(repeated_urls)))
+    benchmarks.append(Benchmark('links.analyze_links_in_text.many_urls',
+                                link_workload('analyze_links_in_text', url_texts, cold_cache=True), len(url_texts)))
+
+    def language_setup():
+        from language_support import LanguageSupport
+        support = LanguageSupport()
+        scam_types = ['upi_fraud', 'phishing', 'lottery_scam', 'unknown_type']
+        lookups = [(scam_type, language) for scam_type in scam_types for language in ('en', 'hi', 'xx')]
+        def workload():
+            for _ in range(sizes['lookups'] // len(lookups)):
+                for scam_type, language in lookups:
+                    support.get_warning_message(scam_type, language)
+                    support.get_scam_explanation(scam_type, language)
+        return workload
+
+    lookup_count = (sizes['lookups'] // 12) * 12 * 2
+    benchmarks.append(Benchmark('language.lookups', language_setup, lookup_count))
+
+    def preprocess_setup():
+        from ocr import open_image
+        from image_preprocessing import ImagePreprocessor
+        data = synthetic_screenshot()
+        preprocessor = ImagePreprocessor()
+        return lambda: preprocessor.process(open_image(data, load=False))
+
+    def ocr_setup():
+        from ocr import extract_text_from_image
+        data = synthetic_screenshot()
+        return lambda: extract_text_from_image(data)
+
+    benchmarks.append(Benchmark('ocr.preprocess.screenshot', preprocess_setup, 1))
+    benchmarks.append(Benchmark('ocr.extract_text_from_image.screenshot', ocr_setup, 1,
+                                requires=_tesseract_missing))
+    return benchmarks
+
+SIZES = {
+    'small': {'sms': 500, 'chats': 5, 'keywords': 1000, 'url_texts': 20, 'urls': 500, 'lookups': 1200},
+    'medium': {'sms': 5000, 'chats': 50, 'keywords': 5000, 'url_texts': 200, 'urls': 5000, 'lookups': 12000},
+    'large': {'sms': 50000, 'chats': 200, 'keywords': 20000, 'url_texts': 1000, 'urls': 50000, 'lookups': 120000}
+}
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare per-operation times with a baseline run
+
+    Args:
+        results: Benchmark results of this run
+        baseline: Benchmark results of the baseline run
+        threshold: Slowdown ratio above 1 counted as a regression, e.g. 0.2 for 20%
+
+    Returns:
+        One comparison row per benchmark present in both runs
+    """
+    rows = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get('us_per_op'):
+            continue
+        ratio = result['us_per_op'] / previous['us_per_op']
+        rows.append({
+            'name': name,
+            'baseline_us_per_op': previous['us_per_op'],
+            'us_per_op': result['us_per_op'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + threshold
+        })
+    return rows
+
+def main():
+    """Run the benchmarks and compare them with the stored baseline"""
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the detector, link analyzer and OCR stages")
+    parser.add_argument('--size', choices=list(SIZES), default='small', help="Corpus size")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument('--filter', help="Only run benchmarks whose name contains this text")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline results file")
+    parser.add_argument('--write-baseline', '--save-baseline', dest='write_baseline', action='store_true',
+                        help="Store this run as the new baseline instead of comparing with it")
+    parser.add_argument('--no-compare', action='store_true', help="Only report timings, without a baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Slowdown versus the baseline reported as a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+    compare_baseline = not (args.write_baseline or args.no_compare)
+    if compare_baseline and not os.path.exists(args.baseline):
+        # Checked before running, so a missing baseline cannot pass as "no regressions"
+        parser.error(f"baseline {args.baseline} does not exist; create it with --write-baseline "
+                     f"or skip the comparison with --no-compare")
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {}
+    skipped = {}
+    for benchmark in build_benchmarks(SIZES[args.size]):
+        if args.filter and args.filter not in benchmark.name:
+            continue
+        reason = benchmark.requires() if benchmark.requires else None
+        if reason:
+            skipped[benchmark.name] = reason
+            print(f"{benchmark.name:<45} skipped: {reason}", file=sys.stderr)
+            continue
+        results[benchmark.name] = benchmark.run(args.repeat)
+        result = results[benchmark.name]
+        print(f"{benchmark.name:<45} {result['us_per_op']:>12.2f} us/op {result['ops_per_second']:>12.1f} ops/s",
+              file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'size': args.size,
+            'repeat': args.repeat
+        },
+        'results': results,
+        'skipped': skipped
+    }
+
+    regressions = []
+    if compare_baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline['meta'].get('size') != args.size:
+            print(f"Baseline was recorded with size {baseline['meta'].get('size')}, not {args.size}", file=sys.stderr)
+        report['comparison'] = compare(results, baseline['results'], args.threshold)
+        for row in report['comparison']:
+            marker = 'REGRESSION' if row['regression'] else 'ok'
+            print(f"{row['name']:<45} {row['ratio']:>7.2f}x baseline  {marker}", file=sys.stderr)
+        regressions = [row['name'] for row in report['comparison'] if row['regression']]
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.write_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed beyond {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
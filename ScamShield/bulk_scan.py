@@ -0,0 +1,246 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from scam_detector import ScamDetector
+from link_analyzer import LinkAnalyzer
+from text_normalizer import normalize
+
+# Analyzers of a worker process, created once by _init_worker
+_scam_detector = None
+_link_analyzer = None
+
+def iter_messages(stream, input_format: str, text_field: str = 'text',
+                  id_field: Optional[str] = None) -> Iterator[Tuple[Any, Optional[str], Optional[str]]]:
+    """
+    Stream messages from a JSONL or CSV file without loading it
+
+    JSONL lines may be objects holding the text field or bare JSON strings.
+
+    Args:
+        stream: Text stream to read
+        input_format: 'jsonl' or 'csv'
+        text_field: Field holding the message text
+        id_field: Field holding the message id (the record number is used if None)
+
+    Yields:
+        Tuples of (message id, text, error); text is None for unreadable records
+    """
+    if input_format == 'csv':
+        csv.field_size_limit(sys.maxsize)  # Chat exports can hold very long messages
+        for number, row in enumerate(csv.DictReader(stream), 1):
+            record_id = row.get(id_field) if id_field else number
+            if row.get(text_field) is None:
+                yield record_id, None, f"Missing field '{text_field}'"
+            else:
+                yield record_id, row[text_field], None
+        return
+
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"Invalid JSON: {str(e)}"
+            continue
+        if isinstance(record, str):
+            yield number, record, None
+        elif isinstance(record, dict) and isinstance(record.get(text_field), str):
+            yield (record.get(id_field, number) if id_field else number), record[text_field], None
+        else:
+            yield number, None, f"Missing field '{text_field}'"
+
+def iter_chunks(items, chunk_size: int) -> Iterator[List[Any]]:
+    """Group an iterator into lists of at most chunk_size items"""
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _init_worker(log_level: int, check_links: bool):
+    """Build the analyzers once per worker process"""
+    global _scam_detector, _link_analyzer
+    logging.basicConfig(level=log_level)
+    logging.getLogger().setLevel(log_level)
+    _scam_detector = ScamDetector()
+    _link_analyzer = LinkAnalyzer(check_reputation=False) if check_links else None
+
+def scan_chunk(chunk: List[Tuple[Any, Optional[str], Optional[str]]]) -> Tuple[str, Dict[str, int]]:
+    """
+    Analyze one chunk of messages
+
+    Results are serialized in the worker so only one string per chunk
+    travels back to the parent process.
+
+    Args:
+        chunk: Tuples produced by iter_messages
+
+    Returns:
+        Tuple of (JSONL output for the chunk, counts of the outcomes)
+    """
+    valid = [(record_id, text) for record_id, text, error in chunk if error is None]
+    # Normalized once, then shared by both analyzers
+    texts = [normalize(text) for _, text in valid]
+    scam_results = iter(_scam_detector.analyze_batch(texts))
+    if _link_analyzer is not None:
+        link_results = iter(_link_analyzer.analyze_links_in_batch(texts))
+    else:
+        link_results = iter([[]] * len(texts))
+
+    counts = Counter()
+    lines = []
+    for record_id, _, error in chunk:
+        if error is not None:
+            record = {'id': record_id, 'error': error}
+            counts['errors'] += 1
+        else:
+            record = {'id': record_id, **next(scam_results), 'links': next(link_results)}
+            counts['scams' if record['is_scam'] else 'clean'] += 1
+            if any(link['is_suspicious'] for link in record['links']):
+                counts['suspicious_links'] += 1
+        lines.append(json.dumps(record, ensure_ascii=False))
+
+    lines.append('')
+    return '\n'.join(lines), dict(counts)
+
+class BulkScanner:
+    """Scan a message stream in chunks across a process pool with bounded memory"""
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 1000,
+                 check_links: bool = True, progress_interval: float = 10.0):
+        """
+        Initialize the scanner
+
+        Args:
+            workers: Worker processes (CPU count if None; 1 scans in this process)
+            chunk_size: Messages sent to a worker at a time
+            check_links: Also run the link analyzer
+            progress_interval: Seconds between progress reports on stderr (0 disables)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.check_links = check_links
+        self.progress_interval = progress_interval
+
+    def scan(self, messages, output) -> Dict[str, Any]:
+        """
+        Scan messages and write one JSON result per message, in input order
+
+        At most two chunks per worker are in flight, so memory stays constant
+        however large the input is.
+
+        Args:
+            messages: Iterator of tuples produced by iter_messages
+            output: Text stream the JSONL results are written to
+
+        Returns:
+            Summary with message counts, elapsed time and throughput
+        """
+        started = time.perf_counter()
+        next_report = started + self.progress_interval
+        totals = Counter()
+        log_level = logging.getLogger().level
+
+        for text, counts in self._iter_results(iter_chunks(iter(messages), self.chunk_size), log_level):
+            output.write(text)
+            totals.update(counts)
+
+            now = time.perf_counter()
+            if self.progress_interval and now >= next_report:
+                next_report = now + self.progress_interval
+                self._report(totals, now - started, sys.stderr)
+
+        output.flush()
+        return self._summary(totals, time.perf_counter() - started)
+
+    def _iter_results(self, chunks, log_level: int):
+        """Yield chunk results in order, keeping a bounded number of chunks in flight"""
+        if self.workers == 1:
+            _init_worker(log_level, self.check_links)
+            for chunk in chunks:
+                yield scan_chunk(chunk)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(log_level, self.check_links)) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(scan_chunk, chunk))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    @staticmethod
+    def _summary(totals: Counter, elapsed: float) -> Dict[str, Any]:
+        """Summary of a scan so far"""
+        messages = sum(totals[key] for key in ('scams', 'clean', 'errors'))
+        return {
+            'messages': messages,
+            'scams': totals['scams'],
+            'clean': totals['clean'],
+            'errors': totals['errors'],
+            'with_suspicious_links': totals['suspicious_links'],
+            'elapsed_seconds': round(elapsed, 2),
+            'messages_per_second': round(messages / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+    def _report(self, totals: Counter, elapsed: float, stream):
+        """Write a progress line"""
+        summary = self._summary(totals, elapsed)
+        stream.write(f"Scanned {summary['messages']} messages ({summary['scams']} scams) "
+                     f"in {summary['elapsed_seconds']}s, {summary['messages_per_second']} msg/s\n")
+        stream.flush()
+
+def detect_format(path: str) -> str:
+    """Guess the input format from the file extension"""
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def main():
+    """Scan a JSONL or CSV message dump from the command line"""
+    parser = argparse.ArgumentParser(description="Scan a large SMS/chat dump for scams")
+    parser.add_argument('input', help="JSONL or CSV file to scan ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-', help="JSONL file for the results ('-' for stdout)")
+    parser.add_argument('--format', choices=['auto', 'jsonl', 'csv'], default='auto', help="Input format")
+    parser.add_argument('--text-field', default='text', help="Field holding the message text")
+    parser.add_argument('--id-field', help="Field holding the message id (record number by default)")
+    parser.add_argument('--workers', type=int, help="Worker processes (CPU count by default)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Messages per worker task")
+    parser.add_argument('--no-links', action='store_true', help="Skip link analysis")
+    parser.add_argument('--progress-interval', type=float, default=10.0,
+                        help="Seconds between progress reports (0 disables)")
+    parser.add_argument('--verbose', action='store_true', help="Log analyzer details")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    input_format = args.format if args.format != 'auto' else detect_format(args.input)
+    if args.input == '-':
+        source = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace', newline='')
+    else:
+        source = open(args.input, encoding='utf-8', errors='replace', newline='')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+
+    scanner = BulkScanner(workers=args.workers, chunk_size=args.chunk_size,
+                          check_links=not args.no_links, progress_interval=args.progress_interval)
+    try:
+        summary = scanner.scan(iter_messages(source, input_format, args.text_field, args.id_field), output)
+    finally:
+        source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    sys.stderr.write(json.dumps(summary) + '\n')
+
+if __name__ == '__main__':
+    main()
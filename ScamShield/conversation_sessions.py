@@ -0,0 +1,209 @@
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+class ConversationSession:
+    """
+    One chatbot conversation: its id, detector state and bookkeeping for the store
+
+    status tells how the current message found it: 'new' without an id,
+    'continued' from this worker's memory, 'restored' from a state token,
+    or 'reset' when the id was given but the conversation could not be
+    continued and started over.
+    """
+
+    __slots__ = ('session_id', 'state', 'lock', 'last_seen', 'size', 'status')
+
+    def __init__(self, session_id: str, state: Any, status: str = 'new'):
+        self.session_id = session_id
+        self.state = state
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.size = state.memory_size()
+        self.status = status
+
+class ConversationStore:
+    """
+    Conversations of this worker, bounded by idle time and estimated memory
+
+    Sessions are kept in least recently used order. Sessions idle for
+    longer than idle_seconds are dropped on the next access, and when the
+    estimated memory of all sessions passes max_bytes the least recently
+    used ones are dropped until it fits again.
+
+    Each worker process has its own store, so with a secret the state of a
+    session is also handed to the client after every message as a signed
+    token. A worker that has not seen the session, or holds an older
+    state of it, continues from the token the client sends back.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_bytes: int = 16 * 1024 * 1024,
+                 idle_seconds: float = 1800, restore: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 secret: Optional[str] = None):
+        """
+        Initialize an empty store
+
+        Args:
+            factory: Callable creating the state of a new conversation; the
+                state must provide memory_size(), and to_dict() and turns
+                for state tokens
+            max_bytes: Estimated memory all sessions may hold together
+            idle_seconds: Seconds without a message after which a session is
+                dropped; state tokens expire after the same time
+            restore: Callable rebuilding a state from its to_dict(), or
+                returning None if it cannot be used
+            secret: Key signing state tokens; without it or restore no tokens are issued
+        """
+        self.factory = factory
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.restore = restore
+        self._serializer = (
+            URLSafeTimedSerializer(secret, salt='conversation-state') if secret and restore else None
+        )
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_size = 0
+
+        self.created = 0
+        self.restored = 0
+        self.resets = 0
+        self.expired = 0
+        self.evictions = 0
+
+        logging.info(f"ConversationStore initialized with {max_bytes} bytes, {idle_seconds}s idle timeout")
+
+    @contextmanager
+    def session(self, session_id: Optional[str] = None,
+                token: Optional[str] = None) -> Iterator[ConversationSession]:
+        """
+        Use a conversation, creating it if it cannot be found
+
+        A session is taken from this worker's memory, or rebuilt from its
+        state token when the token is newer. Otherwise, including for
+        expired sessions and tokens, bad signatures and state saved under
+        other rules, a new conversation starts under a freshly generated
+        id, so clients cannot pick ids; its status is 'reset' if an id was
+        given. Turns of one session are serialized by its lock.
+
+        Args:
+            session_id: Id returned with an earlier message, or None
+            token: State token returned with the same message, or None
+
+        Yields:
+            The session; its session_id, and token(session) once the message
+            is processed, are the ones to send with the next message
+        """
+        saved = self._load_token(session_id, token)
+        with self._lock:
+            self._expire(time.monotonic())
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None and (saved is None or saved.get('turns', 0) <= session.state.turns):
+                self._sessions.move_to_end(session.session_id)
+                session.last_seen = time.monotonic()
+                session.status = 'continued'
+            else:
+                state = self.restore(saved) if saved is not None else None
+                if state is not None:
+                    if session is not None:
+                        self._drop(session)
+                    session = ConversationSession(session_id, state, status='restored')
+                    self.restored += 1
+                else:
+                    session = ConversationSession(secrets.token_urlsafe(16), self.factory(),
+                                                  status='reset' if session_id else 'new')
+                    self.created += 1
+                    if session_id:
+                        self.resets += 1
+                self._sessions[session.session_id] = session
+                self._total_size += session.size
+
+        with session.lock:
+            try:
+                yield session
+            finally:
+                size = session.state.memory_size()
+                session.last_seen = time.monotonic()
+
+        with self._lock:
+            if self._sessions.get(session.session_id) is session:
+                self._total_size += size - session.size
+                session.size = size
+                self._evict(keep=session.session_id)
+
+    def token(self, session: ConversationSession) -> Optional[str]:
+        """
+        Signed state token of a session, to be sent back with its next message
+
+        The token is signed, not encrypted: it carries the recent text of
+        the conversation, which the client sent itself.
+
+        Returns:
+            The token, or None if the store has no secret
+        """
+        if self._serializer is None:
+            return None
+        return self._serializer.dumps({'session_id': session.session_id, 'state': session.state.to_dict()})
+
+    def _load_token(self, session_id: Optional[str], token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Saved state of a valid, unexpired token issued for session_id"""
+        if self._serializer is None or not session_id or not isinstance(token, str):
+            return None
+        try:
+            payload = self._serializer.loads(token, max_age=self.idle_seconds)
+        except BadData:
+            return None
+        if not isinstance(payload, dict) or payload.get('session_id') != session_id:
+            return None
+        saved = payload.get('state')
+        return saved if isinstance(saved, dict) and isinstance(saved.get('turns'), int) else None
+
+    def _expire(self, now: float):
+        """Drop sessions idle for too long; caller must hold the lock"""
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_seen + self.idle_seconds > now:
+                break
+            self._drop(session)
+            self.expired += 1
+
+    def _evict(self, keep: str):
+        """Drop least recently used sessions until the memory estimate fits; caller must hold the lock"""
+        while self._total_size > self.max_bytes and len(self._sessions) > 1:
+            session = next(iter(self._sessions.values()))
+            if session.session_id == keep:
+                break
+            self._drop(session)
+            self.evictions += 1
+
+    def _drop(self, session: ConversationSession):
+        """Remove a session from the store; caller must hold the lock"""
+        del self._sessions[session.session_id]
+        self._total_size -= session.size
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def memory_size(self) -> int:
+        """Estimated bytes held by all sessions"""
+        return self._total_size
+
+    def stats(self) -> Dict[str, Any]:
+        """Get session counts and the memory estimate"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'estimated_bytes': self._total_size,
+                'max_bytes': self.max_bytes,
+                'idle_seconds': self.idle_seconds,
+                'created': self.created,
+                'restored': self.restored,
+                'resets': self.resets,
+                'expired': self.expired,
+                'evictions': self.evictions
+            }
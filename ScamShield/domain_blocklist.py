@@ -0,0 +1,217 @@
+import os
+import sys
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import argparse
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional
+from urllib.parse import urlparse
+
+# File layout (native byte order, checked through BYTE_ORDER_MARK):
+#   header: magic, byte order mark, domain count, bucket bits
+#   buckets: 2**bucket_bits + 1 offsets into the hash table, by top hash bits
+#   hashes: sorted, unique 64-bit BLAKE2b hashes of the normalized domains
+MAGIC = b'CRBLIDX1'
+BYTE_ORDER_MARK = 0x0102030405060708
+HEADER = struct.Struct('=8sQQQ')
+BUCKET_BITS = 16
+
+def hash_domain(domain: str) -> int:
+    """64-bit hash of a normalized domain name"""
+    return int.from_bytes(hashlib.blake2b(domain.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def normalize_domain(entry: str) -> Optional[str]:
+    """
+    Extract the domain from one line of a threat-intel feed
+
+    Accepts bare domains, wildcard entries ('*.evil.com'), hosts-file lines
+    ('0.0.0.0 evil.com') and full URLs. Comments and blank lines give None.
+    """
+    entry = entry.split('#', 1)[0].strip()
+    if not entry:
+        return None
+    entry = entry.split()[-1]
+    if '://' in entry:
+        entry = urlparse(entry).netloc
+    entry = entry.rpartition('@')[2].partition(':')[0]
+    domain = entry.lstrip('*.').rstrip('.').lower()
+    return domain or None
+
+def build_blocklist(domains: Iterable[str], output_path: str) -> int:
+    """
+    Build a blocklist index file from feed lines
+
+    The index is written next to the target and renamed over it, so running
+    processes never see a partial file and pick the new one up atomically.
+
+    Args:
+        domains: Feed lines, one domain entry each
+        output_path: Path of the index file to create or replace
+
+    Returns:
+        Number of unique domains indexed
+    """
+    hashes = array('Q', sorted({hash_domain(domain) for domain in map(normalize_domain, domains) if domain}))
+
+    shift = 64 - BUCKET_BITS
+    buckets = array('Q', [0] * ((1 << BUCKET_BITS) + 1))
+    for value in hashes:
+        buckets[(value >> shift) + 1] += 1
+    for index in range(1, len(buckets)):
+        buckets[index] += buckets[index - 1]
+
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as index_file:
+        index_file.write(HEADER.pack(MAGIC, BYTE_ORDER_MARK, len(hashes), BUCKET_BITS))
+        buckets.tofile(index_file)
+        hashes.tofile(index_file)
+        index_file.flush()
+        os.fsync(index_file.fileno())
+    os.replace(temp_path, output_path)
+
+    logging.info(f"Built blocklist index {output_path} with {len(hashes)} domains")
+    return len(hashes)
+
+class _MappedIndex:
+    """One memory-mapped, read-only generation of the index file"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as index_file:
+            self.identity = self._identity(os.fstat(index_file.fileno()))
+            self._mmap = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"{path} is not a blocklist index built for this platform")
+        magic, byte_order, self.count, bucket_bits = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or byte_order != BYTE_ORDER_MARK or not 0 < bucket_bits < 64:
+            raise ValueError(f"{path} is not a blocklist index built for this platform")
+
+        self._shift = 64 - bucket_bits
+        bucket_count = (1 << bucket_bits) + 1
+        start = HEADER.size
+        if len(self._mmap) != start + (bucket_count + self.count) * 8:
+            raise ValueError(f"{path} is truncated or corrupt")
+        words = memoryview(self._mmap)[start:start + (bucket_count + self.count) * 8].cast('Q')
+        self._buckets = words[:bucket_count]
+        self._hashes = words[bucket_count:]
+
+    @staticmethod
+    def _identity(stat_result):
+        """Values that change whenever a new build replaces the file"""
+        return (stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+
+    def __contains__(self, value: int) -> bool:
+        bucket = value >> self._shift
+        low, high = self._buckets[bucket], self._buckets[bucket + 1]
+        position = bisect_left(self._hashes, value, low, high)
+        return position < high and self._hashes[position] == value
+
+class DomainBlocklist:
+    """Memory-mapped blocklist index shared by all workers and reloaded when rebuilt"""
+
+    def __init__(self, path: str, check_interval: float = 5.0):
+        """
+        Map the index file
+
+        Args:
+            path: Index file produced by build_blocklist
+            check_interval: Seconds between checks for a new build of the file
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._index = _MappedIndex(path)
+        self._next_check = time.monotonic() + check_interval
+        self._reload_lock = threading.Lock()
+
+        logging.info(f"DomainBlocklist mapped {self._index.count} domains from {path}")
+
+    @property
+    def size(self) -> int:
+        """Number of domains in the current index"""
+        return self._index.count
+
+    @property
+    def version(self) -> str:
+        """Identity of the current index file, which changes when a new build is mapped"""
+        self._maybe_reload()
+        return '-'.join(str(value) for value in self._index.identity)
+
+    def contains(self, domain: str) -> bool:
+        """Check whether exactly this domain is blocklisted"""
+        self._maybe_reload()
+        return hash_domain(domain) in self._index
+
+    def match(self, host: str, registered_domain: Optional[str] = None) -> Optional[str]:
+        """
+        Find the blocklisted domain a host belongs to
+
+        The host and each parent domain down to its registrable domain are
+        checked, so a listed 'evil.com' also covers 'login.evil.com'.
+
+        Args:
+            host: Normalized host name
+            registered_domain: eTLD+1 of the host, the last parent checked
+
+        Returns:
+            The blocklisted domain, or None
+        """
+        self._maybe_reload()
+        index = self._index  # One generation for the whole lookup
+        candidate = host
+        while candidate:
+            if hash_domain(candidate) in index:
+                return candidate
+            if not registered_domain or candidate == registered_domain:
+                return None
+            candidate = candidate.partition('.')[2]
+        return None
+
+    def _maybe_reload(self):
+        """Swap in a new build of the index file; lookups never wait on this"""
+        now = time.monotonic()
+        if now < self._next_check or not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = now + self.check_interval
+            try:
+                identity = _MappedIndex._identity(os.stat(self.path))
+            except OSError:
+                return
+            if identity != self._index.identity:
+                index = _MappedIndex(self.path)
+                # Readers holding the old generation keep it mapped until they finish
+                self._index = index
+                logging.info(f"DomainBlocklist reloaded {index.count} domains from {self.path}")
+        except Exception as e:
+            logging.error(f"Blocklist reload failed, keeping the current index: {str(e)}")
+        finally:
+            self._reload_lock.release()
+
+def _iter_feed_lines(paths) -> Iterator[str]:
+    """Yield lines from feed files ('-' for stdin)"""
+    for path in paths:
+        if path == '-':
+            yield from sys.stdin
+        else:
+            with open(path, encoding='utf-8', errors='replace') as feed:
+                yield from feed
+
+def main():
+    """Build a blocklist index from threat-intel feed files"""
+    parser = argparse.ArgumentParser(description="Build the memory-mapped domain blocklist index")
+    parser.add_argument('feeds', nargs='+', help="Feed files with one domain, hosts entry or URL per line ('-' for stdin)")
+    parser.add_argument('-o', '--output', required=True, help="Index file to create or atomically replace")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    count = build_blocklist(_iter_feed_lines(args.feeds), args.output)
+    print(f"Indexed {count} domains into {args.output} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
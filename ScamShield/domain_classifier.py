@@ -0,0 +1,195 @@
+import os
+import re
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from keyword_matcher import KeywordMatcher
+
+DEFAULT_SUFFIX_LIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'public_suffix_list.dat')
+
+# IPv4 hosts, or IPv6 hosts (the only ones containing ':' once brackets are stripped)
+IP_ADDRESS = re.compile(r'^(?:[0-9]{1,3}\.){3}[0-9]{1,3}$|:')
+
+def normalize_host(netloc: str) -> str:
+    """
+    Reduce a URL netloc to a bare lowercase host name
+
+    Strips credentials, the port, IPv6 brackets and a trailing dot, so
+    'user@WWW.Bit.ly.:443' becomes 'www.bit.ly'.
+    """
+    host = netloc.rpartition('@')[2]
+    if host.startswith('['):
+        return host[1:host.find(']')].lower() if ']' in host else host[1:].lower()
+    return host.partition(':')[0].rstrip('.').lower()
+
+class PublicSuffixList:
+    """Public suffix rules for finding the registrable domain (eTLD+1) of a host"""
+
+    def __init__(self, path: str = DEFAULT_SUFFIX_LIST):
+        """
+        Load suffix rules in the publicsuffix.org file format
+
+        Args:
+            path: Path to a public_suffix_list.dat file
+        """
+        self.rules = set()
+        self.wildcards = set()
+        self.exceptions = set()
+
+        with open(path, encoding='utf-8') as suffix_file:
+            for line in suffix_file:
+                rule = line.split(None, 1)[0] if line.strip() else ''
+                if not rule or rule.startswith('//'):
+                    continue
+                rule = rule.lower()
+                if rule.startswith('!'):
+                    self.exceptions.add(rule[1:])
+                elif rule.startswith('*.'):
+                    self.wildcards.add(rule[2:])
+                else:
+                    self.rules.add(rule)
+
+        logging.info(f"PublicSuffixList loaded {len(self.rules) + len(self.wildcards) + len(self.exceptions)} rules")
+
+    def public_suffix_length(self, labels: List[str]) -> int:
+        """
+        Number of trailing labels forming the public suffix
+
+        Args:
+            labels: Host labels, left to right
+
+        Returns:
+            Label count of the longest matching rule (1 when only the implicit '*' rule matches)
+        """
+        suffix_length = 1
+        for start in range(len(labels) - 1, -1, -1):
+            candidate = '.'.join(labels[start:])
+            length = len(labels) - start
+            if candidate in self.exceptions:
+                return length - 1
+            if candidate in self.rules:
+                suffix_length = length
+            if start > 0 and candidate in self.wildcards:
+                suffix_length = length + 1
+        return suffix_length
+
+    def registered_domain(self, host: str) -> Optional[str]:
+        """
+        Get the registrable domain of a host, e.g. 'sbi.co.in' for 'www.sbi.co.in'
+
+        Returns:
+            eTLD+1, or None for bare public suffixes and IP addresses
+        """
+        if not host or IP_ADDRESS.match(host):
+            return None
+        labels = host.split('.')
+        suffix_length = self.public_suffix_length(labels)
+        if suffix_length >= len(labels):
+            return None
+        return '.'.join(labels[-suffix_length - 1:])
+
+class DomainTrie:
+    """Trie over reversed domain labels for suffix and subdomain matching"""
+
+    _VALUE = ''  # Labels are never empty, so '' marks a node holding a value
+
+    def __init__(self, domains: Iterable[Tuple[str, Any]] = ()):
+        """Initialize the trie with (domain, value) pairs"""
+        self._root = {}
+        self.size = 0
+        for domain, value in domains:
+            self.add(domain, value)
+
+    def add(self, domain: str, value: Any):
+        """Register a domain; it then matches itself and all of its subdomains"""
+        node = self._root
+        for label in reversed(domain.lower().strip('.').split('.')):
+            node = node.setdefault(label, {})
+        if self._VALUE not in node:
+            self.size += 1
+        node[self._VALUE] = value
+
+    def match(self, host: str) -> Optional[Tuple[str, Any]]:
+        """
+        Find the longest registered domain that host equals or is a subdomain of
+
+        Returns:
+            Tuple of (matched domain, value), or None
+        """
+        node = self._root
+        labels = host.split('.')
+        found = None
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.get(label)
+            if node is None:
+                break
+            if self._VALUE in node:
+                found = ('.'.join(labels[-depth:]), node[self._VALUE])
+        return found
+
+class DomainClassifier:
+    """Precompiled host and path checks used by LinkAnalyzer"""
+
+    def __init__(self, shortener_domains: Iterable[str], suspicious_patterns: List[str],
+                 phishing_keywords: List[str], blocked_domains: Iterable[str] = (),
+                 suffix_list: Optional[PublicSuffixList] = None, cache_size: int = 65536):
+        """
+        Compile the classifier
+
+        Args:
+            shortener_domains: URL shortener domains, matched with their subdomains
+            suspicious_patterns: Regexes flagging suspicious host names
+            phishing_keywords: Keywords flagging suspicious URL paths
+            blocked_domains: Known malicious domains, matched with their subdomains
+            suffix_list: Public suffix rules (the bundled list by default)
+            cache_size: Number of host classifications memoized
+        """
+        self.suffix_list = suffix_list or PublicSuffixList()
+        self.domain_trie = DomainTrie()
+        for domain in shortener_domains:
+            self.domain_trie.add(domain, 'shortener')
+        for domain in blocked_domains:
+            self.domain_trie.add(domain, 'blocklist')
+
+        # One regex evaluates every host pattern in a single match() call: each
+        # pattern sits in its own optional lookahead, so unlike a plain
+        # alternation no pattern can shadow another
+        self.suspicious_patterns = list(suspicious_patterns)
+        self.host_regex = re.compile(''.join(
+            f'(?=(?:.*?(?P<p{index}>{pattern}))?)' for index, pattern in enumerate(self.suspicious_patterns)
+        ))
+
+        self.phishing_keywords = list(phishing_keywords)
+        self.path_matcher = KeywordMatcher()
+        for order, keyword in enumerate(self.phishing_keywords):
+            self.path_matcher.add(keyword, (order, keyword))
+        self.path_matcher.build()
+
+        self.classify_host = lru_cache(maxsize=cache_size)(self._classify_host)
+
+    def add_blocked_domains(self, domains: Iterable[str]):
+        """Add known malicious domains to the suffix trie"""
+        for domain in domains:
+            self.domain_trie.add(domain, 'blocklist')
+        self.classify_host.cache_clear()
+
+    def _classify_host(self, host: str) -> Dict[str, Any]:
+        """
+        Classify a normalized host name
+
+        Returns:
+            Dictionary with the trie match, matching pattern sources and eTLD+1
+        """
+        trie_match = self.domain_trie.match(host)
+        match = self.host_regex.match(host)
+        return {
+            'list_match': trie_match,
+            'patterns': [pattern for index, pattern in enumerate(self.suspicious_patterns)
+                         if match.group(f'p{index}') is not None],
+            'registered_domain': self.suffix_list.registered_domain(host)
+        }
+
+    def path_keywords(self, path: str) -> List[str]:
+        """Phishing keywords present in a lowercase URL path, in keyword list order"""
+        matches, _ = self.path_matcher.scan(path)
+        return [keyword for _, keyword in sorted({payload for _, payload in matches})]
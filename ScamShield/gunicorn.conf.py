@@ -0,0 +1,58 @@
+# Gunicorn settings, picked up automatically when gunicorn runs from this directory:
+#   gunicorn main:app
+import gc
+import os
+import time
+from process_stats import memory_usage, process_age
+from metrics import mark_process_dead, prepare_run_directory
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# The OCR job queue sizes each worker's pool to its share of the cores
+os.environ['WEB_CONCURRENCY'] = str(workers)
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Build the app, and the compiled keyword automata and pattern tables it holds,
+# once in the master; forked workers then share those pages copy-on-write
+# instead of each compiling and holding its own copy
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes', 'on')
+
+# One metrics directory per server run, set up before the app is loaded so
+# the master and every worker share it; gunicorn reads this file again on
+# HUP, which must keep the run's directory and counters
+if os.environ.get('METRICS_RUN_PID') != str(os.getpid()):
+    prepare_run_directory(os.environ.get('METRICS_DIR'))
+    os.environ['METRICS_RUN_PID'] = str(os.getpid())
+
+def _megabytes(value):
+    return f"{value / (1024 * 1024):.1f}MB" if value is not None else 'n/a'
+
+def when_ready(server):
+    """Freeze the preloaded objects and report the master's cold start"""
+    if preload_app:
+        # Objects moved to the permanent generation are never scanned by the
+        # collector, so its reference-count writes do not unshare their pages
+        gc.freeze()
+    age = process_age()
+    memory = memory_usage()
+    server.log.info("Master ready after %s, rss %s",
+                    f"{age * 1000:.0f}ms" if age is not None else 'n/a', _megabytes(memory.get('rss')))
+
+def post_fork(server, worker):
+    worker.booted_at = time.perf_counter()
+
+def child_exit(server, worker):
+    """Keep the exited worker's counters and drop its gauges"""
+    try:
+        mark_process_dead(worker.pid)
+    except OSError as e:
+        server.log.warning("Could not archive metrics of worker %s: %s", worker.pid, e)
+
+def post_worker_init(worker):
+    """Report how long the worker took to boot and how much of its memory is shared"""
+    memory = memory_usage()
+    worker.log.info("Worker %s booted in %.0fms: rss %s, pss %s, shared %s, private %s",
+                    worker.pid, (time.perf_counter() - worker.booted_at) * 1000,
+                    _megabytes(memory.get('rss')), _megabytes(memory.get('pss')),
+                    _megabytes(memory.get('shared_clean', 0) + memory.get('shared_dirty', 0)),
+                    _megabytes(memory.get('private_clean', 0) + memory.get('private_dirty', 0)))
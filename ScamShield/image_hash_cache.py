@@ -0,0 +1,244 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from PIL import Image, ImageChops
+from ocr import open_image
+
+HASH_BITS = 64
+THUMBNAIL_PIXELS = 32768  # Grayscale pixels kept per image to verify candidates
+THUMBNAIL_BLOCK = 4  # Side of the thumbnail blocks whose mean difference is compared
+MAX_ASPECT_CHANGE = 0.02  # Largest relative difference in aspect ratio of two copies of one image
+
+class ImageSignature:
+    """Perceptual hash of an image plus the thumbnail and aspect ratio that confirm a match"""
+
+    __slots__ = ('image_hash', 'aspect', 'thumbnail', 'languages')
+
+    def __init__(self, image_hash: int, aspect: float, thumbnail: Image.Image, languages: Optional[str] = None):
+        self.image_hash = image_hash
+        self.aspect = aspect
+        self.thumbnail = thumbnail
+        self.languages = languages
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute the difference hash of an image
+
+    The image is shrunk to (hash_size + 1) x hash_size grayscale pixels and
+    each bit records whether a pixel is brighter than its right neighbour,
+    so recompression and small crops or rescales barely change the hash.
+
+    Args:
+        image: PIL image, ideally already reduced
+        hash_size: Hash width in bits per row
+
+    Returns:
+        hash_size * hash_size bit integer
+    """
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = small.tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for column in range(hash_size):
+            value = (value << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return value
+
+def image_signature(source, languages: Optional[str] = None) -> Optional[ImageSignature]:
+    """
+    Compute the signature an image is cached under
+
+    Only the first frame is decoded, JPEGs straight to grayscale, and it
+    is kept as a small thumbnail, which is all the hash and the
+    verification need. JPEGs are not decoded at a reduced DCT scale: that
+    downsamples differently from the box filter applied to other formats,
+    and a JPEG copy of a PNG would no longer verify.
+    Multi-frame images return None: their later frames would not be
+    covered, so they are always OCR'd.
+
+    Args:
+        source: Image bytes, a binary stream, a file path or a PIL image
+        languages: Tesseract languages the image will be OCR'd with; only
+            entries for the same languages match
+
+    Returns:
+        The signature, or None if the image is not cacheable
+    """
+    image = source if isinstance(source, Image.Image) else open_image(source, load=False)
+    if getattr(image, 'n_frames', 1) > 1:
+        return None
+
+    width, height = image.size
+    aspect = width / height
+    size = (max(1, round((THUMBNAIL_PIXELS * aspect) ** 0.5)), max(1, round((THUMBNAIL_PIXELS / aspect) ** 0.5)))
+    if image.format == 'JPEG':
+        image.draft('L', image.size)  # Skip the color conversion
+    thumbnail = image.convert('L').resize(size, Image.BOX)
+    return ImageSignature(dhash(thumbnail), aspect, thumbnail, languages)
+
+def thumbnail_difference(first: Image.Image, second: Image.Image) -> int:
+    """
+    Largest mean gray-level difference of any block of two thumbnails
+
+    Blocks rather than the whole image are compared because a different
+    chat with the same layout only differs where its text is, which the
+    mean over the whole image would dilute below recompression noise.
+    """
+    if second.size != first.size:
+        second = second.resize(first.size, Image.BOX)
+    blocks = (max(1, first.size[0] // THUMBNAIL_BLOCK), max(1, first.size[1] // THUMBNAIL_BLOCK))
+    return ImageChops.difference(first, second).resize(blocks, Image.BOX).getextrema()[1]
+
+class PerceptualHashCache:
+    """
+    Size-bounded index of recently seen images keyed by perceptual hash
+
+    The hash only finds candidates: screenshots with the same layout and
+    different text can hash the same. A candidate is reused only if it was
+    OCR'd with the same languages, has the same aspect ratio and its
+    thumbnail differs from the image's by at most max_pixel_difference in
+    every block, which recompression and rescaling stay under but a
+    changed word does not.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_distance: int = 4, max_pixel_difference: int = 8):
+        """
+        Initialize an empty index
+
+        Args:
+            max_entries: Maximum images kept before the least recently used is
+                evicted; each holds a thumbnail of about THUMBNAIL_PIXELS bytes
+            max_distance: Largest Hamming distance at which two hashes are candidates
+            max_pixel_difference: Largest block difference (0-255) at which a
+                candidate counts as the same image
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_pixel_difference = max_pixel_difference
+
+        # Multi-index hashing: split the hash into max_distance + 1 bands. Two
+        # hashes within max_distance bits must agree exactly on at least one
+        # band, so only entries sharing a band value need to be compared.
+        band_count = min(max_distance + 1, HASH_BITS)
+        widths = [HASH_BITS // band_count + (1 if index < HASH_BITS % band_count else 0)
+                  for index in range(band_count)]
+        self._bands = []
+        shift = 0
+        for width in widths:
+            self._bands.append((shift, (1 << width) - 1))
+            shift += width
+
+        # Entries are keyed by a counter, since different images can share a hash
+        self._entries = OrderedDict()
+        self._band_index = [{} for _ in self._bands]
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0
+
+        logging.info(f"PerceptualHashCache initialized with {max_entries} entries, distance {max_distance}, "
+                     f"pixel difference {max_pixel_difference}")
+
+    def lookup(self, signature: ImageSignature) -> Optional[Tuple[Any, int]]:
+        """
+        Find a cached copy of an image
+
+        Args:
+            signature: image_signature of the image
+
+        Returns:
+            Tuple of (cached value, Hamming distance), or None on a miss
+        """
+        with self._lock:
+            key = self._find(signature)
+            if key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            entry_signature, value = self._entries[key]
+            return value, (entry_signature.image_hash ^ signature.image_hash).bit_count()
+
+    def add(self, signature: ImageSignature, value: Any):
+        """Store the value for an image, replacing a cached copy of it and evicting the least recently used images"""
+        with self._lock:
+            key = self._find(signature, count=False)
+            if key is not None:
+                # The entry keeps its signature, which its band index entries were made from
+                self._entries[key] = (self._entries[key][0], value)
+                self._entries.move_to_end(key)
+                return
+
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = (signature, value)
+            for band_index, (shift, mask) in zip(self._band_index, self._bands):
+                band_index.setdefault((signature.image_hash >> shift) & mask, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                evicted, (evicted_signature, _) = self._entries.popitem(last=False)
+                self._remove_from_bands(evicted, evicted_signature.image_hash)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached image"""
+        with self._lock:
+            self._entries.clear()
+            for band_index in self._band_index:
+                band_index.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'max_distance': self.max_distance,
+                'max_pixel_difference': self.max_pixel_difference,
+                'hits': self.hits,
+                'misses': self.misses,
+                'rejected_candidates': self.rejected,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _find(self, signature: ImageSignature, count: bool = True) -> Optional[int]:
+        """Key of the closest verified copy of an image; caller must hold the lock"""
+        candidates = set()
+        for band_index, (shift, mask) in zip(self._band_index, self._bands):
+            candidates.update(band_index.get((signature.image_hash >> shift) & mask, ()))
+
+        best_key = None
+        best_distance = self.max_distance + 1
+        for key in candidates:
+            entry_signature, _ = self._entries[key]
+            distance = (entry_signature.image_hash ^ signature.image_hash).bit_count()
+            if distance >= best_distance or entry_signature.languages != signature.languages:
+                continue
+            if (abs(entry_signature.aspect - signature.aspect) > MAX_ASPECT_CHANGE * entry_signature.aspect
+                    or thumbnail_difference(entry_signature.thumbnail, signature.thumbnail)
+                    > self.max_pixel_difference):
+                # Looks alike at hash resolution but is a different image
+                if count:
+                    self.rejected += 1
+                continue
+            best_key = key
+            best_distance = distance
+        return best_key
+
+    def _remove_from_bands(self, key: int, image_hash: int):
+        """Unlink an evicted entry from the band index; caller must hold the lock"""
+        for band_index, (shift, mask) in zip(self._band_index, self._bands):
+            band_key = (image_hash >> shift) & mask
+            bucket = band_index.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del band_index[band_key]
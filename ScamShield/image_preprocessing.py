@@ -0,0 +1,275 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Tuple
+from PIL import Image, ImageOps
+
+class ImagePreprocessor:
+    """Shrink and clean up screenshots before OCR, since OCR time grows with pixel count"""
+
+    def __init__(self, enabled: bool = True, max_side: int = 2048, grayscale: bool = True,
+                 binarize: bool = True, status_bar_ratio: float = 0.03, trim_blank: bool = True,
+                 target_text_height: int = 32, min_scale: float = 0.25, max_scale: float = 2.0):
+        """
+        Initialize the preprocessing pipeline
+
+        Args:
+            enabled: Run the pipeline at all; when False images only get converted to RGB
+            max_side: Longest side (capped at 2x the shortest) the image is decoded at
+            grayscale: Convert to 8-bit grayscale
+            binarize: Threshold to black text on white using Otsu's method
+            status_bar_ratio: Fraction of the height cropped from the top of portrait screenshots
+            trim_blank: Crop blank margins around the text
+            target_text_height: Text line height in pixels the image is rescaled to (0 disables)
+            min_scale: Smallest rescale factor applied
+            max_scale: Largest rescale factor applied; upscaling small text is
+                further limited so the output never has more pixels than the input
+        """
+        self.enabled = enabled
+        self.max_side = max_side
+        self.grayscale = grayscale
+        self.binarize = binarize
+        self.status_bar_ratio = status_bar_ratio
+        self.trim_blank = trim_blank
+        self.target_text_height = target_text_height
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+
+        self._lock = threading.Lock()
+        self.totals = {
+            'images': 0,
+            'input_pixels': 0,
+            'output_pixels': 0,
+            'pixel_change': 0,
+            'preprocess_ms': 0.0,
+            'ocr_ms': 0.0,
+            'estimated_ocr_ms_saved': 0.0
+        }
+
+    @classmethod
+    def from_env(cls) -> 'ImagePreprocessor':
+        """Build a preprocessor configured through OCR_PREPROCESS_* environment variables"""
+        def flag(name, default):
+            return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+        return cls(
+            enabled=flag('OCR_PREPROCESS', 'true'),
+            max_side=int(os.environ.get('OCR_PREPROCESS_MAX_SIDE', 2048)),
+            grayscale=flag('OCR_PREPROCESS_GRAYSCALE', 'true'),
+            binarize=flag('OCR_PREPROCESS_BINARIZE', 'true'),
+            status_bar_ratio=float(os.environ.get('OCR_PREPROCESS_STATUS_BAR_RATIO', 0.03)),
+            trim_blank=flag('OCR_PREPROCESS_TRIM_BLANK', 'true'),
+            target_text_height=int(os.environ.get('OCR_PREPROCESS_TEXT_HEIGHT', 32)),
+            max_scale=float(os.environ.get('OCR_PREPROCESS_MAX_SCALE', 2.0))
+        )
+
+    def process(self, image: Image.Image) -> Tuple[Image.Image, Dict[str, Any]]:
+        """
+        Run the pipeline on an opened (ideally not yet loaded) image
+
+        Args:
+            image: Image returned by Image.open
+
+        Returns:
+            Tuple of (image ready for OCR, statistics about the steps applied)
+        """
+        started = time.perf_counter()
+        original_size = image.size
+        steps = []
+
+        if not self.enabled:
+            image.load()
+            decode_ms = (time.perf_counter() - started) * 1000
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            return image, self._stats(original_size, image.size, steps, started, decode_ms)
+
+        # Decode at reduced size: JPEG can skip DCT work via draft mode. Scroll
+        # captures are measured on at most a 2:1 window so their height alone
+        # never shrinks the text; they are tiled for OCR instead
+        longest = self._reference_side(image.size)
+        if self.max_side and longest > self.max_side:
+            target = (image.size[0] * self.max_side // longest, image.size[1] * self.max_side // longest)
+            if image.format == 'JPEG':
+                image.draft('L' if self.grayscale else 'RGB', target)
+            image.load()
+            if image.size != original_size:
+                steps.append('draft')
+            factor = self._reference_side(image.size) // self.max_side
+            if factor >= 2:
+                image = image.reduce(factor)
+                steps.append(f'reduce_{factor}')
+
+        # Decoding is otherwise deferred to the first conversion; force it to time it
+        image.load()
+        decode_ms = (time.perf_counter() - started) * 1000
+
+        if self.grayscale:
+            image = image.convert('L')
+            steps.append('grayscale')
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        # Phone screenshots carry a status bar (clock, battery) at the top; its
+        # height is relative to one screen, even for long scroll captures
+        width, height = image.size
+        if self.status_bar_ratio and height > width * 1.6:
+            screen_height = min(height, int(width * 2.2))
+            image = image.crop((0, int(screen_height * self.status_bar_ratio), width, height))
+            steps.append('trim_status_bar')
+
+        if image.mode == 'L' and (self.binarize or self.trim_blank or self.target_text_height):
+            threshold = self._otsu_threshold(image)
+            binary = self._threshold(image, threshold)
+
+            if self.trim_blank:
+                box = ImageOps.invert(binary).getbbox()
+                if box and box != (0, 0) + binary.size:
+                    box = self._pad_box(box, binary.size, padding=10)
+                    image = image.crop(box)
+                    binary = binary.crop(box)
+                    steps.append('trim_blank')
+
+            # Small text is only enlarged within the input's pixel count, so
+            # preprocessing never hands OCR more pixels than it was given
+            budget = (original_size[0] * original_size[1] / (image.size[0] * image.size[1])) ** 0.5
+            scale = self._text_scale(binary, max_scale=min(self.max_scale, budget))
+            if scale != 1.0:
+                new_size = (max(1, int(image.size[0] * scale)), max(1, int(image.size[1] * scale)))
+                image = image.resize(new_size, Image.LANCZOS)
+                steps.append(f'rescale_{scale:.2f}')
+                if self.binarize:
+                    binary = self._threshold(image, threshold)
+
+            if self.binarize:
+                image = binary
+                steps.append('binarize')
+
+        return image, self._stats(original_size, image.size, steps, started, decode_ms)
+
+    def record_ocr_time(self, stats: Dict[str, Any], ocr_ms: float):
+        """
+        Add OCR timing to the statistics of one image
+
+        OCR time is assumed proportional to the pixel count, so the time the
+        original image would have taken is estimated from the measured time.
+        The estimate is negative if preprocessing added pixels.
+        """
+        ratio = stats['input_pixels'] / max(stats['output_pixels'], 1)
+        stats['ocr_ms'] = round(ocr_ms, 1)
+        stats['estimated_ocr_ms_saved'] = round(ocr_ms * ratio - ocr_ms, 1)
+        self.add_to_totals(stats)
+
+    def add_to_totals(self, stats: Dict[str, Any]):
+        """
+        Add the statistics of one OCR'd image to the cumulative totals
+
+        Also used by the web worker for images OCR'd in the OCR job pool,
+        whose own totals are not visible to it.
+        """
+        with self._lock:
+            self.totals['images'] += 1
+            self.totals['input_pixels'] += stats['input_pixels']
+            self.totals['output_pixels'] += stats['output_pixels']
+            self.totals['pixel_change'] += stats['pixel_change']
+            self.totals['preprocess_ms'] += stats['preprocess_ms']
+            self.totals['ocr_ms'] += stats['ocr_ms']
+            self.totals['estimated_ocr_ms_saved'] += stats['estimated_ocr_ms_saved']
+
+    def get_totals(self) -> Dict[str, Any]:
+        """Get cumulative preprocessing statistics for this process"""
+        with self._lock:
+            return dict(self.totals)
+
+    def _text_scale(self, binary: Image.Image, max_scale: float) -> float:
+        """Scale factor bringing the median text line height to the target height, at most max_scale"""
+        if not self.target_text_height:
+            return 1.0
+
+        # Mean of each row: any ink makes a row darker than pure white
+        profile = binary.resize((1, binary.size[1]), Image.BOX).getdata()
+        line_heights = []
+        run = 0
+        for value in profile:
+            if value < 255:
+                run += 1
+            elif run:
+                line_heights.append(run)
+                run = 0
+        if run:
+            line_heights.append(run)
+
+        line_heights = sorted(height for height in line_heights if height >= 4)
+        if not line_heights:
+            return 1.0
+
+        median_height = line_heights[len(line_heights) // 2]
+        scale = min(max(self.target_text_height / median_height, self.min_scale), max_scale)
+        if abs(scale - 1.0) < 0.1:
+            return 1.0  # Not worth the resampling
+        return scale
+
+    @staticmethod
+    def _reference_side(size) -> int:
+        """Longest side of the image, capped at twice its shortest side"""
+        return min(max(size), 2 * min(size))
+
+    @staticmethod
+    def _otsu_threshold(image: Image.Image) -> int:
+        """Compute Otsu's threshold from the grayscale histogram"""
+        histogram = image.histogram()[:256]
+        total = sum(histogram)
+        sum_all = sum(level * count for level, count in enumerate(histogram))
+
+        best_threshold = 127
+        best_variance = 0.0
+        weight_background = 0
+        sum_background = 0
+        for level, count in enumerate(histogram):
+            weight_background += count
+            if weight_background == 0:
+                continue
+            weight_foreground = total - weight_background
+            if weight_foreground == 0:
+                break
+            sum_background += level * count
+            mean_background = sum_background / weight_background
+            mean_foreground = (sum_all - sum_background) / weight_foreground
+            variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+            if variance > best_variance:
+                best_variance = variance
+                best_threshold = level
+        return best_threshold
+
+    @staticmethod
+    def _threshold(image: Image.Image, threshold: int) -> Image.Image:
+        """Binarize to dark text on a white background, inverting dark-mode screenshots"""
+        histogram = image.histogram()[:256]
+        dark_pixels = sum(histogram[:threshold + 1])
+        dark_mode = dark_pixels > sum(histogram) / 2
+        if dark_mode:
+            table = [0 if level > threshold else 255 for level in range(256)]
+        else:
+            table = [255 if level > threshold else 0 for level in range(256)]
+        return image.point(table)
+
+    @staticmethod
+    def _pad_box(box, size, padding: int):
+        """Grow a crop box by padding pixels, clamped to the image"""
+        left, top, right, bottom = box
+        return (max(left - padding, 0), max(top - padding, 0),
+                min(right + padding, size[0]), min(bottom + padding, size[1]))
+
+    def _stats(self, original_size, processed_size, steps, started, decode_ms) -> Dict[str, Any]:
+        """Statistics for one processed image"""
+        return {
+            'original_size': list(original_size),
+            'processed_size': list(processed_size),
+            'input_pixels': original_size[0] * original_size[1],
+            'output_pixels': processed_size[0] * processed_size[1],
+            'pixel_change': processed_size[0] * processed_size[1] - original_size[0] * original_size[1],
+            'steps': steps,
+            'decode_ms': round(decode_ms, 1),
+            'preprocess_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
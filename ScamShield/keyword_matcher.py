@@ -0,0 +1,101 @@
+from collections import deque
+from typing import Any, Dict, Iterator, List, Tuple
+
+class KeywordMatcher:
+    """Aho-Corasick automaton for matching many keywords in a single pass"""
+
+    def __init__(self):
+        """Initialize an empty automaton"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Tuple[Tuple[int, Any], ...]] = [()]
+        self._built = False
+        self.keyword_count = 0
+
+    def add(self, keyword: str, payload: Any):
+        """
+        Register a keyword with the payload reported when it matches
+
+        Args:
+            keyword: Literal string to search for
+            payload: Value yielded for every occurrence of the keyword
+        """
+        if not keyword:
+            return
+
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+                self._goto[node][char] = next_node
+            node = next_node
+
+        self._outputs[node] += ((len(keyword), payload),)
+        self.keyword_count += 1
+        self._built = False
+
+    def build(self) -> 'KeywordMatcher':
+        """Compute failure links; must be called after the last add()"""
+        queue = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            queue.append(node)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # Fold the outputs of the failure chain into each node so
+                # the scan loop never has to walk it
+                self._outputs[child] += self._outputs[self._fail[child]]
+
+        self._built = True
+        return self
+
+    def scan(self, text: str, state: int = 0) -> Tuple[List[Tuple[int, Any]], int]:
+        """
+        Scan text once and collect every keyword occurrence
+
+        Args:
+            text: Text to scan
+            state: Automaton state to resume from (0 starts fresh)
+
+        Returns:
+            Tuple of (list of (start_index, payload), final state)
+        """
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        matches = []
+        node = state
+
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                for length, payload in outputs[node]:
+                    matches.append((index - length + 1, payload))
+
+        return matches, node
+
+    @property
+    def state_count(self) -> int:
+        """Number of automaton states; valid states for scan are 0 to state_count - 1"""
+        return len(self._goto)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """Yield (start_index, payload) for every keyword occurrence in text"""
+        matches, _ = self.scan(text)
+        return iter(matches)
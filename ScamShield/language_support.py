@@ -1,6 +1,41 @@
 import logging
 from typing import Dict, Any, List
 
+# Tesseract languages for screenshots whose script is unknown
+DEFAULT_OCR_LANGUAGES = 'eng+hin'
+
+# Tesseract language pack and Unicode script of each supported language
+OCR_LANGUAGE_PACKS = {
+    'en': 'eng',
+    'hi': 'hin',
+    'mr': 'mar',
+    'bn': 'ben',
+    'gu': 'guj',
+    'ta': 'tam',
+    'te': 'tel'
+}
+LANGUAGE_SCRIPTS = {
+    'en': 'Latin',
+    'hi': 'Devanagari',
+    'mr': 'Devanagari',
+    'bn': 'Bengali',
+    'gu': 'Gujarati',
+    'ta': 'Tamil',
+    'te': 'Telugu'
+}
+
+def script_ocr_languages() -> Dict[str, str]:
+    """
+    Tesseract language pack for each script, as named by Tesseract's script detection
+
+    Languages sharing a script use the pack of the first one listed, so
+    Devanagari is read with the Hindi pack.
+    """
+    languages = {}
+    for language, script in LANGUAGE_SCRIPTS.items():
+        languages.setdefault(script, OCR_LANGUAGE_PACKS[language])
+    return languages
+
 class LanguageSupport:
     """Multilingual support for the application"""
     
@@ -27,10 +62,14 @@ class LanguageSupport:
                 
                 # Error messages
                 'empty_text_error': 'Please enter some text to analyze',
+                'empty_batch_error': 'Please send a list of messages to analyze',
+                'batch_too_large_error': 'Too many messages in one batch. Please split it into smaller batches.',
                 'no_file_error': 'No file uploaded',
                 'no_file_selected_error': 'Please select a file to upload',
                 'invalid_file_type_error': 'Invalid file type. Please upload an image file.',
                 'no_text_found_error': 'No text found in the uploaded image',
+                'ocr_queue_full_error': 'Too many images are being processed right now. Please try again shortly.',
+                'ocr_job_not_found_error': 'This image analysis was not found or has expired',
                 'analysis_error': 'An error occurred during analysis. Please try again.',
                 'empty_query_error': 'Please enter a question',
                 'chatbot_error': 'Sorry, I encountered an error. Please try again.',
@@ -76,10 +115,14 @@ class LanguageSupport:
                 
                 # Error messages
                 'empty_text_error': 'कृपया विश्लेषण के लिए कुछ टेक्स्ट दर्ज करें',
+                'empty_batch_error': 'कृपया विश्लेषण के लिए संदेशों की सूची भेजें',
+                'batch_too_large_error': 'एक बैच में बहुत अधिक संदेश हैं। कृपया इसे छोटे बैचों में बांटें।',
                 'no_file_error': 'कोई फाइल अपलोड नहीं की गई',
                 'no_file_selected_error': 'कृपया अपलोड करने के लिए एक फाइल चुनें',
                 'invalid_file_type_error': 'गलत फाइल प्रकार। कृपया एक इमेज फाइल अपलोड करें।',
                 'no_text_found_error': 'अपलोड की गई इमेज में कोई टेक्स्ट नहीं मिला',
+                'ocr_queue_full_error': 'अभी बहुत सारी इमेज प्रोसेस हो रही हैं। कृपया थोड़ी देर बाद फिर से कोशिश करें।',
+                'ocr_job_not_found_error': 'यह इमेज विश्लेषण नहीं मिला या इसकी समय सीमा समाप्त हो गई है',
                 'analysis_error': 'विश्लेषण के दौरान एक त्रुटि हुई। कृपया फिर से कोशिश करें।',
                 'empty_query_error': 'कृपया एक प्रश्न दर्ज करें',
                 'chatbot_error': 'माफ करें, मुझे एक त्रुटि का सामना करना पड़ा। कृपया फिर से कोशिश करें।',
@@ -104,6 +147,271 @@ class LanguageSupport:
                 'phishing_warning': '⚠️ संदिग्ध लिंक पर क्लिक न करें या व्यक्तिगत जानकारी न दें!',
                 'job_scam_warning': '⚠️ नौकरी के अवसरों के लिए कभी पहले से पैसे न दें!',
                 'lottery_scam_warning': '⚠️ आप ऐसी लॉटरी नहीं जीत सकते जिसमें आपने कभी हिस्सा नहीं लिया!'
+            },
+            'mr': {
+                # General messages
+                'app_title': 'सायबर रक्षक एआय - स्कॅम ओळख',
+                'upload_image': 'स्क्रीनशॉट अपलोड करा',
+                'paste_text': 'मजकूर संदेश पेस्ट करा',
+                'analyze_button': 'स्कॅमसाठी तपासा',
+                'chatbot_title': 'सायबर रक्षकला विचारा',
+                'language_switch': 'भाषा बदला',
+                
+                # Analysis results
+                'scam_detected': 'स्कॅम आढळला!',
+                'no_scam_detected': 'कोणताही स्कॅम आढळला नाही',
+                'analysis_complete': 'विश्लेषण पूर्ण',
+                'confidence_level': 'खात्रीची पातळी',
+                'scam_type': 'स्कॅमचा प्रकार',
+                'keywords_found': 'संशयास्पद शब्द आढळले',
+                'links_analysis': 'लिंक विश्लेषण',
+                
+                # Error messages
+                'empty_text_error': 'कृपया तपासण्यासाठी काही मजकूर टाका',
+                'empty_batch_error': 'कृपया तपासण्यासाठी संदेशांची यादी पाठवा',
+                'batch_too_large_error': 'एका बॅचमध्ये खूप जास्त संदेश आहेत. कृपया ते लहान बॅचमध्ये विभागा.',
+                'no_file_error': 'कोणतीही फाईल अपलोड केलेली नाही',
+                'no_file_selected_error': 'कृपया अपलोड करण्यासाठी फाईल निवडा',
+                'invalid_file_type_error': 'चुकीचा फाईल प्रकार. कृपया इमेज फाईल अपलोड करा.',
+                'no_text_found_error': 'अपलोड केलेल्या इमेजमध्ये कोणताही मजकूर आढळला नाही',
+                'ocr_queue_full_error': 'सध्या खूप इमेज प्रक्रियेत आहेत. कृपया थोड्या वेळाने पुन्हा प्रयत्न करा.',
+                'ocr_job_not_found_error': 'हे इमेज विश्लेषण सापडले नाही किंवा त्याची मुदत संपली आहे',
+                'analysis_error': 'विश्लेषणादरम्यान त्रुटी आली. कृपया पुन्हा प्रयत्न करा.',
+                'empty_query_error': 'कृपया प्रश्न टाका',
+                'chatbot_error': 'माफ करा, एक त्रुटी आली. कृपया पुन्हा प्रयत्न करा.',
+                
+                # Chatbot responses
+                'chatbot_greeting': 'नमस्कार! मी सायबर रक्षक एआय आहे. मी तुम्हाला स्कॅम ओळखण्यात मदत करू शकतो. कोणताही संशयास्पद संदेश शेअर करा किंवा फसवणुकीबद्दल विचारा.',
+                'chatbot_scam_detected': 'सावधान: हा स्कॅम असल्याचे दिसते!',
+                'chatbot_no_scam': 'हा संदेश खरा वाटतो, पण नेहमी सावध राहा.',
+                'chatbot_upi_info': 'UPI स्कॅममध्ये अनेकदा OTP, PIN किंवा वैयक्तिक माहिती मागितली जाते. ही माहिती कधीही कोणालाही देऊ नका. बँका SMS किंवा कॉलवर अशी माहिती कधीच मागत नाहीत.',
+                'chatbot_phishing_info': 'फिशिंग स्कॅम तुमची माहिती चोरण्यासाठी बनावट लिंक वापरतात. क्लिक करण्यापूर्वी पाठवणाऱ्याची आणि URL ची नेहमी खात्री करा.',
+                'chatbot_job_info': 'नोकरी स्कॅममध्ये अनेकदा आधी पैसे किंवा शुल्क मागितले जाते. खरे नियोक्ते उमेदवारांकडून कधीही पैसे मागत नाहीत.',
+                'chatbot_default': 'मी तुम्हाला स्कॅम ओळखण्यात मदत करू शकतो. कृपया संशयास्पद संदेश शेअर करा किंवा एखाद्या प्रकारच्या फसवणुकीबद्दल विचारा.',
+                
+                # Scam explanations
+                'upi_fraud_explanation': 'UPI फसवणुकीत सहसा OTP, UPI PIN किंवा तात्काळ पैसे पाठवण्याची मागणी असते. स्कॅमर अनेकदा बँक किंवा पेमेंट सेवेचे असल्याचे भासवतात.',
+                'phishing_explanation': 'फिशिंगमध्ये खऱ्या वाटणाऱ्या बनावट वेबसाइट किंवा संदेशांद्वारे तुमची वैयक्तिक माहिती चोरण्याचा प्रयत्न केला जातो.',
+                'job_scam_explanation': 'नोकरी स्कॅम सहज पैसे किंवा घरबसल्या कामाचे आमिष दाखवतात, पण आधी पैसे किंवा शुल्क मागतात.',
+                'lottery_scam_explanation': 'लॉटरी स्कॅममध्ये तुम्ही कधीही भाग न घेतलेले बक्षीस जिंकल्याचा दावा केला जातो आणि ते मिळवण्यासाठी शुल्क मागितले जाते.',
+                
+                # Warning messages
+                'upi_fraud_warning': '⚠️ तुमचा OTP, UPI PIN किंवा बँक तपशील कधीही कोणालाही सांगू नका!',
+                'phishing_warning': '⚠️ संशयास्पद लिंकवर क्लिक करू नका किंवा वैयक्तिक माहिती देऊ नका!',
+                'job_scam_warning': '⚠️ नोकरीसाठी कधीही आधी पैसे देऊ नका!',
+                'lottery_scam_warning': '⚠️ ज्या लॉटरीत तुम्ही भाग घेतला नाही ती तुम्ही जिंकू शकत नाही!'
+            },
+            'bn': {
+                # General messages
+                'app_title': 'সাইবার রক্ষক এআই - স্ক্যাম শনাক্তকরণ',
+                'upload_image': 'স্ক্রিনশট আপলোড করুন',
+                'paste_text': 'টেক্সট মেসেজ পেস্ট করুন',
+                'analyze_button': 'স্ক্যামের জন্য পরীক্ষা করুন',
+                'chatbot_title': 'সাইবার রক্ষককে জিজ্ঞাসা করুন',
+                'language_switch': 'ভাষা পরিবর্তন করুন',
+                
+                # Analysis results
+                'scam_detected': 'স্ক্যাম শনাক্ত হয়েছে!',
+                'no_scam_detected': 'কোনো স্ক্যাম পাওয়া যায়নি',
+                'analysis_complete': 'বিশ্লেষণ সম্পূর্ণ',
+                'confidence_level': 'নিশ্চয়তার মাত্রা',
+                'scam_type': 'স্ক্যামের ধরন',
+                'keywords_found': 'সন্দেহজনক শব্দ পাওয়া গেছে',
+                'links_analysis': 'লিঙ্ক বিশ্লেষণ',
+                
+                # Error messages
+                'empty_text_error': 'অনুগ্রহ করে বিশ্লেষণের জন্য কিছু টেক্সট লিখুন',
+                'empty_batch_error': 'অনুগ্রহ করে বিশ্লেষণের জন্য বার্তার একটি তালিকা পাঠান',
+                'batch_too_large_error': 'একটি ব্যাচে অনেক বেশি বার্তা রয়েছে। অনুগ্রহ করে এটি ছোট ব্যাচে ভাগ করুন।',
+                'no_file_error': 'কোনো ফাইল আপলোড করা হয়নি',
+                'no_file_selected_error': 'অনুগ্রহ করে আপলোড করার জন্য একটি ফাইল নির্বাচন করুন',
+                'invalid_file_type_error': 'ভুল ফাইলের ধরন। অনুগ্রহ করে একটি ছবির ফাইল আপলোড করুন।',
+                'no_text_found_error': 'আপলোড করা ছবিতে কোনো টেক্সট পাওয়া যায়নি',
+                'ocr_queue_full_error': 'এই মুহূর্তে অনেক ছবি প্রক্রিয়া করা হচ্ছে। অনুগ্রহ করে একটু পরে আবার চেষ্টা করুন।',
+                'ocr_job_not_found_error': 'এই ছবির বিশ্লেষণ পাওয়া যায়নি বা এর মেয়াদ শেষ হয়ে গেছে',
+                'analysis_error': 'বিশ্লেষণের সময় একটি ত্রুটি হয়েছে। অনুগ্রহ করে আবার চেষ্টা করুন।',
+                'empty_query_error': 'অনুগ্রহ করে একটি প্রশ্ন লিখুন',
+                'chatbot_error': 'দুঃখিত, একটি ত্রুটি হয়েছে। অনুগ্রহ করে আবার চেষ্টা করুন।',
+                
+                # Chatbot responses
+                'chatbot_greeting': 'নমস্কার! আমি সাইবার রক্ষক এআই। আমি আপনাকে স্ক্যাম চিনতে সাহায্য করতে পারি। যেকোনো সন্দেহজনক বার্তা শেয়ার করুন বা প্রতারণা সম্পর্কে জিজ্ঞাসা করুন।',
+                'chatbot_scam_detected': 'সতর্কতা: এটি একটি স্ক্যাম বলে মনে হচ্ছে!',
+                'chatbot_no_scam': 'এই বার্তাটি বৈধ বলে মনে হচ্ছে, তবে সবসময় সতর্ক থাকুন।',
+                'chatbot_upi_info': 'UPI স্ক্যামে প্রায়ই OTP, PIN বা ব্যক্তিগত তথ্য চাওয়া হয়। এগুলি কখনো কারো সাথে শেয়ার করবেন না। ব্যাংক কখনো SMS বা কলের মাধ্যমে এমন তথ্য চায় না।',
+                'chatbot_phishing_info': 'ফিশিং স্ক্যাম আপনার তথ্য চুরি করতে নকল লিঙ্ক ব্যবহার করে। ক্লিক করার আগে সবসময় প্রেরক এবং URL যাচাই করুন।',
+                'chatbot_job_info': 'চাকরির স্ক্যামে প্রায়ই আগাম টাকা বা ফি চাওয়া হয়। প্রকৃত নিয়োগকর্তারা কখনো চাকরিপ্রার্থীদের কাছে টাকা চান না।',
+                'chatbot_default': 'আমি আপনাকে স্ক্যাম চিনতে সাহায্য করতে পারি। অনুগ্রহ করে একটি সন্দেহজনক বার্তা শেয়ার করুন বা নির্দিষ্ট ধরনের প্রতারণা সম্পর্কে জিজ্ঞাসা করুন।',
+                
+                # Scam explanations
+                'upi_fraud_explanation': 'UPI প্রতারণায় সাধারণত OTP, UPI PIN বা তাৎক্ষণিক টাকা পাঠানোর অনুরোধ থাকে। প্রতারকরা প্রায়ই ব্যাংক বা পেমেন্ট পরিষেবার ছদ্মবেশ ধরে।',
+                'phishing_explanation': 'ফিশিং বৈধ মনে হওয়া নকল ওয়েবসাইট বা বার্তার মাধ্যমে আপনার ব্যক্তিগত তথ্য চুরি করার চেষ্টা করে।',
+                'job_scam_explanation': 'চাকরির স্ক্যাম সহজে টাকা বা বাড়ি থেকে কাজের প্রতিশ্রুতি দেয়, কিন্তু আগাম টাকা বা ফি দাবি করে।',
+                'lottery_scam_explanation': 'লটারি স্ক্যামে দাবি করা হয় যে আপনি এমন পুরস্কার জিতেছেন যাতে আপনি কখনো অংশ নেননি, তারপর পুরস্কার পেতে ফি চাওয়া হয়।',
+                
+                # Warning messages
+                'upi_fraud_warning': '⚠️ আপনার OTP, UPI PIN বা ব্যাংকের তথ্য কখনো কারো সাথে শেয়ার করবেন না!',
+                'phishing_warning': '⚠️ সন্দেহজনক লিঙ্কে ক্লিক করবেন না বা ব্যক্তিগত তথ্য দেবেন না!',
+                'job_scam_warning': '⚠️ চাকরির জন্য কখনো আগাম টাকা দেবেন না!',
+                'lottery_scam_warning': '⚠️ যে লটারিতে আপনি অংশ নেননি তা আপনি জিততে পারেন না!'
+            },
+            'gu': {
+                # General messages
+                'app_title': 'સાયબર રક્ષક એઆઈ - સ્કેમ ઓળખ',
+                'upload_image': 'સ્ક્રીનશોટ અપલોડ કરો',
+                'paste_text': 'ટેક્સ્ટ સંદેશ પેસ્ટ કરો',
+                'analyze_button': 'સ્કેમ માટે તપાસો',
+                'chatbot_title': 'સાયબર રક્ષકને પૂછો',
+                'language_switch': 'ભાષા બદલો',
+                
+                # Analysis results
+                'scam_detected': 'સ્કેમ મળ્યો!',
+                'no_scam_detected': 'કોઈ સ્કેમ મળ્યો નથી',
+                'analysis_complete': 'વિશ્લેષણ પૂર્ણ',
+                'confidence_level': 'વિશ્વાસનું સ્તર',
+                'scam_type': 'સ્કેમનો પ્રકાર',
+                'keywords_found': 'શંકાસ્પદ શબ્દો મળ્યા',
+                'links_analysis': 'લિંક વિશ્લેષણ',
+                
+                # Error messages
+                'empty_text_error': 'કૃપા કરીને વિશ્લેષણ માટે થોડું લખાણ દાખલ કરો',
+                'empty_batch_error': 'કૃપા કરીને વિશ્લેષણ માટે સંદેશાઓની યાદી મોકલો',
+                'batch_too_large_error': 'એક બેચમાં ઘણા બધા સંદેશા છે. કૃપા કરીને તેને નાના બેચમાં વહેંચો.',
+                'no_file_error': 'કોઈ ફાઇલ અપલોડ કરવામાં આવી નથી',
+                'no_file_selected_error': 'કૃપા કરીને અપલોડ કરવા માટે ફાઇલ પસંદ કરો',
+                'invalid_file_type_error': 'ખોટો ફાઇલ પ્રકાર. કૃપા કરીને ઇમેજ ફાઇલ અપલોડ કરો.',
+                'no_text_found_error': 'અપલોડ કરેલી ઇમેજમાં કોઈ લખાણ મળ્યું નથી',
+                'ocr_queue_full_error': 'હાલમાં ઘણી બધી ઇમેજ પ્રોસેસ થઈ રહી છે. કૃપા કરીને થોડી વાર પછી ફરી પ્રયાસ કરો.',
+                'ocr_job_not_found_error': 'આ ઇમેજ વિશ્લેષણ મળ્યું નથી અથવા તેની સમયમર્યાદા પૂરી થઈ ગઈ છે',
+                'analysis_error': 'વિશ્લેષણ દરમિયાન ભૂલ આવી. કૃપા કરીને ફરી પ્રયાસ કરો.',
+                'empty_query_error': 'કૃપા કરીને પ્રશ્ન દાખલ કરો',
+                'chatbot_error': 'માફ કરશો, એક ભૂલ આવી. કૃપા કરીને ફરી પ્રયાસ કરો.',
+                
+                # Chatbot responses
+                'chatbot_greeting': 'નમસ્તે! હું સાયબર રક્ષક એઆઈ છું. હું તમને સ્કેમ ઓળખવામાં મદદ કરી શકું છું. કોઈપણ શંકાસ્પદ સંદેશ શેર કરો અથવા છેતરપિંડી વિશે પૂછો.',
+                'chatbot_scam_detected': 'ચેતવણી: આ સ્કેમ લાગે છે!',
+                'chatbot_no_scam': 'આ સંદેશ સાચો લાગે છે, પરંતુ હંમેશા સાવધ રહો.',
+                'chatbot_upi_info': 'UPI સ્કેમમાં ઘણીવાર OTP, PIN અથવા વ્યક્તિગત માહિતી માંગવામાં આવે છે. આ માહિતી ક્યારેય કોઈને આપશો નહીં. બેંકો ક્યારેય SMS અથવા કૉલ દ્વારા આવી માહિતી માંગતી નથી.',
+                'chatbot_phishing_info': 'ફિશિંગ સ્કેમ તમારી માહિતી ચોરવા માટે નકલી લિંકનો ઉપયોગ કરે છે. ક્લિક કરતા પહેલા હંમેશા મોકલનાર અને URL ની ખાતરી કરો.',
+                'chatbot_job_info': 'નોકરીના સ્કેમમાં ઘણીવાર અગાઉથી પૈસા અથવા ફી માંગવામાં આવે છે. સાચા નોકરીદાતા ક્યારેય ઉમેદવારો પાસેથી પૈસા માંગતા નથી.',
+                'chatbot_default': 'હું તમને સ્કેમ ઓળખવામાં મદદ કરી શકું છું. કૃપા કરીને શંકાસ્પદ સંદેશ શેર કરો અથવા કોઈ ચોક્કસ પ્રકારની છેતરપિંડી વિશે પૂછો.',
+                
+                # Scam explanations
+                'upi_fraud_explanation': 'UPI છેતરપિંડીમાં સામાન્ય રીતે OTP, UPI PIN અથવા તાત્કાલિક પૈસા મોકલવાની માંગ હોય છે. સ્કેમર્સ ઘણીવાર બેંક અથવા પેમેન્ટ સેવા હોવાનો ઢોંગ કરે છે.',
+                'phishing_explanation': 'ફિશિંગ સાચી લાગતી નકલી વેબસાઇટ અથવા સંદેશાઓ દ્વારા તમારી વ્યક્તિગત માહિતી ચોરવાનો પ્રયાસ કરે છે.',
+                'job_scam_explanation': 'નોકરીના સ્કેમ સરળ કમાણી અથવા ઘરેથી કામનું વચન આપે છે, પરંતુ અગાઉથી પૈસા અથવા ફી માંગે છે.',
+                'lottery_scam_explanation': 'લોટરી સ્કેમમાં દાવો કરવામાં આવે છે કે તમે એવું ઇનામ જીત્યા છો જેમાં તમે ક્યારેય ભાગ લીધો નથી, પછી ઇનામ મેળવવા ફી માંગવામાં આવે છે.',
+                
+                # Warning messages
+                'upi_fraud_warning': '⚠️ તમારો OTP, UPI PIN અથવા બેંક વિગતો ક્યારેય કોઈને આપશો નહીં!',
+                'phishing_warning': '⚠️ શંકાસ્પદ લિંક પર ક્લિક કરશો નહીં અથવા વ્યક્તિગત માહિતી આપશો નહીં!',
+                'job_scam_warning': '⚠️ નોકરી માટે ક્યારેય અગાઉથી પૈસા ચૂકવશો નહીં!',
+                'lottery_scam_warning': '⚠️ જે લોટરીમાં તમે ભાગ લીધો નથી તે તમે જીતી શકતા નથી!'
+            },
+            'ta': {
+                # General messages
+                'app_title': 'சைபர் ரக்ஷக் AI - மோசடி கண்டறிதல்',
+                'upload_image': 'ஸ்கிரீன்ஷாட்டை பதிவேற்றவும்',
+                'paste_text': 'உரைச் செய்தியை ஒட்டவும்',
+                'analyze_button': 'மோசடியா என சரிபார்க்கவும்',
+                'chatbot_title': 'சைபர் ரக்ஷக்கிடம் கேளுங்கள்',
+                'language_switch': 'மொழியை மாற்றவும்',
+                
+                # Analysis results
+                'scam_detected': 'மோசடி கண்டறியப்பட்டது!',
+                'no_scam_detected': 'மோசடி எதுவும் கண்டறியப்படவில்லை',
+                'analysis_complete': 'பகுப்பாய்வு முடிந்தது',
+                'confidence_level': 'நம்பக நிலை',
+                'scam_type': 'மோசடி வகை',
+                'keywords_found': 'சந்தேகத்திற்குரிய சொற்கள் கண்டறியப்பட்டன',
+                'links_analysis': 'இணைப்பு பகுப்பாய்வு',
+                
+                # Error messages
+                'empty_text_error': 'பகுப்பாய்வு செய்ய சிறிது உரையை உள்ளிடவும்',
+                'empty_batch_error': 'பகுப்பாய்வு செய்ய செய்திகளின் பட்டியலை அனுப்பவும்',
+                'batch_too_large_error': 'ஒரே தொகுப்பில் அதிகமான செய்திகள் உள்ளன. சிறிய தொகுப்புகளாகப் பிரிக்கவும்.',
+                'no_file_error': 'எந்த கோப்பும் பதிவேற்றப்படவில்லை',
+                'no_file_selected_error': 'பதிவேற்ற ஒரு கோப்பைத் தேர்ந்தெடுக்கவும்',
+                'invalid_file_type_error': 'தவறான கோப்பு வகை. படக் கோப்பைப் பதிவேற்றவும்.',
+                'no_text_found_error': 'பதிவேற்றிய படத்தில் உரை எதுவும் இல்லை',
+                'ocr_queue_full_error': 'இப்போது பல படங்கள் செயலாக்கப்படுகின்றன. சிறிது நேரம் கழித்து மீண்டும் முயற்சிக்கவும்.',
+                'ocr_job_not_found_error': 'இந்தப் பட பகுப்பாய்வு கிடைக்கவில்லை அல்லது காலாவதியாகிவிட்டது',
+                'analysis_error': 'பகுப்பாய்வின் போது பிழை ஏற்பட்டது. மீண்டும் முயற்சிக்கவும்.',
+                'empty_query_error': 'ஒரு கேள்வியை உள்ளிடவும்',
+                'chatbot_error': 'மன்னிக்கவும், பிழை ஏற்பட்டது. மீண்டும் முயற்சிக்கவும்.',
+                
+                # Chatbot responses
+                'chatbot_greeting': 'வணக்கம்! நான் சைபர் ரக்ஷக் AI. மோசடிகளை அடையாளம் காண உங்களுக்கு உதவ முடியும். சந்தேகத்திற்குரிய எந்தச் செய்தியையும் பகிருங்கள் அல்லது மோசடி பற்றி கேளுங்கள்.',
+                'chatbot_scam_detected': 'எச்சரிக்கை: இது ஒரு மோசடி போல் தெரிகிறது!',
+                'chatbot_no_scam': 'இந்தச் செய்தி உண்மையானதாகத் தெரிகிறது, ஆனால் எப்போதும் கவனமாக இருங்கள்.',
+                'chatbot_upi_info': 'UPI மோசடிகள் பெரும்பாலும் OTP, PIN அல்லது தனிப்பட்ட விவரங்களைக் கேட்கும். இவற்றை யாருடனும் பகிர வேண்டாம். வங்கிகள் SMS அல்லது அழைப்பு மூலம் இத்தகைய தகவல்களை ஒருபோதும் கேட்பதில்லை.',
+                'chatbot_phishing_info': 'ஃபிஷிங் மோசடிகள் உங்கள் தகவல்களைத் திருட போலி இணைப்புகளைப் பயன்படுத்துகின்றன. கிளிக் செய்வதற்கு முன் அனுப்புநரையும் URL-ஐயும் எப்போதும் சரிபார்க்கவும்.',
+                'chatbot_job_info': 'வேலை மோசடிகள் பெரும்பாலும் முன்பணம் அல்லது கட்டணம் கேட்கும். உண்மையான நிறுவனங்கள் வேலை தேடுபவர்களிடம் ஒருபோதும் பணம் கேட்பதில்லை.',
+                'chatbot_default': 'மோசடிகளை அடையாளம் காண உங்களுக்கு உதவ முடியும். சந்தேகத்திற்குரிய செய்தியைப் பகிருங்கள் அல்லது குறிப்பிட்ட மோசடி வகைகள் பற்றி கேளுங்கள்.',
+                
+                # Scam explanations
+                'upi_fraud_explanation': 'UPI மோசடியில் பொதுவாக OTP, UPI PIN அல்லது உடனடி பணப் பரிமாற்றம் கோரப்படும். மோசடிக்காரர்கள் பெரும்பாலும் வங்கிகள் அல்லது கட்டணச் சேவைகள் போல் நடிப்பார்கள்.',
+                'phishing_explanation': 'ஃபிஷிங் உண்மையானவை போல் தோன்றும் போலி இணையதளங்கள் அல்லது செய்திகள் மூலம் உங்கள் தனிப்பட்ட தகவல்களைத் திருட முயல்கிறது.',
+                'job_scam_explanation': 'வேலை மோசடிகள் எளிதான வருமானம் அல்லது வீட்டிலிருந்து வேலை என உறுதியளித்து முன்பணம் அல்லது கட்டணம் கேட்கின்றன.',
+                'lottery_scam_explanation': 'லாட்டரி மோசடிகள் நீங்கள் பங்கேற்காத பரிசை வென்றதாகக் கூறி, பரிசைப் பெற கட்டணம் கேட்கின்றன.',
+                
+                # Warning messages
+                'upi_fraud_warning': '⚠️ உங்கள் OTP, UPI PIN அல்லது வங்கி விவரங்களை யாருடனும் பகிர வேண்டாம்!',
+                'phishing_warning': '⚠️ சந்தேகத்திற்குரிய இணைப்புகளைக் கிளிக் செய்யவோ தனிப்பட்ட தகவல்களைக் கொடுக்கவோ வேண்டாம்!',
+                'job_scam_warning': '⚠️ வேலை வாய்ப்புகளுக்காக ஒருபோதும் முன்பணம் செலுத்த வேண்டாம்!',
+                'lottery_scam_warning': '⚠️ நீங்கள் பங்கேற்காத லாட்டரியை வெல்ல முடியாது!'
+            },
+            'te': {
+                # General messages
+                'app_title': 'సైబర్ రక్షక్ AI - మోసం గుర్తింపు',
+                'upload_image': 'స్క్రీన్‌షాట్ అప్‌లోడ్ చేయండి',
+                'paste_text': 'టెక్స్ట్ సందేశాన్ని పేస్ట్ చేయండి',
+                'analyze_button': 'మోసం కోసం తనిఖీ చేయండి',
+                'chatbot_title': 'సైబర్ రక్షక్‌ను అడగండి',
+                'language_switch': 'భాష మార్చండి',
+                
+                # Analysis results
+                'scam_detected': 'మోసం గుర్తించబడింది!',
+                'no_scam_detected': 'ఎలాంటి మోసం కనుగొనబడలేదు',
+                'analysis_complete': 'విశ్లేషణ పూర్తయింది',
+                'confidence_level': 'నమ్మక స్థాయి',
+                'scam_type': 'మోసం రకం',
+                'keywords_found': 'అనుమానాస్పద పదాలు కనుగొనబడ్డాయి',
+                'links_analysis': 'లింక్ విశ్లేషణ',
+                
+                # Error messages
+                'empty_text_error': 'దయచేసి విశ్లేషించడానికి కొంత టెక్స్ట్ నమోదు చేయండి',
+                'empty_batch_error': 'దయచేసి విశ్లేషించడానికి సందేశాల జాబితాను పంపండి',
+                'batch_too_large_error': 'ఒకే బ్యాచ్‌లో చాలా ఎక్కువ సందేశాలు ఉన్నాయి. దయచేసి వాటిని చిన్న బ్యాచ్‌లుగా విభజించండి.',
+                'no_file_error': 'ఏ ఫైల్ అప్‌లోడ్ చేయబడలేదు',
+                'no_file_selected_error': 'దయచేసి అప్‌లోడ్ చేయడానికి ఒక ఫైల్‌ను ఎంచుకోండి',
+                'invalid_file_type_error': 'తప్పు ఫైల్ రకం. దయచేసి చిత్ర ఫైల్‌ను అప్‌లోడ్ చేయండి.',
+                'no_text_found_error': 'అప్‌లోడ్ చేసిన చిత్రంలో ఎలాంటి టెక్స్ట్ కనుగొనబడలేదు',
+                'ocr_queue_full_error': 'ప్రస్తుతం చాలా చిత్రాలు ప్రాసెస్ అవుతున్నాయి. దయచేసి కొద్దిసేపటి తర్వాత మళ్లీ ప్రయత్నించండి.',
+                'ocr_job_not_found_error': 'ఈ చిత్ర విశ్లేషణ కనుగొనబడలేదు లేదా గడువు ముగిసింది',
+                'analysis_error': 'విశ్లేషణ సమయంలో లోపం సంభవించింది. దయచేసి మళ్లీ ప్రయత్నించండి.',
+                'empty_query_error': 'దయచేసి ఒక ప్రశ్నను నమోదు చేయండి',
+                'chatbot_error': 'క్షమించండి, లోపం సంభవించింది. దయచేసి మళ్లీ ప్రయత్నించండి.',
+                
+                # Chatbot responses
+                'chatbot_greeting': 'నమస్కారం! నేను సైబర్ రక్షక్ AI. మోసాలను గుర్తించడంలో నేను మీకు సహాయం చేయగలను. ఏదైనా అనుమానాస్పద సందేశాన్ని పంచుకోండి లేదా మోసాల గురించి అడగండి.',
+                'chatbot_scam_detected': 'హెచ్చరిక: ఇది మోసంలా కనిపిస్తోంది!',
+                'chatbot_no_scam': 'ఈ సందేశం నిజమైనదిగా కనిపిస్తోంది, కానీ ఎల్లప్పుడూ జాగ్రత్తగా ఉండండి.',
+                'chatbot_upi_info': 'UPI మోసాలు తరచుగా OTP, PIN లేదా వ్యక్తిగత వివరాలను అడుగుతాయి. వీటిని ఎవరితోనూ పంచుకోకండి. బ్యాంకులు SMS లేదా కాల్ ద్వారా ఇలాంటి సమాచారాన్ని ఎప్పుడూ అడగవు.',
+                'chatbot_phishing_info': 'ఫిషింగ్ మోసాలు మీ సమాచారాన్ని దొంగిలించడానికి నకిలీ లింక్‌లను ఉపయోగిస్తాయి. క్లిక్ చేసే ముందు పంపినవారిని మరియు URL ను ఎల్లప్పుడూ తనిఖీ చేయండి.',
+                'chatbot_job_info': 'ఉద్యోగ మోసాలు తరచుగా ముందస్తు చెల్లింపులు లేదా ఫీజులు అడుగుతాయి. నిజమైన యజమానులు ఉద్యోగ దరఖాస్తుదారుల నుండి ఎప్పుడూ డబ్బు అడగరు.',
+                'chatbot_default': 'మోసాలను గుర్తించడంలో నేను మీకు సహాయం చేయగలను. దయచేసి అనుమానాస్పద సందేశాన్ని పంచుకోండి లేదా నిర్దిష్ట మోసాల గురించి అడగండి.',
+                
+                # Scam explanations
+                'upi_fraud_explanation': 'UPI మోసంలో సాధారణంగా OTP, UPI PIN లేదా వెంటనే డబ్బు బదిలీ కోసం అభ్యర్థనలు ఉంటాయి. మోసగాళ్లు తరచుగా బ్యాంకులు లేదా చెల్లింపు సేవల వలె నటిస్తారు.',
+                'phishing_explanation': 'ఫిషింగ్ నిజమైనవిగా కనిపించే నకిలీ వెబ్‌సైట్‌లు లేదా సందేశాల ద్వారా మీ వ్యక్తిగత సమాచారాన్ని దొంగిలించడానికి ప్రయత్నిస్తుంది.',
+                'job_scam_explanation': 'ఉద్యోగ మోసాలు సులభమైన సంపాదన లేదా ఇంటి నుండి పని అవకాశాలను హామీ ఇస్తాయి, కానీ ముందస్తు చెల్లింపులు లేదా ఫీజులు అడుగుతాయి.',
+                'lottery_scam_explanation': 'లాటరీ మోసాలు మీరు ఎప్పుడూ పాల్గొనని బహుమతిని గెలుచుకున్నారని చెప్పి, దాన్ని పొందడానికి ఫీజు అడుగుతాయి.',
+                
+                # Warning messages
+                'upi_fraud_warning': '⚠️ మీ OTP, UPI PIN లేదా బ్యాంక్ వివరాలను ఎవరితోనూ పంచుకోకండి!',
+                'phishing_warning': '⚠️ అనుమానాస్పద లింక్‌లపై క్లిక్ చేయకండి లేదా వ్యక్తిగత సమాచారం ఇవ్వకండి!',
+                'job_scam_warning': '⚠️ ఉద్యోగ అవకాశాల కోసం ఎప్పుడూ ముందుగా డబ్బు చెల్లించకండి!',
+                'lottery_scam_warning': '⚠️ మీరు పాల్గొనని లాటరీని మీరు గెలవలేరు!'
             }
         }
         
@@ -116,15 +424,16 @@ class LanguageSupport:
         
         Args:
             key: Translation key
-            language: Language code (en, hi)
+            language: Language code (en, hi, mr, bn, gu, ta, te)
             
         Returns:
-            Translated text or key if not found
+            Translated text, the English text if the language lacks the key,
+            or the key if English lacks it too
         """
-        if language not in self.translations:
-            language = 'en'  # Fallback to English
-        
-        return self.translations[language].get(key, key)
+        text = self.translations.get(language, {}).get(key)
+        if text is None:
+            text = self.translations['en'].get(key, key)  # Fallback to English
+        return text
     
     def get_scam_explanation(self, scam_type: str, language: str = 'en') -> str:
         """
@@ -172,10 +481,33 @@ class LanguageSupport:
         self.translations[language].update(translations)
         logging.info(f"Added {len(translations)} translations for {language}")
     
+    def get_ocr_language(self, language: str) -> str:
+        """
+        Tesseract languages for screenshots from a user of the given language
+        
+        Used when script detection cannot tell the script of a screenshot.
+        English is always included, since Indian messages mix it into every script.
+        
+        Args:
+            language: Language code
+            
+        Returns:
+            Tesseract language string, e.g. 'eng+tam'
+        """
+        pack = OCR_LANGUAGE_PACKS.get(language, 'eng')
+        if pack in DEFAULT_OCR_LANGUAGES.split('+'):
+            return DEFAULT_OCR_LANGUAGES
+        return f"eng+{pack}"
+    
     def get_language_name(self, language_code: str) -> str:
         """Get human-readable language name"""
         language_names = {
             'en': 'English',
-            'hi': 'हिंदी'
+            'hi': 'हिंदी',
+            'mr': 'मराठी',
+            'bn': 'বাংলা',
+            'gu': 'ગુજરાતી',
+            'ta': 'தமிழ்',
+            'te': 'తెలుగు'
         }
         return language_names.get(language_code, language_code)
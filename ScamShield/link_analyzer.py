@@ -1,14 +1,34 @@
+import os
 import re
-import requests
 import logging
+import unicodedata
+import threading
 from urllib.parse import urlparse
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, Union
+from domain_classifier import DomainClassifier, normalize_host
+from domain_blocklist import DomainBlocklist
+from metrics import time_stage
+from text_normalizer import (INVISIBLE_CHARACTERS, NormalizedText, fold_lookalikes, has_invisible_characters,
+                             normalize, normalize_text)
+
+if TYPE_CHECKING:
+    from url_reputation import ReputationChecker
 
 class LinkAnalyzer:
     """Analyze links for suspicious content"""
     
-    def __init__(self):
-        """Initialize link analyzer with suspicious patterns"""
+    def __init__(self, blocklist_path: Optional[str] = None,
+                 reputation_checker: Optional['ReputationChecker'] = None,
+                 check_reputation: Optional[bool] = None):
+        """
+        Initialize link analyzer with suspicious patterns
+        
+        Args:
+            blocklist_path: Domain blocklist index built by domain_blocklist.py
+                (DOMAIN_BLOCKLIST_PATH by default; no index if unset)
+            reputation_checker: Checker used for live link reputation lookups
+            check_reputation: Fetch links while analyzing them (URL_REPUTATION_CHECKS by default)
+        """
         self.suspicious_domains = {
             # Common suspicious domain patterns
             'bit.ly', 'tinyurl.com', 'short.link', 't.co', 'goo.gl',
@@ -29,56 +49,146 @@ class LinkAnalyzer:
             'update', 'confirm', 'suspended', 'expired'
         ]
         
+        # Run against the normalized view, which is already lowercase
+        self.url_regex = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+')
+        
+        # Precompiled matcher for the domain and path checks above
+        self.classifier = DomainClassifier(
+            self.suspicious_domains, self.suspicious_patterns, self.phishing_keywords
+        )
+        
+        # Threat-intel domains live in a memory-mapped index shared by all workers
+        self.blocklist = None
+        blocklist_path = blocklist_path or os.environ.get('DOMAIN_BLOCKLIST_PATH')
+        if blocklist_path:
+            try:
+                self.blocklist = DomainBlocklist(
+                    blocklist_path, check_interval=float(os.environ.get('DOMAIN_BLOCKLIST_CHECK_INTERVAL', 5))
+                )
+            except (OSError, ValueError) as e:
+                logging.error(f"Domain blocklist unavailable: {str(e)}")
+        
+        # Live reputation lookups make network requests, so they are opt-in
+        if check_reputation is None:
+            check_reputation = os.environ.get('URL_REPUTATION_CHECKS', 'false').lower() in ('1', 'true', 'yes', 'on')
+        self.check_reputation = check_reputation
+        self._reputation_checker = reputation_checker
+        self._reputation_lock = threading.Lock()
+        
         logging.info("LinkAnalyzer initialized")
     
-    def extract_links(self, text: str) -> List[str]:
-        """Extract all URLs from text"""
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-        links = re.findall(url_pattern, text, re.IGNORECASE)
-        return links
+    @property
+    def reputation_checker(self) -> 'ReputationChecker':
+        """Checker for live lookups, created on first use so requests is only imported when needed"""
+        if self._reputation_checker is None:
+            with self._reputation_lock:
+                if self._reputation_checker is None:
+                    from url_reputation import ReputationChecker
+                    self._reputation_checker = ReputationChecker.from_env(should_expand=self._is_shortener)
+        return self._reputation_checker
     
-    def analyze_url(self, url: str) -> Dict[str, Any]:
+    @property
+    def version(self) -> str:
+        """
+        Version of the local link checks, for caching their results
+        
+        The classifier's lists are fixed for the life of the analyzer; the
+        blocklist is not, so its current generation is part of the version.
+        Live reputation results are not covered.
+        """
+        if self.blocklist is None:
+            return 'no-blocklist'
+        return f"blocklist-{self.blocklist.version}"
+    
+    def extract_links(self, text: Union[str, NormalizedText]) -> List[str]:
+        """Extract all URLs from text, as they are written in it"""
+        return [link for link, _ in self._find_links(normalize(text))]
+    
+    def _find_links(self, view: NormalizedText) -> List[Tuple[str, str]]:
+        """
+        Find links in the normalized view of a message
+        
+        Links hidden with invisible characters or look-alike letters are found
+        too, since the view has them removed and folded.
+        
+        Returns:
+            List of (URL as written, normalized URL) tuples
+        """
+        return [(view.original_slice(*match.span()), match.group()) for match in self.url_regex.finditer(view.text)]
+    
+    def analyze_url(self, url: str, normalized_url: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze a single URL for suspicious indicators
         
+        The checks run on the normalized URL. A host that only turns into a
+        plain ASCII host once look-alike letters are folded and invisible
+        characters dropped is a disguised domain and scored as such.
+        
         Args:
             url: URL to analyze
+            normalized_url: The URL from the normalized view of its message
+                (normalized here if None)
             
         Returns:
             Dictionary with analysis results
         """
         try:
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.lower()
-            path = parsed_url.path.lower()
+            if normalized_url is None:
+                normalized_url = normalize_text(url)
+            parsed_url = urlparse(normalized_url)
+            domain = normalize_host(parsed_url.netloc)
+            path = parsed_url.path
             
             risk_score = 0
             risk_factors = []
             
-            # Check domain against suspicious list
-            if domain in self.suspicious_domains:
+            # Plain ASCII URLs normalize to their lowercase form, so only others are parsed twice.
+            # Hosts keep their accents; only look-alikes from other scripts are folded
+            written_domain = domain
+            if normalized_url != url.lower():
+                written_domain = normalize_host(urlparse(url).netloc)
+                unmasked, disguised = self._unmask_host(url, written_domain)
+                domain = unmasked or domain
+                if disguised:
+                    risk_score += 3
+                    risk_factors.append(f"Disguised domain: looks like {domain}")
+            
+            host_info = self.classifier.classify_host(domain)
+            
+            # Check domain and its parent domains against the shortener and blocklist trie
+            list_match = host_info['list_match']
+            if self.blocklist and not (list_match and list_match[1] == 'blocklist'):
+                blocked_domain = self.blocklist.match(domain, host_info['registered_domain'])
+                if blocked_domain:
+                    list_match = (blocked_domain, 'blocklist')
+            if list_match and list_match[1] == 'blocklist':
+                risk_score += 5
+                risk_factors.append(f"Known malicious domain: {list_match[0]}")
+            elif list_match:
                 risk_score += 3
                 risk_factors.append("URL shortener service")
             
             # Check for suspicious domain patterns
-            for pattern in self.suspicious_patterns:
-                if re.search(pattern, domain):
-                    risk_score += 2
-                    risk_factors.append(f"Suspicious domain pattern: {pattern}")
+            for pattern in host_info['patterns']:
+                risk_score += 2
+                risk_factors.append(f"Suspicious domain pattern: {pattern}")
             
             # Check for phishing keywords in path
-            for keyword in self.phishing_keywords:
-                if keyword in path:
-                    risk_score += 1
-                    risk_factors.append(f"Phishing keyword: {keyword}")
+            for keyword in self.classifier.path_keywords(path):
+                risk_score += 1
+                risk_factors.append(f"Phishing keyword: {keyword}")
             
             # Check domain length and characteristics
             if len(domain) > 50:
                 risk_score += 1
                 risk_factors.append("Unusually long domain name")
             
-            # Count subdomains
-            subdomain_count = domain.count('.') - 1
+            # Count subdomains below the registrable domain (eTLD+1)
+            registered_domain = host_info['registered_domain']
+            if registered_domain:
+                subdomain_count = domain.count('.') - registered_domain.count('.')
+            else:
+                subdomain_count = domain.count('.') - 1
             if subdomain_count > 3:
                 risk_score += 1
                 risk_factors.append("Too many subdomains")
@@ -88,20 +198,11 @@ class LinkAnalyzer:
                 risk_score += 1
                 risk_factors.append("Not using HTTPS")
             
-            # Determine risk level
-            if risk_score >= 5:
-                risk_level = "high"
-            elif risk_score >= 3:
-                risk_level = "medium"
-            elif risk_score >= 1:
-                risk_level = "low"
-            else:
-                risk_level = "safe"
-            
             return {
                 'url': url,
-                'domain': domain,
-                'risk_level': risk_level,
+                'domain': written_domain,
+                'registered_domain': registered_domain,
+                'risk_level': self._risk_level(risk_score),
                 'risk_score': risk_score,
                 'risk_factors': risk_factors,
                 'is_suspicious': risk_score >= 2
@@ -112,32 +213,159 @@ class LinkAnalyzer:
             return {
                 'url': url,
                 'domain': 'unknown',
+                'registered_domain': None,
                 'risk_level': 'unknown',
                 'risk_score': 0,
                 'risk_factors': ['Analysis failed'],
                 'is_suspicious': True  # Err on the side of caution
             }
     
-    def analyze_links_in_text(self, text: str) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _unmask_host(url: str, written_domain: str) -> Tuple[str, bool]:
+        """
+        Host a link really points at, and whether it was disguised
+        
+        Invisible characters are dropped and styled letters mapped as IDNA
+        does. A label is folded and counts as disguised when folding its
+        Cyrillic and Greek look-alikes makes it all Latin ('раураl'), or
+        when it mixes those with Latin letters; labels written wholly in
+        another script ('пример') and accented Latin ('münchen') are kept
+        as they are. Invisible characters anywhere in the link are a
+        disguise too.
+        
+        Returns:
+            Tuple of (host, disguised)
+        """
+        disguised = has_invisible_characters(url)
+        host = unicodedata.normalize('NFKC', written_domain).lower()
+        if disguised:
+            host = ''.join(char for char in host if char not in INVISIBLE_CHARACTERS)
+        labels = []
+        for written_label in host.split('.'):
+            label = fold_lookalikes(written_label)
+            if label != written_label and (
+                    label.isascii() or any(char.isascii() and char.isalpha() for char in written_label)):
+                disguised = True
+                written_label = label
+            labels.append(written_label)
+        return '.'.join(labels), disguised
+    
+    @staticmethod
+    def _risk_level(risk_score: int) -> str:
+        """Map a link risk score to its risk level"""
+        if risk_score >= 5:
+            return "high"
+        elif risk_score >= 3:
+            return "medium"
+        elif risk_score >= 1:
+            return "low"
+        return "safe"
+    
+    def _is_shortener(self, host: str) -> bool:
+        """Check whether a host belongs to a URL shortener service"""
+        list_match = self.classifier.classify_host(host)['list_match']
+        return bool(list_match) and list_match[1] == 'shortener'
+    
+    def apply_reputation(self, analysis: Dict[str, Any], reputation: Dict[str, Any]):
+        """
+        Fold a live reputation result into a link analysis
+        
+        A link that redirects is scored as the riskier of itself and its final
+        destination, and each suspicious reputation finding adds one point.
+        
+        Args:
+            analysis: Result of analyze_url, updated in place
+            reputation: Result of the reputation checker for the same link
+        """
+        risk_score = analysis['risk_score']
+        risk_factors = analysis['risk_factors']
+        
+        final_url = reputation.get('final_url')
+        if final_url and final_url != analysis['url']:
+            target = self.analyze_url(final_url)
+            analysis['final_url'] = final_url
+            risk_factors.append(f"Redirects to {target['domain']}")
+            risk_factors.extend(f"Redirect target: {factor}" for factor in target['risk_factors'])
+            risk_score = max(risk_score, target['risk_score'])
+        
+        for finding in reputation['suspicious_headers']:
+            risk_score += 1
+            risk_factors.append(finding)
+        
+        analysis['reputation'] = reputation
+        analysis['risk_score'] = risk_score
+        analysis['risk_level'] = self._risk_level(risk_score)
+        analysis['is_suspicious'] = risk_score >= 2
+    
+    def analyze_links_in_text(self, text: Union[str, NormalizedText],
+                              check_reputation: Optional[bool] = None) -> List[Dict[str, Any]]:
         """
         Analyze all links found in text
         
         Args:
-            text: Text containing potential links
+            text: Text containing potential links, or its normalized view
+            check_reputation: Also fetch the links, concurrently and within the
+                reputation deadline (the analyzer's setting if None)
             
         Returns:
             List of analysis results for each link
         """
-        links = self.extract_links(text)
-        results = []
+        with time_stage('link_analysis'):
+            found = self._find_links(normalize(text))
+            links = [link for link, _ in found]
+            results = []
+            
+            for link, normalized_link in found:
+                analysis = self.analyze_url(link, normalized_link)
+                results.append(analysis)
         
-        for link in links:
-            analysis = self.analyze_url(link)
-            results.append(analysis)
+        if check_reputation is None:
+            check_reputation = self.check_reputation
+        if check_reputation and links:
+            with time_stage('link_reputation'):
+                reputations = self.reputation_checker.check_urls(links)
+            for analysis in results:
+                self.apply_reputation(analysis, reputations[analysis['url']])
         
-        logging.info(f"Analyzed {len(results)} links in text")
+        logging.info("Analyzed %d links in text", len(results), extra={'event': 'link_analysis'})
         return results
     
+    def analyze_links_in_batch(self, texts: List[Union[str, NormalizedText]]) -> List[List[Dict[str, Any]]]:
+        """
+        Analyze the links in many texts in one call
+        
+        Each distinct URL is analyzed once per batch, since bulk traffic
+        tends to repeat the same links across messages.
+        
+        Args:
+            texts: Texts containing potential links, or their normalized views
+            
+        Returns:
+            List with the link analysis results for each text, in input order
+        """
+        url_results = {}
+        batch_results = []
+        
+        with time_stage('link_analysis_batch'):
+            for text in texts:
+                results = []
+                for link, normalized_link in self._find_links(normalize(text)):
+                    if link not in url_results:
+                        url_results[link] = self.analyze_url(link, normalized_link)
+                    results.append(url_results[link])
+                batch_results.append(results)
+        
+        # One deadline covers the reputation checks of the whole batch
+        if self.check_reputation and url_results:
+            with time_stage('link_reputation'):
+                reputations = self.reputation_checker.check_urls(url_results)
+            for link, analysis in url_results.items():
+                self.apply_reputation(analysis, reputations[link])
+        
+        logging.info("Analyzed %d unique links in %d texts", len(url_results), len(texts),
+                     extra={'event': 'link_batch_analysis'})
+        return batch_results
+    
     def check_url_reputation(self, url: str) -> Dict[str, Any]:
         """
         Check URL reputation (simplified version - in production would use real services)
@@ -148,37 +376,7 @@ class LinkAnalyzer:
         Returns:
             Reputation check results
         """
-        try:
-            # Simple check - try to resolve the domain
-            response = requests.head(url, timeout=5, allow_redirects=True)
-            
-            # Check response characteristics
-            suspicious_headers = []
-            if 'server' in response.headers:
-                server = response.headers['server'].lower()
-                if any(sus in server for sus in ['nginx/1.', 'apache/2.2']):
-                    suspicious_headers.append("Outdated server version")
-            
-            # Check for redirects
-            redirect_count = len(response.history)
-            if redirect_count > 3:
-                suspicious_headers.append("Too many redirects")
-            
-            return {
-                'accessible': True,
-                'status_code': response.status_code,
-                'redirect_count': redirect_count,
-                'suspicious_headers': suspicious_headers,
-                'final_url': response.url
-            }
-            
-        except requests.RequestException as e:
-            logging.error(f"Could not check URL reputation for {url}: {str(e)}")
-            return {
-                'accessible': False,
-                'error': str(e),
-                'suspicious_headers': ['Connection failed']
-            }
+        return self.reputation_checker.check_url(url)
     
     def get_domain_age_estimate(self, domain: str) -> str:
         """
@@ -0,0 +1,476 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import logging
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import requests
+from benchmark import Corpus, synthetic_screenshot
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf')]
+DEFAULT_MIX = 'text=70,image=10,chat=20'
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load_test_baseline.json')
+
+CHAT_QUERIES = [
+    'What is a UPI scam?', 'How do I report a fraud?', 'Is it safe to share my OTP?',
+    'Someone called from my bank asking for KYC', 'How to identify phishing links?', 'OTP kya hota hai?'
+]
+
+class TrafficMix:
+    """
+    Weighted mix of text, image and chat requests
+
+    Chat requests continue conversations like users do: a conversation
+    sends its next message only after the reply to the previous one, with
+    the session id and state token that reply returned, and ends after
+    chat_turns messages. A chat request finding no conversation waiting
+    for its next message starts a new one.
+    """
+
+    def __init__(self, weights: Dict[str, float], image_variants: int = 8, unique_texts: bool = False,
+                 chat_turns: int = 6, seed: int = 1):
+        """
+        Prepare request payloads
+
+        Args:
+            weights: Relative weight of 'text', 'image' and 'chat' requests
+            image_variants: Screenshots with different messages rotated through;
+                the server's image cache hits on every repeat unless it is disabled
+            unique_texts: Make every text unique so the analysis cache never hits
+            chat_turns: Messages per chat conversation
+            seed: Seed for the payload choice
+        """
+        unknown = set(weights) - {'text', 'image', 'chat'}
+        if unknown:
+            raise ValueError(f"Unknown request types in mix: {', '.join(sorted(unknown))}")
+
+        self.kinds = [kind for kind, weight in weights.items() if weight > 0]
+        self.weights = [weights[kind] for kind in self.kinds]
+        self.unique_texts = unique_texts
+        self.chat_turns = chat_turns
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._idle_conversations = []  # Conversations whose last reply has arrived
+
+        self.conversations = 0
+        self.continued_turns = 0
+        self.session_resets = 0
+
+        corpus = Corpus(seed=seed)
+        self.texts = corpus.sms(500)
+        self.images = [synthetic_screenshot(lines=20 + index * 3, seed=seed * 1000 + index)
+                       for index in range(image_variants)] if 'image' in self.kinds else []
+
+    @classmethod
+    def parse(cls, mix: str, **kwargs) -> 'TrafficMix':
+        """Build a mix from a 'text=70,image=10,chat=20' specification"""
+        weights = {}
+        for part in mix.split(','):
+            kind, _, weight = part.partition('=')
+            weights[kind.strip()] = float(weight)
+        return cls(weights, **kwargs)
+
+    def next_request(self):
+        """
+        Pick the next request
+
+        Returns:
+            Tuple of (kind, path, requests keyword arguments, conversation);
+            the conversation of a chat request goes to finish_chat with its
+            response, and is None for other kinds
+        """
+        with self._lock:
+            kind = self.random.choices(self.kinds, self.weights)[0]
+            self._counter += 1
+            counter = self._counter
+            text = self.random.choice(self.texts)
+            image = self.random.choice(self.images) if self.images else None
+            query = self.random.choice(CHAT_QUERIES)
+            conversation = None
+            if kind == 'chat':
+                if self._idle_conversations:
+                    conversation = self._idle_conversations.pop(self.random.randrange(len(self._idle_conversations)))
+                    self.continued_turns += 1
+                else:
+                    conversation = {'session_id': None, 'session_token': None, 'turns': 0}
+                    self.conversations += 1
+
+        if kind == 'text':
+            if self.unique_texts:
+                text = f"{text} #{counter}"
+            return kind, '/analyze_text', {'json': {'text': text, 'language': 'en'}}, None
+        if kind == 'image':
+            return kind, '/analyze_image', {'files': {'file': ('screenshot.png', image, 'image/png')},
+                                            'data': {'language': 'en'}}, None
+        return kind, '/chatbot_query', {'json': {'query': query, 'language': 'en',
+                                                 'session_id': conversation['session_id'],
+                                                 'session_token': conversation['session_token']}}, conversation
+
+    def finish_chat(self, conversation: Dict[str, Any], reply: Optional[Dict[str, Any]]):
+        """
+        Make a conversation available for its next message
+
+        Args:
+            conversation: Conversation returned by next_request
+            reply: JSON body of the response, or None if the request failed
+                (the conversation is then abandoned)
+        """
+        if not reply or not reply.get('success'):
+            return
+        conversation['session_id'] = reply.get('session_id')
+        conversation['session_token'] = reply.get('session_token')
+        conversation['turns'] += 1
+        with self._lock:
+            if reply.get('session_reset'):
+                self.session_resets += 1
+            if conversation['turns'] < self.chat_turns:
+                self._idle_conversations.append(conversation)
+
+    def chat_stats(self) -> Dict[str, int]:
+        """Conversations started, messages sent in existing ones, and those the server did not know"""
+        with self._lock:
+            return {'conversations': self.conversations, 'continued_turns': self.continued_turns,
+                    'session_resets': self.session_resets}
+
+class GunicornServer:
+    """The app running under gunicorn on a free local port"""
+
+    def __init__(self, workers: int = 2, threads: int = 4, log_path: Optional[str] = None,
+                 extra_args: Optional[List[str]] = None, env: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            workers: gunicorn worker processes
+            threads: Threads per worker
+            log_path: File receiving the gunicorn output (discarded if None)
+            extra_args: Further gunicorn command line arguments
+            env: Environment variables set for the server on top of this process's
+        """
+        self.workers = workers
+        self.threads = threads
+        self.log_path = log_path
+        self.extra_args = extra_args or []
+        self.env = env or {}
+        self.port = self._free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._process = None
+        self._log = None
+
+    @staticmethod
+    def _free_port() -> int:
+        """Ask the OS for an unused local port"""
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def start(self, timeout: float = 60.0):
+        """Start gunicorn and wait until it answers"""
+        command = [sys.executable, '-m', 'gunicorn', '--workers', str(self.workers), '--threads', str(self.threads),
+                   '--bind', f'127.0.0.1:{self.port}', *self.extra_args, 'main:app']
+        self._log = open(self.log_path, 'w') if self.log_path else subprocess.DEVNULL
+        self._process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                         env={**os.environ, **self.env}, stdout=self._log, stderr=subprocess.STDOUT)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {self._process.returncode}")
+            try:
+                requests.get(self.url + '/', timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"gunicorn did not answer within {timeout}s")
+
+    def stop(self):
+        """Stop gunicorn"""
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        if self._log not in (None, subprocess.DEVNULL):
+            self._log.close()
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Latency percentiles, histogram and error rate of a set of samples"""
+    latencies = sorted(sample['latency_ms'] for sample in samples)
+    errors = sum(1 for sample in samples if not sample['ok'])
+    error_categories = {}
+    for sample in samples:
+        if not sample['ok']:
+            error_categories[sample['error']] = error_categories.get(sample['error'], 0) + 1
+
+    histogram = {}
+    bucket_index = 0
+    for latency in latencies:
+        while latency > HISTOGRAM_BUCKETS[bucket_index]:
+            bucket_index += 1
+        label = f"<={HISTOGRAM_BUCKETS[bucket_index]:g}ms" if HISTOGRAM_BUCKETS[bucket_index] != float('inf') \
+            else f">{HISTOGRAM_BUCKETS[-2]:g}ms"
+        histogram[label] = histogram.get(label, 0) + 1
+
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'errors_by_category': error_categories,
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 1),
+        'p95_ms': round(percentile(latencies, 0.95), 1),
+        'p99_ms': round(percentile(latencies, 0.99), 1),
+        'max_ms': round(latencies[-1], 1) if latencies else 0.0,
+        'histogram': histogram
+    }
+
+class LoadGenerator:
+    """Open-loop load at a fixed request rate"""
+
+    def __init__(self, base_url: str, mix: TrafficMix, concurrency: int = 64, timeout: float = 30.0):
+        """
+        Args:
+            base_url: Server to load
+            mix: Requests to replay
+            concurrency: Client threads; requests beyond it queue on the client
+            timeout: Seconds before a request counts as failed
+        """
+        self.base_url = base_url
+        self.mix = mix
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        """Keep-alive session of the calling client thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _send(self, kind: str, path: str, kwargs: Dict[str, Any], scheduled: float,
+              conversation: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send one request
+
+        Latency is measured from the time the request was scheduled, not
+        sent, so a saturated server cannot hide queueing delay from the
+        report (coordinated omission). The endpoints report failed analyses
+        as HTTP 200 with "success": false, so the body is checked too.
+
+        The error category of a failed request is 'http_<status>', the
+        exception name for transport errors, 'invalid_json' for a body that
+        is not JSON, or 'analysis_failed' for "success": false.
+        """
+        reply = None
+        error = None
+        try:
+            response = self._session().post(self.base_url + path, timeout=self.timeout, **kwargs)
+            status = response.status_code
+            if status >= 400:
+                error = f"http_{status}"
+            else:
+                reply = response.json()
+                if isinstance(reply, dict) and reply.get('success', True) is False:
+                    error = 'analysis_failed'
+        except requests.RequestException as e:
+            status = error = type(e).__name__
+        except ValueError:
+            error = 'invalid_json'
+        if conversation is not None:
+            self.mix.finish_chat(conversation, reply if error is None else None)
+        return {'kind': kind, 'ok': error is None, 'status': status, 'error': error,
+                'latency_ms': (time.perf_counter() - scheduled) * 1000}
+
+    def run(self, rate: float, duration: float) -> Dict[str, Any]:
+        """
+        Replay the mix at a target rate
+
+        Args:
+            rate: Requests per second
+            duration: Seconds to keep sending
+
+        Returns:
+            Summary overall and per request type
+        """
+        total = max(1, int(rate * duration))
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            started = time.perf_counter()
+            for index in range(total):
+                scheduled = started + index / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                kind, path, kwargs, conversation = self.mix.next_request()
+                futures.append(executor.submit(self._send, kind, path, kwargs, scheduled, conversation))
+            samples = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+
+        result = {'target_rps': rate, 'duration_seconds': duration, **summarize(samples, elapsed)}
+        result['by_type'] = {}
+        for kind in sorted({sample['kind'] for sample in samples}):
+            kind_samples = [sample for sample in samples if sample['kind'] == kind]
+            result['by_type'][kind] = summarize(kind_samples, elapsed)
+            del result['by_type'][kind]['histogram']
+        return result
+
+def is_sustainable(stage: Dict[str, Any], max_error_rate: float, slo_p99_ms: float) -> bool:
+    """Whether the server kept up with a stage's target rate within the SLO"""
+    return (stage['error_rate'] <= max_error_rate and stage['p99_ms'] <= slo_p99_ms
+            and stage['throughput_rps'] >= 0.9 * stage['target_rps'])
+
+def check_regressions(report: Dict[str, Any], args, baseline: Optional[Dict[str, Any]]) -> List[str]:
+    """List the failed threshold checks of a run"""
+    failures = []
+    for stage in report['stages']:
+        label = f"{stage['target_rps']:g} rps"
+        if args.max_p95_ms is not None and stage['p95_ms'] > args.max_p95_ms:
+            failures.append(f"{label}: p95 {stage['p95_ms']}ms > {args.max_p95_ms}ms")
+        if args.max_p99_ms is not None and stage['p99_ms'] > args.max_p99_ms:
+            failures.append(f"{label}: p99 {stage['p99_ms']}ms > {args.max_p99_ms}ms")
+        if stage['error_rate'] > args.max_error_rate:
+            failures.append(f"{label}: error rate {stage['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    if report['chat']['session_resets']:
+        # Every conversation of the run is younger than the session idle timeout
+        failures.append(f"{report['chat']['session_resets']} chat messages lost their conversation")
+    if args.min_rps is not None and report['max_sustainable_rps'] < args.min_rps:
+        failures.append(f"max sustainable {report['max_sustainable_rps']} rps < {args.min_rps} rps")
+
+    if baseline:
+        previous = {stage['target_rps']: stage for stage in baseline['stages']}
+        for stage in report['stages']:
+            before = previous.get(stage['target_rps'])
+            if before and before['p99_ms'] and stage['p99_ms'] > before['p99_ms'] * (1 + args.threshold):
+                failures.append(f"{stage['target_rps']:g} rps: p99 {stage['p99_ms']}ms vs baseline {before['p99_ms']}ms")
+        if report['max_sustainable_rps'] < baseline['max_sustainable_rps'] * (1 - args.threshold):
+            failures.append(f"max sustainable {report['max_sustainable_rps']} rps "
+                            f"vs baseline {baseline['max_sustainable_rps']} rps")
+    return failures
+
+def _error_breakdown(summary: Dict[str, Any]) -> str:
+    """Error counts by category, e.g. ' (analysis_failed 12, http_503 3)'"""
+    if not summary['errors_by_category']:
+        return ''
+    return ' (' + ', '.join(f"{category} {count}" for category, count in
+                            sorted(summary['errors_by_category'].items())) + ')'
+
+def print_stage(stage: Dict[str, Any]):
+    """Write a human-readable stage summary to stderr"""
+    print(f"target {stage['target_rps']:g} rps: achieved {stage['throughput_rps']} rps, "
+          f"p50 {stage['p50_ms']}ms p95 {stage['p95_ms']}ms p99 {stage['p99_ms']}ms, "
+          f"errors {stage['error_rate']:.2%}{_error_breakdown(stage)}", file=sys.stderr)
+    for label, count in stage['histogram'].items():
+        print(f"  {label:>10} {count:>7} {'#' * max(1, 50 * count // stage['requests'])}", file=sys.stderr)
+    for kind, summary in stage['by_type'].items():
+        print(f"  {kind:<6} n={summary['requests']} p50 {summary['p50_ms']}ms p95 {summary['p95_ms']}ms "
+              f"p99 {summary['p99_ms']}ms errors {summary['error_rate']:.2%}{_error_breakdown(summary)}",
+              file=sys.stderr)
+
+def main():
+    """Load-test the app under gunicorn and report latency and sustainable throughput"""
+    parser = argparse.ArgumentParser(description="Load-test the Flask endpoints")
+    parser.add_argument('--url', help="Load an already running server instead of starting gunicorn")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument('--server-log', help="File for the gunicorn output")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Request mix, e.g. 'text=70,image=10,chat=20'")
+    parser.add_argument('--rates', default='10,25,50', help="Comma-separated target rates in requests/second")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds per rate")
+    parser.add_argument('--concurrency', type=int, default=64, help="Client threads")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Request timeout in seconds")
+    parser.add_argument('--unique-texts', action='store_true', help="Defeat the analysis cache")
+    parser.add_argument('--image-variants', type=int, default=8, help="Distinct screenshots rotated through")
+    parser.add_argument('--no-image-cache', action='store_true',
+                        help="Start gunicorn with the screenshot cache disabled, so every image is OCR'd")
+    parser.add_argument('--chat-turns', type=int, default=6, help="Messages per chat conversation")
+    parser.add_argument('--slo-p99-ms', type=float, default=1000.0, help="p99 a sustainable rate must meet")
+    parser.add_argument('--output', help="Write the report as JSON to this file")
+    parser.add_argument('--max-p95-ms', type=float, help="Fail if any stage's p95 exceeds this")
+    parser.add_argument('--max-p99-ms', type=float, help="Fail if any stage's p99 exceeds this")
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help="Fail if any stage's error rate exceeds this")
+    parser.add_argument('--min-rps', type=float, help="Fail if the max sustainable rate is below this")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline report to compare with")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed change versus the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.url and args.no_image_cache:
+        parser.error("--no-image-cache only applies to the gunicorn started here; run the server with IMAGE_CACHE_SIZE=0")
+    mix = TrafficMix.parse(args.mix, image_variants=args.image_variants, unique_texts=args.unique_texts,
+                           chat_turns=args.chat_turns)
+    rates = [float(rate) for rate in args.rates.split(',')]
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        server = GunicornServer(workers=args.workers, threads=args.threads, log_path=args.server_log,
+                                env={'IMAGE_CACHE_SIZE': '0'} if args.no_image_cache else None)
+        server.start()
+        base_url = server.url
+        print(f"gunicorn listening on {base_url} ({args.workers} workers x {args.threads} threads)", file=sys.stderr)
+
+    stages = []
+    try:
+        generator = LoadGenerator(base_url, mix, concurrency=args.concurrency, timeout=args.timeout)
+        for rate in rates:
+            stage = generator.run(rate, args.duration)
+            stages.append(stage)
+            print_stage(stage)
+    finally:
+        if server:
+            server.stop()
+
+    sustainable = [stage['target_rps'] for stage in stages if is_sustainable(stage, args.max_error_rate, args.slo_p99_ms)]
+    report = {
+        'config': {'mix': args.mix, 'rates': rates, 'duration': args.duration, 'workers': args.workers,
+                   'threads': args.threads, 'slo_p99_ms': args.slo_p99_ms, 'url': args.url,
+                   'image_variants': args.image_variants, 'image_cache': not args.no_image_cache,
+                   'chat_turns': args.chat_turns},
+        'stages': stages,
+        'chat': mix.chat_stats(),
+        'max_sustainable_rps': max(sustainable) if sustainable else 0.0
+    }
+    print(f"max sustainable rate: {report['max_sustainable_rps']:g} rps (p99 <= {args.slo_p99_ms:g}ms)", file=sys.stderr)
+    print(f"chat: {report['chat']['conversations']} conversations, {report['chat']['continued_turns']} follow-up "
+          f"messages, {report['chat']['session_resets']} session resets", file=sys.stderr)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+    report['failures'] = check_regressions(report, args, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+
+    for failure in report['failures']:
+        print(f"FAIL {failure}", file=sys.stderr)
+    if report['failures']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
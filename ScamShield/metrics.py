@@ -0,0 +1,431 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import logging
+import tempfile
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Seconds; spans a cached lookup up to a slow multi-band OCR run
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = '') -> str:
+    """Render a label set, e.g. '{stage="ocr",le="0.5"}'"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Metric:
+    """Base of the metric types; values are kept per tuple of label values"""
+
+    type = 'untyped'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, Any] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """This process's values in the shared file format"""
+        with self.registry.lock:
+            samples = {json.dumps(labels): self._copy(value) for labels, value in self._values.items()}
+        return {'type': self.type, 'help': self.documentation, 'labelnames': list(self.labelnames),
+                'samples': samples}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def reset(self):
+        """Forget this process's values"""
+        with self.registry.lock:
+            self._values.clear()
+
+class Counter(Metric):
+    """Monotonically increasing count, summed across processes"""
+
+    type = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        """Add to the count for a label set"""
+        self.registry.check_process()
+        with self.registry.lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set_total(self, value: float, *labels):
+        """Mirror a count kept by another object, e.g. a cache's hit counter"""
+        with self.registry.lock:
+            self._values[labels] = value
+
+class Gauge(Metric):
+    """Current value, summed across the processes that are still alive"""
+
+    type = 'gauge'
+
+    def set(self, value: float, *labels):
+        """Set the value for a label set"""
+        with self.registry.lock:
+            self._values[labels] = value
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets, summed across processes"""
+
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        """
+        Record one observation
+
+        Each label set holds per-bucket counts (plus one overflow slot), the
+        sum and the count; buckets are made cumulative only when rendered.
+        """
+        self.registry.check_process()
+        index = bisect_left(self.buckets, value)
+        with self.registry.lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, *labels) -> 'Timer':
+        """Context manager observing the duration of its block"""
+        return Timer(self, labels)
+
+    @staticmethod
+    def _copy(value):
+        return list(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = super().snapshot()
+        snapshot['buckets'] = list(self.buckets)
+        return snapshot
+
+class Timer:
+    """Times a block with perf_counter and records it in a histogram"""
+
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+class MetricsRegistry:
+    """
+    Process-local metrics that can be aggregated across worker processes
+
+    Observations only touch in-memory counters. When sharing is enabled each
+    process also writes its values to its own file in a shared directory
+    about once a second, and render() sums the files of all processes, so
+    whichever gunicorn worker answers a scrape reports the whole server.
+    """
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 1.0):
+        """
+        Initialize an empty registry
+
+        Args:
+            directory: Shared directory for per-process files (None keeps metrics process-local)
+            flush_interval: Seconds between writes of this process's file
+        """
+        self.lock = threading.Lock()
+        self.flush_interval = flush_interval
+        self.directory = None
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._pid = os.getpid()
+        self._token = uuid.uuid4().hex[:8]
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+        if directory:
+            self.enable_sharing(directory)
+
+    @classmethod
+    def from_env(cls) -> 'MetricsRegistry':
+        """Registry sharing through METRICS_DIR when it is set"""
+        return cls(directory=os.environ.get('METRICS_DIR'),
+                   flush_interval=float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0)))
+
+    @staticmethod
+    def default_directory() -> str:
+        """
+        Fresh directory for a process started without METRICS_DIR
+
+        gunicorn.conf.py sets METRICS_DIR to one directory per server run
+        before the workers start; a process on its own (e.g. the development
+        server) gets a new directory, which its OCR processes inherit.
+        """
+        return tempfile.mkdtemp(prefix='cyberrakshak-metrics-')
+
+    def enable_sharing(self, directory: Optional[str] = None):
+        """
+        Share metrics through per-process files in a directory
+
+        The directory is exported as METRICS_DIR so that processes started
+        later (e.g. OCR workers) share through it as well.
+        """
+        self.directory = directory or os.environ.get('METRICS_DIR') or self.default_directory()
+        os.makedirs(self.directory, exist_ok=True)
+        os.environ['METRICS_DIR'] = self.directory
+        atexit.register(self.flush)
+        self._start_flusher()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Register a counter"""
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Register a gauge"""
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Register a histogram"""
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric: Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Register a callback that updates mirrored counters and gauges before each flush"""
+        self._collectors.append(collector)
+
+    def check_process(self):
+        """
+        Start over after a fork
+
+        A forked worker inherits the master's values, which the master
+        reports itself, and none of its threads; reset both.
+        """
+        if os.getpid() != self._pid:
+            with self._flusher_lock:
+                if os.getpid() != self._pid:
+                    self._pid = os.getpid()
+                    self._token = uuid.uuid4().hex[:8]
+                    self.lock = threading.Lock()  # May have been held by another thread at fork time
+                    for metric in self._metrics.values():
+                        metric._values.clear()
+                    self._flusher = None
+                    if self.directory:
+                        self._start_flusher()
+
+    def _start_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while pid == os.getpid():
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def collect(self) -> Dict[str, Any]:
+        """Snapshot of this process's metrics"""
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logging.error(f"Metrics collector failed: {str(e)}")
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def flush(self):
+        """Write this process's snapshot to its file in the shared directory"""
+        if not self.directory:
+            return
+        self.check_process()
+        # The token keeps a later process that reuses the pid from replacing this file
+        path = os.path.join(self.directory, f'{os.getpid()}-{self._token}.json')
+        temp_path = f'{path}.tmp'
+        try:
+            with open(temp_path, 'w') as metrics_file:
+                json.dump({'pid': os.getpid(), 'metrics': self.collect()}, metrics_file)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.error(f"Could not write metrics to {path}: {str(e)}")
+
+    def _load_snapshots(self) -> List[Dict[str, Any]]:
+        """Snapshots of every process, this one freshly collected"""
+        if not self.directory:
+            return [{'pid': os.getpid(), 'metrics': self.collect(), 'alive': True}]
+
+        self.flush()
+        snapshots = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as metrics_file:
+                    snapshot = json.load(metrics_file)
+            except (OSError, ValueError):
+                continue  # Replaced or removed while reading
+            snapshot['alive'] = snapshot['pid'] is not None and self._is_alive(snapshot['pid'])
+            snapshots.append(snapshot)
+        return snapshots
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def render(self) -> str:
+        """
+        Render all processes' metrics in the Prometheus text format
+
+        Counters and histograms of exited processes still count, so totals
+        never go backwards when gunicorn recycles a worker; gauges only
+        include live processes.
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        for snapshot in self._load_snapshots():
+            _merge_snapshot(merged, snapshot['metrics'], include_gauges=snapshot['alive'])
+
+        lines = []
+        for name in sorted(merged):
+            metric = merged[name]
+            labelnames = metric['labelnames']
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for labels_json, value in sorted(metric['samples'].items()):
+                labels = json.loads(labels_json)
+                if metric['type'] != 'histogram':
+                    lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric['buckets'] + ['+Inf'], value[:-2]):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == '+Inf' else f'le="{bound}"'
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{_format_labels(labelnames, labels)} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+def _merge_snapshot(merged: Dict[str, Dict[str, Any]], metrics: Dict[str, Any], include_gauges: bool):
+    """Add the metrics of one snapshot to merged, summing samples with the same labels"""
+    for name, metric in metrics.items():
+        if metric['type'] == 'gauge' and not include_gauges:
+            continue
+        target = merged.setdefault(name, {**metric, 'samples': {}})
+        for labels, value in metric['samples'].items():
+            if labels not in target['samples']:
+                target['samples'][labels] = list(value) if isinstance(value, list) else value
+            elif isinstance(value, list):
+                target['samples'][labels] = [a + b for a, b in zip(target['samples'][labels], value)]
+            else:
+                target['samples'][labels] += value
+
+ARCHIVE_FILE = 'archived.json'
+
+def prepare_run_directory(directory: Optional[str] = None) -> str:
+    """
+    Set up the shared metrics directory of a new server run
+
+    Called by the gunicorn master before the app is loaded. Files left by
+    a previous run (e.g. a container restarted with the same process ids)
+    are deleted, so its counters are not added to this run's.
+
+    Args:
+        directory: Directory to use (a new temporary directory if None)
+
+    Returns:
+        The directory, also exported as METRICS_DIR for every process of the run
+    """
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for filename in os.listdir(directory):
+            if filename.endswith(('.json', '.tmp')):
+                os.remove(os.path.join(directory, filename))
+    else:
+        directory = tempfile.mkdtemp(prefix='cyberrakshak-metrics-')
+    os.environ['METRICS_DIR'] = directory
+    return directory
+
+def mark_process_dead(pid: int, directory: Optional[str] = None):
+    """
+    Fold the files of an exited process into the archive of the run
+
+    Its counters and histograms keep counting, so totals never go backwards
+    when gunicorn recycles a worker, while its gauges are dropped. Called
+    by the gunicorn master only, so the archive has a single writer.
+
+    Args:
+        pid: Process id of the exited worker
+        directory: Shared metrics directory (METRICS_DIR if None)
+    """
+    directory = directory or os.environ.get('METRICS_DIR')
+    if not directory:
+        return
+    paths = [os.path.join(directory, filename) for filename in os.listdir(directory)
+             if filename.startswith(f'{pid}-') and filename.endswith('.json')]
+    if not paths:
+        return
+
+    archive_path = os.path.join(directory, ARCHIVE_FILE)
+    merged: Dict[str, Dict[str, Any]] = {}
+    for path in [archive_path] + paths:
+        try:
+            with open(path) as metrics_file:
+                _merge_snapshot(merged, json.load(metrics_file)['metrics'], include_gauges=False)
+        except (OSError, ValueError):
+            continue
+
+    temp_path = f'{archive_path}.tmp'
+    with open(temp_path, 'w') as metrics_file:
+        json.dump({'pid': None, 'metrics': merged}, metrics_file)
+    os.replace(temp_path, archive_path)
+    for path in paths:
+        os.remove(path)
+
+registry = MetricsRegistry.from_env()
+
+REQUESTS = registry.counter('cyberrakshak_http_requests_total', 'HTTP requests handled', ['endpoint', 'status'])
+REQUEST_DURATION = registry.histogram('cyberrakshak_http_request_duration_seconds',
+                                      'Time spent handling HTTP requests', ['endpoint'])
+STAGE_DURATION = registry.histogram('cyberrakshak_stage_duration_seconds',
+                                    'Time spent in each analysis stage', ['stage'])
+CACHE_LOOKUPS = registry.counter('cyberrakshak_cache_lookups_total', 'Cache lookups by result', ['cache', 'result'])
+OCR_PENDING_JOBS = registry.gauge('cyberrakshak_ocr_queue_depth', 'OCR jobs queued or running')
+CHAT_SESSIONS = registry.gauge('cyberrakshak_chat_sessions', 'Chatbot conversations held in memory')
+
+def time_stage(stage: str) -> Timer:
+    """Context manager recording the duration of an analysis stage"""
+    return Timer(STAGE_DURATION, (stage,))
+
+def observe_stage(stage: str, seconds: float):
+    """Record the duration of an analysis stage that was timed elsewhere"""
+    STAGE_DURATION.observe(seconds, stage)
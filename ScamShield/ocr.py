@@ -0,0 +1,335 @@
+import io
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+import pytesseract
+from PIL import Image, ImageSequence
+from image_preprocessing import ImagePreprocessor
+from ocr_engines import OSD_LANGUAGE, PytesseractEngine, create_ocr_engine
+from metrics import observe_stage
+from language_support import DEFAULT_OCR_LANGUAGES, script_ocr_languages
+
+OCR_LANGUAGES = DEFAULT_OCR_LANGUAGES
+TESSDATA_PATH = os.environ.get('OCR_TESSDATA_PATH')
+
+# Tesseract language used when script detection is confident about one script,
+# one per script LanguageSupport registers (Latin, Devanagari, Bengali, ...)
+SCRIPT_LANGUAGES = script_ocr_languages()
+SCRIPT_DETECTION = os.environ.get('OCR_SCRIPT_DETECTION', 'true').lower() in ('1', 'true', 'yes', 'on')
+SCRIPT_MIN_CONFIDENCE = float(os.environ.get('OCR_SCRIPT_MIN_CONFIDENCE', 2.0))
+SCRIPT_THUMBNAIL_SIDE = int(os.environ.get('OCR_SCRIPT_THUMBNAIL_SIDE', 800))
+
+# Tall scroll captures are split into overlapping bands OCR'd in parallel
+TILE_HEIGHT = int(os.environ.get('OCR_TILE_HEIGHT', 2000))
+TILE_OVERLAP = int(os.environ.get('OCR_TILE_OVERLAP', 200))
+TILE_MATCH_LINES = 12  # Lines at each band edge searched for the overlap
+TILE_EDGE_LINES = 2  # Lines cut by a band edge, allowed between the overlap and the edge
+TILE_MIN_MATCH_LINES = 2  # Shortest overlap trusted, unless its text is long enough
+TILE_MIN_MATCH_CHARS = 24
+# Bands of one image OCR'd at once; every OCR process already handles its own
+# image, so this stays small and the engine keeps one warm handle per band worker
+TILE_WORKERS = int(os.environ.get('OCR_TILE_WORKERS', 2))
+MAX_FRAMES = int(os.environ.get('OCR_MAX_FRAMES', 20))
+
+_tile_executor = None
+_tile_executor_lock = threading.Lock()
+_installed_languages = None
+
+# Configured from environment variables, also in OCR worker processes
+preprocessor = ImagePreprocessor.from_env()
+ocr_engine = create_ocr_engine(pool_size=int(os.environ.get('OCR_ENGINE_POOL_SIZE', 0)) or TILE_WORKERS)
+fallback_engine = PytesseractEngine()
+
+def open_image(source, load=True):
+    """
+    Open an image without writing it to disk
+    
+    Args:
+        source: Image bytes, a binary stream (such as an upload's stream) or a file path
+        load: Decode immediately; pass False to let the caller pick a reduced decode size first
+        
+    Returns:
+        PIL image
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, 'seek'):
+        source.seek(0)
+    
+    image = Image.open(source)
+    if load:
+        image.load()  # Decode now, while the stream is still open
+    return image
+
+def installed_languages() -> Optional[Set[str]]:
+    """Tesseract language packs installed on this machine, or None if they cannot be listed"""
+    global _installed_languages
+    if _installed_languages is None:
+        try:
+            config = f"--tessdata-dir {TESSDATA_PATH}" if TESSDATA_PATH else ''
+            _installed_languages = set(pytesseract.get_languages(config=config))
+        except Exception as e:
+            logging.warning(f"Cannot list installed Tesseract languages: {str(e)}")
+            _installed_languages = set()
+    return _installed_languages or None
+
+def is_installed(languages: str) -> bool:
+    """Whether every pack of a Tesseract language string is installed; assumed so if unknown"""
+    installed = installed_languages()
+    return installed is None or set(languages.split('+')) <= installed
+
+def available_languages(languages: str) -> str:
+    """Drop the packs of a Tesseract language string that are not installed"""
+    installed = installed_languages()
+    if installed is None:
+        return languages
+    return '+'.join(pack for pack in languages.split('+') if pack in installed) or languages
+
+def warm_up():
+    """Load the OCR models now; used as the OCR worker process initializer"""
+    languages = [available_languages(OCR_LANGUAGES)]
+    if SCRIPT_DETECTION:
+        languages += [OSD_LANGUAGE] + [language for language in SCRIPT_LANGUAGES.values() if is_installed(language)]
+    try:
+        ocr_engine.warm_up(languages)
+    except Exception as e:
+        logging.warning(f"OCR engine warm-up failed: {str(e)}")
+
+def recognize(image, lang):
+    """Run the configured OCR engine, falling back to pytesseract if it fails"""
+    try:
+        return ocr_engine.image_to_string(image, lang), ocr_engine.name
+    except Exception as e:
+        if ocr_engine.name == fallback_engine.name:
+            raise
+        logging.warning(f"{ocr_engine.name} OCR failed, falling back to pytesseract: {str(e)}")
+        return fallback_engine.image_to_string(image, lang), fallback_engine.name
+
+def choose_ocr_languages(image, languages: str = OCR_LANGUAGES) -> Dict[str, Any]:
+    """
+    Pick the Tesseract languages for an image from a script detection pass
+    
+    OSD runs on a thumbnail, which is far cheaper than recognizing with a
+    second language model. Mixed, unknown or low-confidence results, and
+    scripts whose language pack is not installed, keep the given languages.
+    
+    Args:
+        image: Preprocessed PIL image
+        languages: Tesseract languages used when the script is unknown
+        
+    Returns:
+        Dictionary with the chosen 'ocr_language', detected 'script' and timing
+    """
+    languages = available_languages(languages)
+    if not SCRIPT_DETECTION:
+        return {'ocr_language': languages, 'script': None}
+    
+    started = time.perf_counter()
+    thumbnail = image.copy()
+    thumbnail.thumbnail((SCRIPT_THUMBNAIL_SIDE, SCRIPT_THUMBNAIL_SIDE))
+    try:
+        detected = ocr_engine.detect_script(thumbnail)
+    except Exception as e:
+        logging.debug(f"Script detection failed, using {languages}: {str(e)}")
+        detected = {'script': None, 'confidence': 0.0}
+    
+    language = languages
+    if detected['confidence'] >= SCRIPT_MIN_CONFIDENCE:
+        script_language = SCRIPT_LANGUAGES.get(detected['script'])
+        if script_language and is_installed(script_language):
+            language = script_language
+    
+    return {
+        'ocr_language': language,
+        'script': detected['script'],
+        'script_confidence': round(detected['confidence'], 2),
+        'script_detection_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+def iter_frames(image):
+    """Yield each frame of a multi-frame GIF/TIFF, or the image itself"""
+    if getattr(image, 'n_frames', 1) <= 1:
+        yield image
+        return
+    
+    for index, frame in enumerate(ImageSequence.Iterator(image)):
+        if index >= MAX_FRAMES:
+            logging.warning(f"Only the first {MAX_FRAMES} of {image.n_frames} frames were analyzed")
+            break
+        yield frame.copy()
+
+def split_into_bands(image, band_height=None, overlap=None):
+    """
+    Split a tall image into overlapping horizontal bands
+    
+    Args:
+        image: PIL image
+        band_height: Height of each band in pixels
+        overlap: Pixels shared by consecutive bands, enough for a few text lines
+        
+    Returns:
+        List of band images, top to bottom
+    """
+    band_height = band_height or TILE_HEIGHT
+    overlap = overlap if overlap is not None else TILE_OVERLAP
+    width, height = image.size
+    if height <= band_height * 1.5:
+        return [image]
+    
+    bands = []
+    top = 0
+    step = band_height - overlap
+    while True:
+        bottom = min(top + band_height, height)
+        bands.append(image.crop((0, top, width, bottom)))
+        if bottom >= height:
+            return bands
+        top += step
+
+def stitch_band_texts(texts):
+    """
+    Join the OCR text of overlapping bands without repeating the shared lines
+    
+    Lines cut by a band edge are garbled, so the overlap is located as the
+    longest run of identical lines that ends within TILE_EDGE_LINES of the
+    end of one band and starts within TILE_EDGE_LINES of the start of the
+    next; the garbled lines on either side of that run are dropped. A run
+    must be at least TILE_MIN_MATCH_LINES lines or TILE_MIN_MATCH_CHARS
+    characters long, so one repeated line such as a timestamp is not taken
+    for the overlap. Without such a run the texts are joined whole: a
+    repeated line is better than a lost one.
+    
+    Args:
+        texts: OCR text of each band, top to bottom
+        
+    Returns:
+        Stitched text
+    """
+    lines = []
+    for text in texts:
+        band_lines = [line for line in text.splitlines() if line.strip()]
+        if not lines:
+            lines = band_lines
+            continue
+        
+        tail = [' '.join(line.split()) for line in lines[-TILE_MATCH_LINES:]]
+        head = [' '.join(line.split()) for line in band_lines[:TILE_MATCH_LINES]]
+        match = _find_band_overlap(tail, head)
+        if match:
+            tail_end, head_end = match
+            lines = lines[:len(lines) - len(tail) + tail_end] + band_lines[head_end:]
+        else:
+            lines += band_lines
+    return '\n'.join(lines)
+
+def _find_band_overlap(tail, head):
+    """
+    Locate the lines shared by the end of one band and the start of the next
+    
+    Returns:
+        Tuple of (end of the overlap in tail, end of the overlap in head), or None
+    """
+    best = None
+    best_key = (0, 0)
+    for head_start in range(min(TILE_EDGE_LINES + 1, len(head))):
+        for tail_start in range(len(tail)):
+            size = 0
+            while (tail_start + size < len(tail) and head_start + size < len(head)
+                   and tail[tail_start + size] == head[head_start + size]):
+                size += 1
+            if not size or len(tail) - (tail_start + size) > TILE_EDGE_LINES:
+                continue
+            chars = sum(len(line) for line in tail[tail_start:tail_start + size])
+            if size < TILE_MIN_MATCH_LINES and chars < TILE_MIN_MATCH_CHARS:
+                continue
+            if (size, chars) > best_key:
+                best_key = (size, chars)
+                best = (tail_start + size, head_start + size)
+    return best
+
+def recognize_bands(bands, lang):
+    """OCR bands TILE_WORKERS at a time and stitch their text"""
+    if len(bands) == 1:
+        return recognize(bands[0], lang)
+    
+    results = list(_get_tile_executor().map(lambda band: recognize(band, lang), bands))
+    return stitch_band_texts([text for text, _ in results]), results[0][1]
+
+def _get_tile_executor():
+    """Thread pool for band OCR; the engines release the GIL while recognizing"""
+    global _tile_executor
+    with _tile_executor_lock:
+        if _tile_executor is None:
+            _tile_executor = ThreadPoolExecutor(max_workers=TILE_WORKERS, thread_name_prefix='ocr-tile')
+        return _tile_executor
+
+def ocr_frame(image, languages: str = OCR_LANGUAGES) -> Dict[str, Any]:
+    """
+    Preprocess one frame and extract its text, tiling it when it is tall
+    
+    Args:
+        image: PIL image of a single frame
+        languages: Tesseract languages used when the script is unknown
+        
+    Returns:
+        Dictionary with the extracted 'text' and preprocessing/OCR 'stats'
+    """
+    image, stats = preprocessor.process(image)
+    observe_stage('decode', stats['decode_ms'] / 1000)
+    observe_stage('preprocess', (stats['preprocess_ms'] - stats['decode_ms']) / 1000)
+    bands = split_into_bands(image)
+    stats['tiles'] = len(bands)
+    
+    # Only load the language models the image needs; a band stands in for a tall image
+    stats.update(choose_ocr_languages(bands[0], languages))
+    
+    # Extract text using the warm OCR engine
+    started = time.perf_counter()
+    extracted_text, stats['ocr_engine'] = recognize_bands(bands, stats['ocr_language'])
+    preprocessor.record_ocr_time(stats, (time.perf_counter() - started) * 1000)
+    
+    if 'script_detection_ms' in stats:
+        observe_stage('script_detection', stats['script_detection_ms'] / 1000)
+    observe_stage('tesseract', stats['ocr_ms'] / 1000)
+    
+    return {'text': extracted_text.strip(), 'stats': stats}
+
+def ocr_image(source, languages: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Preprocess an image and extract its text using OCR
+    
+    Every frame of a multi-frame GIF/TIFF is read; repeated frames are skipped.
+    
+    Args:
+        source: Image bytes, a binary stream or a file path
+        languages: Tesseract languages used when the script is unknown
+            (OCR_LANGUAGES if None), e.g. from LanguageSupport.get_ocr_language
+        
+    Returns:
+        Dictionary with the extracted 'text' and preprocessing/OCR 'stats'
+    """
+    try:
+        image = open_image(source, load=False)
+        frame_results = [ocr_frame(frame, languages or OCR_LANGUAGES) for frame in iter_frames(image)]
+        
+        stats = dict(frame_results[0]['stats'])
+        if len(frame_results) > 1:
+            stats['frames'] = len(frame_results)
+            stats['frame_stats'] = [result['stats'] for result in frame_results]
+        
+        texts = []
+        for result in frame_results:
+            if result['text'] and (not texts or result['text'] != texts[-1]):
+                texts.append(result['text'])
+        
+        return {'text': '\n\n'.join(texts), 'stats': stats}
+    except Exception as e:
+        logging.error(f"OCR extraction failed: {str(e)}")
+        return {'text': '', 'stats': {}}
+
+def extract_text_from_image(source):
+    """Extract text from image bytes, stream or path using OCR"""
+    return ocr_image(source)['text']
@@ -0,0 +1,184 @@
+import os
+import queue
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # Optional: talks to the Tesseract C API without a subprocess
+    tesserocr = None
+
+# Pseudo-language of the traineddata used for orientation and script detection
+OSD_LANGUAGE = 'osd'
+
+class OCREngine:
+    """Interface shared by the OCR backends"""
+
+    name = 'base'
+
+    def image_to_string(self, image, lang: str) -> str:
+        """
+        Recognize the text in an image
+
+        Args:
+            image: PIL image
+            lang: Tesseract language string, e.g. 'eng+hin'
+
+        Returns:
+            Recognized text
+        """
+        raise NotImplementedError
+
+    def detect_script(self, image) -> Dict[str, Any]:
+        """
+        Estimate the dominant script of an image with Tesseract's OSD
+
+        Args:
+            image: PIL image, ideally a small thumbnail
+
+        Returns:
+            Dictionary with the 'script' name (e.g. 'Latin', 'Devanagari') and its 'confidence'
+        """
+        raise NotImplementedError
+
+    def warm_up(self, languages: List[str]):
+        """Load the models for the given languages ahead of the first request"""
+
+    def close(self):
+        """Release any engine resources"""
+
+class PytesseractEngine(OCREngine):
+    """Runs the tesseract CLI once per image through pytesseract"""
+
+    name = 'pytesseract'
+
+    def image_to_string(self, image, lang: str) -> str:
+        """Recognize text by starting a tesseract process for this image"""
+        return pytesseract.image_to_string(image, lang=lang)
+
+    def detect_script(self, image) -> Dict[str, Any]:
+        """Run orientation and script detection in a tesseract process"""
+        osd = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+        return {'script': osd['script'], 'confidence': float(osd['script_conf'])}
+
+class TesserocrEnginePool(OCREngine):
+    """Pool of initialised Tesseract API handles kept warm between requests"""
+
+    name = 'tesserocr'
+
+    def __init__(self, size: int = 1, tessdata_path: Optional[str] = None):
+        """
+        Initialize an empty pool; handles are created on demand
+
+        Args:
+            size: Maximum handles per language string, i.e. concurrent recognitions
+            tessdata_path: Directory with the traineddata files (tesserocr's default if None)
+        """
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+
+        self.size = size
+        self.tessdata_path = tessdata_path
+        self._idle: Dict[str, queue.Queue] = {}
+        self._created: Dict[str, int] = {}
+        self._handles = []
+        self._lock = threading.Lock()
+
+    def image_to_string(self, image, lang: str) -> str:
+        """Recognize text with a warm handle for the language, waiting if all are busy"""
+        api = self._acquire(lang)
+        try:
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._idle[lang].put(api)
+
+    def detect_script(self, image) -> Dict[str, Any]:
+        """Run orientation and script detection with a warm OSD-only handle"""
+        api = self._acquire(OSD_LANGUAGE)
+        try:
+            api.SetImage(image)
+            osd = api.DetectOrientationScript()
+        finally:
+            api.Clear()
+            self._idle[OSD_LANGUAGE].put(api)
+
+        if not osd:
+            raise RuntimeError("Too little text for script detection")
+        return {'script': osd['script_name'], 'confidence': float(osd['script_conf'])}
+
+    def warm_up(self, languages: List[str]):
+        """Create one handle per language so the first request skips model loading"""
+        for lang in languages:
+            with self._lock:
+                if self._created.get(lang, 0):
+                    continue
+            api = self._acquire(lang)
+            self._idle[lang].put(api)
+
+    def close(self):
+        """End every handle the pool created"""
+        with self._lock:
+            for api in self._handles:
+                api.End()
+            self._handles = []
+            self._idle = {}
+            self._created = {}
+
+    def _acquire(self, lang: str):
+        """Take an idle handle, creating one while below the pool size"""
+        with self._lock:
+            idle = self._idle.setdefault(lang, queue.Queue())
+            try:
+                return idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            create = self._created.get(lang, 0) < self.size
+            if create:
+                self._created[lang] = self._created.get(lang, 0) + 1
+
+        if not create:
+            return idle.get()
+
+        kwargs = {'lang': lang}
+        if lang == OSD_LANGUAGE:
+            kwargs['psm'] = tesserocr.PSM.OSD_ONLY
+        if self.tessdata_path:
+            kwargs['path'] = self.tessdata_path
+        try:
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+        except Exception:
+            with self._lock:
+                self._created[lang] -= 1
+            raise
+
+        with self._lock:
+            self._handles.append(api)
+        logging.info(f"Initialised Tesseract handle for {lang}")
+        return api
+
+def create_ocr_engine(backend: Optional[str] = None, pool_size: Optional[int] = None) -> OCREngine:
+    """
+    Create the OCR engine selected by OCR_ENGINE
+
+    Args:
+        backend: 'auto' (tesserocr when installed), 'tesserocr' or 'pytesseract'
+        pool_size: Warm handles per language for the tesserocr pool
+
+    Returns:
+        OCR engine, falling back to pytesseract when tesserocr is unavailable
+    """
+    backend = backend or os.environ.get('OCR_ENGINE', 'auto')
+    pool_size = pool_size or int(os.environ.get('OCR_ENGINE_POOL_SIZE', 2))
+
+    if backend in ('auto', 'tesserocr'):
+        if tesserocr is not None:
+            return TesserocrEnginePool(size=pool_size, tessdata_path=os.environ.get('OCR_TESSDATA_PATH'))
+        if backend == 'tesserocr':
+            logging.warning("tesserocr is not installed, falling back to pytesseract")
+
+    return PytesseractEngine()
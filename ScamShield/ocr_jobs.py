@@ -0,0 +1,337 @@
+import os
+import json
+import stat
+import time
+import uuid
+import logging
+import tempfile
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+from ocr import ocr_image, preprocessor, warm_up
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Not on Windows; the depth check is then not atomic across web workers
+
+# gunicorn.conf.py exports its worker count here; the development server is one process
+WEB_WORKERS = max(int(os.environ.get('WEB_CONCURRENCY', 1)), 1)
+
+def default_pool_size() -> int:
+    """OCR processes per web worker, so that all web workers together use each core once"""
+    return max((os.cpu_count() or 1) // WEB_WORKERS, 1)
+
+def default_job_directory() -> str:
+    """Job directory of this user in the temp directory"""
+    user = os.getuid() if hasattr(os, 'getuid') else os.environ.get('USERNAME', 'user')
+    return os.path.join(tempfile.gettempdir(), f'cyberrakshak-ocr-jobs-{user}')
+
+def private_directory(path: str) -> str:
+    """
+    Create a directory only its owner can use, or check an existing one
+
+    Job states hold the text read from users' screenshots, and the lock
+    and markers steer the queue, so another local user must not be able
+    to read them or to plant the directory first.
+
+    Raises:
+        PermissionError: If the path is a symlink, not a directory, or
+            owned by another user
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    status = os.lstat(path)
+    if not stat.S_ISDIR(status.st_mode):
+        raise PermissionError(f"OCR job directory {path} is not a directory")
+    if hasattr(os, 'getuid'):
+        if status.st_uid != os.getuid():
+            raise PermissionError(f"OCR job directory {path} belongs to another user")
+        if status.st_mode & 0o077:
+            os.chmod(path, 0o700)
+    return path
+
+class QueueFullError(Exception):
+    """Raised when the OCR job queue has reached its depth limit"""
+
+class OCRJobQueue:
+    """
+    Bounded queue of OCR jobs executed by a pool of worker processes
+
+    Every web worker runs its own pool, so pools default to a share of the
+    cores. The depth limit covers the jobs of all web workers: each queued
+    or running job holds a marker file in the shared job directory.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 result_ttl: float = 600, job_dir: Optional[str] = None):
+        """
+        Initialize the job queue; worker processes start on the first submit
+
+        Args:
+            max_workers: Number of OCR processes of this web worker (defaults
+                to the cores divided by the web workers)
+            max_pending: Maximum queued or running jobs of all web workers
+                before submit is rejected (defaults to 4 per OCR process)
+            result_ttl: Seconds finished job results are kept for polling
+            job_dir: Directory where job states are shared between web workers
+                (defaults to a directory of this user in the temp directory);
+                created private to this user
+
+        Raises:
+            PermissionError: If job_dir is not a directory of this user
+        """
+        self.max_workers = max_workers or default_pool_size()
+        self.max_pending = max_pending or self.max_workers * WEB_WORKERS * 4
+        self.result_ttl = result_ttl
+        self.job_dir = private_directory(job_dir or default_job_directory())
+        self.pending_dir = private_directory(os.path.join(self.job_dir, 'pending'))
+
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+        logging.info(f"OCRJobQueue initialized with {self.max_workers} workers, depth limit {self.max_pending}")
+
+    def submit(self, image_data: bytes, languages: Optional[str] = None) -> str:
+        """
+        Queue an image for OCR
+
+        Args:
+            image_data: Encoded image bytes
+            languages: Tesseract languages used when the script is unknown
+                (the OCR default if None)
+
+        Returns:
+            Job id to poll for the result
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running
+        """
+        job_id, _ = self._submit(image_data, languages, publish=True)
+        self._prune_expired()
+        return job_id
+
+    def run(self, image_data: bytes, languages: Optional[str] = None,
+            timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run OCR on the pool and wait for the result
+
+        Used for synchronous uploads, so their OCR shares the pool's cores and
+        the depth limit with queued jobs instead of running in the web worker.
+
+        Args:
+            image_data: Encoded image bytes
+            languages: Tesseract languages used when the script is unknown
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Dictionary with the extracted 'text' and preprocessing/OCR 'stats'
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running
+            TimeoutError: If the result is not ready within timeout; the job
+                is cancelled, or abandoned if it already started, and stops
+                counting toward the depth limit
+        """
+        job_id, future = self._submit(image_data, languages, publish=False)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if not future.cancel():
+                # Already running: nobody waits for the result any more, so free its
+                # slot now rather than when the OCR process gets through it
+                logging.warning(f"OCR job {job_id} timed out after {timeout}s; abandoning it")
+                self._remove(self._pending_path(job_id))
+            raise TimeoutError(f"OCR did not finish within {timeout} seconds")
+
+    def _submit(self, image_data: bytes, languages: Optional[str], publish: bool) -> Tuple[str, Any]:
+        """Check the depth limit and hand an image to the pool"""
+        with self._lock, self._shared_lock():
+            if self.server_depth() >= self.max_pending:
+                raise QueueFullError(f"OCR queue is full ({self.max_pending} pending jobs)")
+
+            if self._executor is None:
+                # Created lazily so gunicorn forks its workers before the pool exists;
+                # spawn keeps the OCR processes independent of the web worker's threads.
+                # The processes are long-lived, so each keeps its OCR models loaded
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=warm_up
+                )
+
+            job_id = uuid.uuid4().hex
+            os.close(os.open(self._pending_path(job_id), os.O_WRONLY | os.O_CREAT, 0o600))
+            if publish:
+                self._write_state(job_id, {'job_id': job_id, 'status': 'queued', 'submitted_at': time.time()})
+            future = self._executor.submit(ocr_image, bytes(image_data), languages)
+            self._futures[job_id] = future
+
+        future.add_done_callback(lambda done: self._finish(job_id, done, publish))
+        return job_id, future
+
+    def get(self, job_id: str, wait_seconds: float = 0) -> Optional[Dict[str, Any]]:
+        """
+        Get the state of a job, optionally long-polling until it finishes
+
+        Args:
+            job_id: Id returned by submit
+            wait_seconds: Maximum seconds to wait for a pending job to finish
+
+        Returns:
+            Job state with 'status' of queued, running, done or failed, or None if unknown
+        """
+        future = self._futures.get(job_id)
+        if future is not None:
+            if wait_seconds > 0:
+                wait([future], timeout=wait_seconds)
+            if future.done():
+                return self._state_from_future(job_id, future)
+            return {'job_id': job_id, 'status': 'running' if future.running() else 'queued'}
+
+        # Jobs submitted to another web worker are only visible through the job directory
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            state = self._read_state(job_id)
+            if state is None or state['status'] in ('done', 'failed'):
+                return state
+            if time.monotonic() >= deadline:
+                return state
+            time.sleep(0.1)
+
+    def depth(self) -> int:
+        """Number of jobs queued or running in this process"""
+        with self._lock:
+            futures = list(self._futures.values())  # Finished jobs are popped from executor threads
+        return sum(1 for future in futures if not future.done())
+
+    def server_depth(self) -> int:
+        """
+        Number of jobs queued or running in all web workers
+
+        Markers left behind by a web worker that died, taking its OCR
+        processes with it, or older than the result TTL (e.g. from a
+        previous run whose pid was reused) are removed instead of counted.
+        """
+        depth = 0
+        cutoff = time.time() - self.result_ttl
+        try:
+            for entry in os.scandir(self.pending_dir):
+                pid = entry.name.split('.')[-1]
+                if pid.isdigit() and self._is_alive(int(pid)) and entry.stat().st_mtime >= cutoff:
+                    depth += 1
+                else:
+                    self._remove(entry.path)
+        except OSError as e:
+            logging.warning(f"Could not count pending OCR jobs: {str(e)}")
+        return depth
+
+    def shutdown(self):
+        """Stop the worker processes, cancelling jobs that have not started"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _state_from_future(self, job_id: str, future) -> Dict[str, Any]:
+        """Build the state of a finished job from its future"""
+        if future.cancelled():
+            return {'job_id': job_id, 'status': 'failed', 'error': 'Job was cancelled'}
+        error = future.exception()
+        if error is not None:
+            return {'job_id': job_id, 'status': 'failed', 'error': str(error)}
+        result = future.result()
+        return {'job_id': job_id, 'status': 'done', 'extracted_text': result['text'], 'ocr_stats': result['stats']}
+
+    def _finish(self, job_id: str, future, publish: bool = True):
+        """Publish the outcome of a finished job to the job directory"""
+        state = self._state_from_future(job_id, future)
+        if state['status'] == 'failed':
+            logging.error(f"OCR job {job_id} failed: {state['error']}")
+        state['finished_at'] = time.time()
+
+        if state['status'] == 'done':
+            # The OCR process kept its own preprocessing totals; report them in this worker's
+            stats = state['ocr_stats']
+            for frame_stats in stats.get('frame_stats', [stats] if 'ocr_ms' in stats else []):
+                preprocessor.add_to_totals(frame_stats)
+        if publish:
+            self._write_state(job_id, state)
+        self._remove(self._pending_path(job_id))
+        with self._lock:
+            self._futures.pop(job_id, None)
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                # A crashed OCR process breaks the whole pool; start a fresh one on the next submit
+                self._executor = None
+
+    def _pending_path(self, job_id: str) -> str:
+        """Path of the marker counting a job toward the depth limit, tagged with the owning web worker"""
+        return os.path.join(self.pending_dir, f"{job_id}.{os.getpid()}")
+
+    @contextmanager
+    def _shared_lock(self):
+        """Serialize depth checks of all web workers on a lock file in the job directory"""
+        if fcntl is None:
+            yield
+            return
+        with os.fdopen(os.open(os.path.join(self.job_dir, '.lock'), os.O_RDWR | os.O_CREAT, 0o600)) as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @staticmethod
+    def _remove(path: str):
+        """Delete a file that another web worker may have deleted already"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _state_path(self, job_id: str) -> str:
+        """Path of the state file for a job"""
+        return os.path.join(self.job_dir, f"{job_id}.json")
+
+    def _write_state(self, job_id: str, state: Dict[str, Any]):
+        """Atomically replace the shared state of a job, readable only by this user"""
+        path = self._state_path(job_id)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with os.fdopen(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w',
+                       encoding='utf-8') as state_file:
+            json.dump(state, state_file, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _read_state(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read the shared state of a job"""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._state_path(job_id), encoding='utf-8') as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            return None
+
+    def _prune_expired(self):
+        """Delete job states older than the result TTL"""
+        cutoff = time.time() - self.result_ttl
+        try:
+            for entry in os.scandir(self.job_dir):
+                if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+        except OSError as e:
+            logging.warning(f"Could not prune OCR job states: {str(e)}")
@@ -0,0 +1,66 @@
+import os
+import time
+import resource
+from typing import Dict, Optional
+
+# smaps_rollup fields reported, in kB in the file and in bytes here
+MEMORY_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+def memory_usage() -> Dict[str, int]:
+    """
+    Memory of the current process in bytes
+
+    Returns:
+        Dictionary with rss, pss and the shared/private split where the kernel
+        exposes /proc/self/smaps_rollup. Pages a preloaded gunicorn master
+        shares copy-on-write with its workers show up as shared; otherwise
+        only max_rss is available.
+    """
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as rollup:
+            for line in rollup:
+                name, _, value = line.partition(':')
+                if name in MEMORY_FIELDS:
+                    usage[name.lower()] = int(value.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    # ru_maxrss is in kB on Linux
+    usage['max_rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return usage
+
+def process_age() -> Optional[float]:
+    """Seconds since the current process started, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/stat') as stat_file:
+            # The command name may contain spaces, so fields are counted after its closing parenthesis
+            fields = stat_file.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    return max(uptime - started, 0.0)
+
+class StartupTimer:
+    """Record how long the phases of application startup take"""
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.phases = {}
+
+    def mark(self, phase: str):
+        """Record the time since the previous mark under a phase name"""
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self.last) * 1000, 1)
+        self.last = now
+
+    def report(self) -> Dict[str, object]:
+        """Phase durations plus the total and the time since the process started, in ms"""
+        age = process_age()
+        return {
+            'phases_ms': dict(self.phases),
+            'total_ms': round((self.last - self.started) * 1000, 1),
+            'since_process_start_ms': round(age * 1000, 1) if age is not None else None,
+            'pid': os.getpid()
+        }
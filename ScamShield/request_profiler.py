@@ -0,0 +1,188 @@
+import io
+import os
+import hmac
+import json
+import time
+import pstats
+import random
+import cProfile
+import hashlib
+import logging
+import tempfile
+import threading
+from functools import wraps
+from typing import Any, Dict, List, Optional, Union
+from flask import g, make_response, request
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+class RequestProfiler:
+    """Opt-in cProfile capture of single requests, stored by input hash for offline analysis"""
+
+    def __init__(self, directory: Optional[str] = None, sample_rate: float = 0.0, token: Optional[str] = None,
+                 max_profiles: int = 200, store_input: bool = False):
+        """
+        Initialize the profiler
+
+        Args:
+            directory: Where profiles are written
+            sample_rate: Fraction of requests profiled without being asked (0 disables)
+            token: Secret a client sends in the X-Profile-Token header to profile its
+                request and to download profiles (None disables both)
+            max_profiles: Profiles kept before the oldest are deleted
+            store_input: Keep the request input next to the profile; off by default
+                because messages may contain personal data
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'cyberrakshak-profiles')
+        self.sample_rate = sample_rate
+        self.token = token
+        self.max_profiles = max_profiles
+        self.store_input = store_input
+        # cProfile hooks one thread; profiling a single request at a time keeps
+        # profiles independent and bounds the overhead
+        self._active = threading.Lock()
+
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            logging.info(f"RequestProfiler enabled: sample rate {sample_rate}, "
+                         f"header {'on' if token else 'off'}, writing to {self.directory}")
+
+    @classmethod
+    def from_env(cls) -> 'RequestProfiler':
+        """Build a profiler configured through PROFILE_* environment variables"""
+        return cls(
+            directory=os.environ.get('PROFILE_DIR'),
+            sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0.0)),
+            token=os.environ.get('PROFILE_TOKEN') or None,
+            max_profiles=int(os.environ.get('PROFILE_MAX_FILES', 200)),
+            store_input=os.environ.get('PROFILE_STORE_INPUT', 'false').lower() in ('1', 'true', 'yes', 'on')
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any request can be profiled"""
+        return bool(self.token) or self.sample_rate > 0
+
+    def is_authorized(self, supplied: Optional[str]) -> bool:
+        """Check a client-supplied token in constant time"""
+        # compare_digest rejects str with non-ASCII characters, so compare the UTF-8 bytes
+        return bool(self.token) and bool(supplied) and hmac.compare_digest(
+            supplied.encode('utf-8', 'surrogateescape'), self.token.encode('utf-8', 'surrogateescape')
+        )
+
+    def _wants_profile(self) -> bool:
+        """Whether the current request asked for, or was sampled for, profiling"""
+        if self.is_authorized(request.headers.get(PROFILE_HEADER)):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def profile(self, view):
+        """
+        Decorate a Flask view so selected requests run under cProfile
+
+        The view reports what it analyzed through record_input(); the profile
+        is stored under the hash of that input and its id is returned in the
+        X-Profile-Id response header.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or not self._wants_profile() or not self._active.acquire(blocking=False):
+                return view(*args, **kwargs)
+
+            try:
+                g.profile_input = None
+                profiler = cProfile.Profile()
+                started = time.perf_counter()
+                profiler.enable()
+                try:
+                    response = view(*args, **kwargs)
+                finally:
+                    profiler.disable()
+                duration_ms = (time.perf_counter() - started) * 1000
+            finally:
+                self._active.release()
+
+            try:
+                profile_id = self._save(profiler, request.endpoint, duration_ms, g.get('profile_input'))
+            except Exception as e:
+                logging.error(f"Could not store request profile: {str(e)}")
+                return response
+
+            response = make_response(response)
+            response.headers['X-Profile-Id'] = profile_id
+            return response
+        return wrapper
+
+    @staticmethod
+    def record_input(data: Union[str, bytes]):
+        """Note the input of the request being profiled; free when not profiling"""
+        if 'profile_input' in g:
+            g.profile_input = data
+
+    def _save(self, profiler: cProfile.Profile, endpoint: str, duration_ms: float,
+              data: Optional[Union[str, bytes]]) -> str:
+        """Write the profile and its metadata; returns the profile id"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        input_hash = hashlib.sha256(data).hexdigest() if data is not None else 'none'
+        now = time.time()
+        profile_id = (f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}{int(now * 1000) % 1000:03d}"
+                      f"-{endpoint}-{input_hash[:16]}-{os.getpid()}")
+
+        profiler.dump_stats(os.path.join(self.directory, f'{profile_id}.prof'))
+        metadata = {
+            'profile_id': profile_id,
+            'endpoint': endpoint,
+            'input_hash': input_hash,
+            'input_size': len(data) if data is not None else 0,
+            'duration_ms': round(duration_ms, 1),
+            'timestamp': now,
+            'pid': os.getpid()
+        }
+        if self.store_input and data is not None:
+            with open(os.path.join(self.directory, f'{profile_id}.input'), 'wb') as input_file:
+                input_file.write(data)
+        with open(os.path.join(self.directory, f'{profile_id}.json'), 'w') as metadata_file:
+            json.dump(metadata, metadata_file)
+
+        logging.info(f"Stored profile {profile_id} ({duration_ms:.1f}ms)")
+        self._prune()
+        return profile_id
+
+    def _prune(self):
+        """Delete the oldest profiles beyond max_profiles"""
+        profiles = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
+        for profile_id in profiles[:max(len(profiles) - self.max_profiles, 0)]:
+            for extension in ('.json', '.prof', '.input'):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + extension))
+                except FileNotFoundError:
+                    pass
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Metadata of the stored profiles, newest first"""
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.directory, name)) as metadata_file:
+                        metadata = json.load(metadata_file)
+                except (OSError, ValueError):
+                    continue
+                profiles.append(metadata)
+        return profiles
+
+    def profile_path(self, profile_id: str) -> Optional[str]:
+        """Path of a stored profile, or None if the id is unknown or malformed"""
+        if os.path.basename(profile_id) != profile_id or profile_id.startswith('.'):
+            return None
+        path = os.path.join(self.directory, f'{profile_id}.prof')
+        return path if os.path.exists(path) else None
+
+    @staticmethod
+    def summary(path: str, limit: int = 40) -> str:
+        """Text report of the most expensive functions by cumulative time"""
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+class AnalysisCache:
+    """Bounded LRU cache with expiry for text analysis results"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        """
+        Initialize an empty cache
+
+        Args:
+            max_entries: Maximum number of results kept before the least recently used is evicted
+            ttl_seconds: Seconds a result stays valid after it was stored
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._rule_version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        logging.info(f"AnalysisCache initialized with {max_entries} entries, {ttl_seconds}s TTL")
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize a message before hashing
+
+        Only surrounding whitespace is removed: the analyzers are sensitive
+        to everything else (inner spacing, URL case), so folding more would
+        make different messages share a result.
+        """
+        return text.strip()
+
+    @classmethod
+    def make_key(cls, text: str, rule_version: Any) -> str:
+        """Content address of a message under a given rule set version"""
+        payload = f"{rule_version}\0{cls.normalize(text)}".encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, text: str, rule_version: Any) -> Optional[Any]:
+        """
+        Look up the cached result for a message
+
+        Args:
+            text: Message text
+            rule_version: Version of the rules the result must have been computed with
+
+        Returns:
+            Cached result, or None on a miss
+        """
+        key = self.make_key(text, rule_version)
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_rule_version(rule_version)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, text: str, rule_version: Any, value: Any):
+        """Store the result for a message, evicting the least recently used entries"""
+        key = self.make_key(text, rule_version)
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            if self._rule_version is not None and rule_version != self._rule_version:
+                return  # Computed with rules that have since been replaced
+            self._rule_version = rule_version
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, text: str, rule_version: Any, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for a message, computing and storing it on a miss
+
+        Args:
+            text: Message text
+            rule_version: Version of the rules in use
+            compute: Callable producing the result when it is not cached
+
+        Returns:
+            Cached or freshly computed result
+        """
+        value = self.get(text, rule_version)
+        if value is None:
+            value = compute()
+            self.put(text, rule_version, value)
+        return value
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'rule_version': self._rule_version
+            }
+
+    def _check_rule_version(self, rule_version: Any):
+        """Clear the cache when the rules change; caller must hold the lock"""
+        if rule_version != self._rule_version:
+            if self._entries:
+                logging.info(f"Rules changed to version {rule_version}, clearing {len(self._entries)} cached results")
+            self._entries.clear()
+            self._rule_version = rule_version
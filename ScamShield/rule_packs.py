@@ -0,0 +1,307 @@
+import os
+import re
+import json
+import glob
+import hashlib
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from keyword_matcher import KeywordMatcher
+from text_normalizer import detect_scripts, fold_pattern, normalize_text
+
+DEFAULT_RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules')
+
+# Keyword lists a category may define; each is matched literally against the normalized message
+KEYWORD_FIELDS = ('keywords', 'hindi_keywords', 'marathi_keywords', 'bengali_keywords',
+                  'gujarati_keywords', 'tamil_keywords', 'telugu_keywords')
+
+# Regex metacharacters that end the literal prefix of a pattern
+REGEX_METACHARACTERS = set('.^$*+?{}[]\\|()')
+
+# An uppercase letter that is not part of an escape such as \D or \S
+_UPPERCASE_LITERAL = re.compile(r'(?<!\\)[A-Z]')
+
+class RulePackError(ValueError):
+    """A rule pack is missing, malformed or contains an invalid pattern"""
+
+def _trigger_literals(pattern: str) -> List[str]:
+    """
+    Extract the literal strings at least one of which must occur for a pattern to match
+
+    Args:
+        pattern: Regular expression source
+
+    Returns:
+        List of normalized literals, or an empty list if the pattern must always run
+    """
+    if '|' in pattern:
+        # Only split simple top-level alternations; anything nested always runs
+        if '(' in pattern or '[' in pattern or '\\|' in pattern:
+            return []
+        alternatives = pattern.split('|')
+    else:
+        alternatives = [pattern]
+
+    literals = []
+    for alternative in alternatives:
+        literal = []
+        index = 0
+        if alternative.startswith('\\b'):
+            index = 2  # Word boundaries are zero-width
+        while index < len(alternative):
+            char = alternative[index]
+            if char == '\\' and index + 1 < len(alternative) and not alternative[index + 1].isalnum():
+                literal.append(alternative[index + 1])
+                index += 2
+            elif char in REGEX_METACHARACTERS:
+                if char in '*?{' and literal:
+                    literal.pop()  # The previous character is optional
+                break
+            else:
+                literal.append(char)
+                index += 1
+        if not literal:
+            return []
+        literals.append(normalize_text(''.join(literal)))
+    return literals
+
+def _compile_folded(pattern: str) -> re.Pattern:
+    """
+    Compile a rule pattern to run against normalized messages
+
+    The view is already lowercase, so case-insensitive matching is only
+    needed for patterns that spell out an uppercase letter.
+    """
+    folded = fold_pattern(pattern)
+    return re.compile(folded, re.IGNORECASE if _UPPERCASE_LITERAL.search(folded) else 0)
+
+def _build_matcher(literals: List[Tuple[str, Any]]) -> KeywordMatcher:
+    """Compile (literal, payload) pairs into one automaton"""
+    matcher = KeywordMatcher()
+    for literal, payload in literals:
+        matcher.add(literal, payload)
+    return matcher.build()
+
+def _string_list(value: Any, where: str) -> List[str]:
+    """Validate a list of non-empty strings from a rule pack"""
+    if not isinstance(value, list) or not all(isinstance(item, str) and item.strip() for item in value):
+        raise RulePackError(f"{where} must be a list of non-empty strings")
+    return value
+
+def pack_files(directory: str) -> List[str]:
+    """Rule pack files in a directory, in the order they are merged"""
+    return sorted(glob.glob(os.path.join(directory, '*.json')))
+
+def directory_identity(directory: str) -> Tuple:
+    """Values that change whenever a rule pack in the directory is added, removed or replaced"""
+    identity = []
+    for path in pack_files(directory):
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            continue
+        identity.append((os.path.basename(path), stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns))
+    return tuple(identity)
+
+def load_rule_packs(directory: str) -> Dict[str, Any]:
+    """
+    Read and merge the rule packs of a directory
+
+    Packs are merged in file name order. A pack may add categories or extend
+    the keyword and pattern lists of a category defined by an earlier pack;
+    duplicates are dropped. Category order decides ties between equally
+    scored categories, so packs are usually prefixed with a number.
+
+    Args:
+        directory: Directory holding *.json rule packs
+
+    Returns:
+        Dictionary with the merged 'scam_patterns', 'high_risk_indicators'
+        and the 'packs' they came from
+
+    Raises:
+        RulePackError: If there are no packs or one of them is invalid
+    """
+    paths = pack_files(directory)
+    if not paths:
+        raise RulePackError(f"No rule packs found in {directory}")
+
+    scam_patterns = {}
+    high_risk_indicators = []
+    packs = []
+    for path in paths:
+        file_name = os.path.basename(path)
+        try:
+            with open(path, encoding='utf-8') as pack_file:
+                pack = json.load(pack_file)
+        except (OSError, ValueError) as e:
+            raise RulePackError(f"Cannot read rule pack {file_name}: {str(e)}") from e
+        if not isinstance(pack, dict):
+            raise RulePackError(f"Rule pack {file_name} must be a JSON object")
+
+        categories = pack.get('categories', {})
+        if not isinstance(categories, dict):
+            raise RulePackError(f"{file_name}: 'categories' must be an object")
+        for scam_type, rules in categories.items():
+            if not isinstance(rules, dict):
+                raise RulePackError(f"{file_name}: category '{scam_type}' must be an object")
+            merged = scam_patterns.setdefault(scam_type, {'keywords': [], 'hindi_keywords': [], 'patterns': []})
+            for field in KEYWORD_FIELDS + ('patterns',):
+                if field in rules:
+                    merged.setdefault(field, []).extend(
+                        _string_list(rules[field], f"{file_name}: {scam_type}.{field}")
+                    )
+            for pattern in rules.get('patterns', []):
+                try:
+                    re.compile(pattern, re.IGNORECASE)
+                except re.error as e:
+                    raise RulePackError(f"{file_name}: invalid pattern {pattern!r} in {scam_type}: {str(e)}") from e
+
+        high_risk_indicators.extend(_string_list(pack.get('high_risk_indicators', []),
+                                                 f"{file_name}: high_risk_indicators"))
+        packs.append({'name': pack.get('name', file_name[:-5]), 'file': file_name})
+
+    for rules in scam_patterns.values():
+        for field, values in rules.items():
+            rules[field] = list(dict.fromkeys(values))
+    return {
+        'scam_patterns': scam_patterns,
+        'high_risk_indicators': list(dict.fromkeys(high_risk_indicators)),
+        'packs': packs
+    }
+
+class RuleSnapshot:
+    """
+    One immutable, compiled generation of the detection rules
+
+    Analyses read the snapshot once and use it throughout, so a rule change
+    published by swapping in a new snapshot never mixes two rule sets in one
+    result. The version is a digest of the rule content, which makes it the
+    same in every worker process that loaded the same packs.
+    """
+
+    __slots__ = ('version', 'scam_patterns', 'high_risk_indicators', 'categories', 'packs',
+                 'matcher', 'shards', 'shard_scripts', 'patterns', 'untriggered')
+
+    def __init__(self, scam_patterns: Dict[str, Dict[str, List[str]]], high_risk_indicators: List[str],
+                 packs: Optional[List[Dict[str, str]]] = None):
+        """
+        Compile all keywords, risk indicators and regex triggers into one automaton
+
+        Regex patterns are not scanned on their own. Each pattern is gated by
+        the literal it must start with, so it only runs when the automaton has
+        already seen that literal; patterns without a literal always run.
+        Keywords, literals and patterns are folded like the messages they run
+        against, so 'डिपॉज़िट' in a pack also matches 'डिपॉजिट'.
+
+        Besides the automaton over everything, literals are sharded by the
+        Indic script they are written in. Each shard automaton holds the
+        script's literals plus the script-free ones, so a message in one
+        script is scanned once, by an automaton without the other
+        languages; see matcher_for.
+
+        Args:
+            scam_patterns: Keyword lists and patterns per scam category
+            high_risk_indicators: Phrases that add to the confidence of any category
+            packs: Rule packs the rules were loaded from, for reporting
+        """
+        scam_patterns = {
+            scam_type: {field: tuple(values) for field, values in rules.items()}
+            for scam_type, rules in scam_patterns.items()
+        }
+        high_risk_indicators = tuple(high_risk_indicators)
+
+        literals = []
+        patterns = []
+        untriggered = []
+
+        for scam_type, rules in scam_patterns.items():
+            # A keyword listed for two languages is still one piece of evidence
+            keywords = tuple(dict.fromkeys(sum((rules.get(field, ()) for field in KEYWORD_FIELDS), ())))
+            for order, keyword in enumerate(keywords):
+                literals.append((normalize_text(keyword), ('keyword', scam_type, order, keyword)))
+
+            for pattern in rules.get('patterns', ()):
+                pattern_index = len(patterns)
+                patterns.append((scam_type, pattern, _compile_folded(pattern)))
+                triggers = _trigger_literals(pattern)
+                for trigger in triggers:
+                    literals.append((trigger, ('pattern', pattern_index)))
+                if not triggers:
+                    untriggered.append(pattern_index)
+
+        for order, indicator in enumerate(high_risk_indicators):
+            literals.append((normalize_text(indicator), ('risk', None, order, indicator)))
+
+        # A literal needs every script it is written in, so any one of them decides its shard
+        by_script = {}
+        for literal, payload in literals:
+            scripts = detect_scripts(literal)
+            by_script.setdefault(min(scripts) if scripts else None, []).append((literal, payload))
+        common = by_script.pop(None, [])
+        shards = {None: _build_matcher(common)}
+        for script, script_literals in by_script.items():
+            shards[script] = _build_matcher(common + script_literals)
+
+        content = json.dumps([scam_patterns, high_risk_indicators], ensure_ascii=False, sort_keys=True)
+        setter = super().__setattr__
+        setter('version', hashlib.sha256(content.encode('utf-8')).hexdigest()[:12])
+        setter('scam_patterns', scam_patterns)
+        setter('high_risk_indicators', high_risk_indicators)
+        setter('categories', tuple(scam_patterns))
+        setter('packs', tuple(packs or ()))
+        setter('matcher', _build_matcher(literals))
+        setter('shards', shards)
+        setter('shard_scripts', frozenset(by_script))
+        setter('patterns', tuple(patterns))
+        setter('untriggered', tuple(untriggered))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RuleSnapshot is immutable; build a new snapshot instead")
+
+    def matcher_for(self, scripts: FrozenSet[str]) -> KeywordMatcher:
+        """
+        Smallest automaton that finds every literal a message can contain
+
+        Args:
+            scripts: Indic scripts of the message, from its normalized view
+
+        Returns:
+            The script-free shard for messages without a script that has
+            rules, that script's shard for messages in one, and the full
+            automaton for messages mixing several
+        """
+        relevant = scripts & self.shard_scripts
+        if not relevant:
+            return self.shards[None]
+        if len(relevant) == 1:
+            return self.shards[next(iter(relevant))]
+        return self.matcher
+
+    @classmethod
+    def from_directory(cls, directory: str) -> 'RuleSnapshot':
+        """Load and compile the rule packs of a directory"""
+        rules = load_rule_packs(directory)
+        return cls(rules['scam_patterns'], rules['high_risk_indicators'], rules['packs'])
+
+    def with_keywords(self, scam_type: str, keywords: List[str]) -> 'RuleSnapshot':
+        """A new snapshot with extra keywords added to one category"""
+        scam_patterns = {name: {field: list(values) for field, values in rules.items()}
+                         for name, rules in self.scam_patterns.items()}
+        rules = scam_patterns[scam_type]
+        rules['keywords'] = list(dict.fromkeys(rules.get('keywords', []) + list(keywords)))
+        packs = list(self.packs)
+        if {'name': 'custom', 'file': None} not in packs:
+            packs.append({'name': 'custom', 'file': None})
+        return RuleSnapshot(scam_patterns, list(self.high_risk_indicators), packs)
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary of the snapshot for status endpoints"""
+        return {
+            'version': self.version,
+            'packs': list(self.packs),
+            'categories': {
+                scam_type: {field: len(values) for field, values in rules.items()}
+                for scam_type, rules in self.scam_patterns.items()
+            },
+            'high_risk_indicators': len(self.high_risk_indicators),
+            'shards': {script or 'common': matcher.keyword_count for script, matcher in self.shards.items()}
+        }
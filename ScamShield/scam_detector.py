@@ -1,146 +1,297 @@
-import re
+import os
+import sys
+import time
 import logging
-from typing import Dict, List, Any
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Union
+from metrics import time_stage
+from keyword_matcher import KeywordMatcher
+from rule_packs import DEFAULT_RULES_DIR, RulePackError, RuleSnapshot, directory_identity
+from text_normalizer import NormalizedText, normalize
+
+# Characters of earlier turns kept for patterns that span messages
+CONVERSATION_CONTEXT = int(os.environ.get('CONVERSATION_CONTEXT', 256))
+
+class ConversationState:
+    """
+    Running rule evidence of one conversation
+    
+    Holds the matcher state at the end of the last turn, a short tail of the
+    conversation for regex patterns, and the keywords, patterns and risk
+    indicators found so far. The rules the conversation started with are
+    kept for its whole life, so evidence from different rule versions is
+    never mixed.
+    """
+    
+    __slots__ = ('snapshot', 'matcher_state', 'context', 'length', 'pending', 'keyword_hits',
+                 'pattern_hits', 'risk_hits', 'model_score', 'turns', 'is_scam')
+    
+    # Rough bytes for the object, its containers and one piece of evidence
+    BASE_SIZE = 1024
+    HIT_SIZE = 128
+    
+    def __init__(self, snapshot: RuleSnapshot):
+        self.snapshot = snapshot
+        self.matcher_state = 0
+        self.context = ''
+        self.length = 0  # Characters scanned so far, separators included
+        self.pending = {}  # Triggered, still unmatched patterns by trigger position
+        self.keyword_hits = {}
+        self.pattern_hits = {}
+        self.risk_hits = set()
+        self.model_score = None
+        self.turns = 0
+        self.is_scam = False  # Verdict after the last turn
+    
+    def memory_size(self) -> int:
+        """Estimated bytes held by this conversation; the shared rule snapshot is not counted"""
+        hits = (sum(len(hits) for hits in self.keyword_hits.values())
+                + sum(len(hits) for hits in self.pattern_hits.values())
+                + len(self.risk_hits) + len(self.pending))
+        return self.BASE_SIZE + sys.getsizeof(self.context) + hits * self.HIT_SIZE
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON-serializable copy of the evidence, restored by ScamDetector.resume_conversation
+        
+        The matcher state and pattern indexes only mean something for the
+        same rules, so the rule version is saved with them.
+        """
+        return {
+            'rules': self.snapshot.version,
+            'matcher_state': self.matcher_state,
+            'context': self.context,
+            'length': self.length,
+            'pending': sorted(self.pending.items()),
+            'keyword_hits': {scam_type: sorted(hits) for scam_type, hits in self.keyword_hits.items()},
+            'pattern_hits': {scam_type: sorted(hits) for scam_type, hits in self.pattern_hits.items()},
+            'risk_hits': sorted(self.risk_hits),
+            'model_score': self.model_score,
+            'turns': self.turns,
+            'is_scam': self.is_scam
+        }
 
 class ScamDetector:
     """Keyword-based scam detection system"""
     
-    def __init__(self):
-        """Initialize scam detection patterns"""
-        self.scam_patterns = {
-            'upi_fraud': {
-                'keywords': [
-                    'send money', 'urgent payment', 'refund', 'verify account',
-                    'otp', 'upi pin', 'bank details', 'account blocked',
-                    'immediate action', 'suspicious activity', 'verify identity',
-                    'paytm', 'phonepe', 'googlepay', 'gpay', 'bhim',
-                    'transaction failed', 'payment pending', 'kyd', 'kyc',
-                    'reward points', 'cashback', 'scratch card'
-                ],
-                'hindi_keywords': [
-                    'पैसे भेजें', 'तुरंत भुगतान', 'वापसी', 'खाता सत्यापित',
-                    'ओटीपी', 'यूपीआई पिन', 'बैंक विवरण', 'खाता बंद',
-                    'तत्काल कार्रवाई', 'संदिग्ध गतिविधि'
-                ],
-                'patterns': [
-                    r'\b\d{6}\b',  # 6-digit OTP pattern
-                    r'upi.*pin',
-                    r'account.*block',
-                    r'verify.*otp'
-                ]
-            },
-            'phishing': {
-                'keywords': [
-                    'click here', 'verify now', 'update details', 'suspend account',
-                    'confirm identity', 'security alert', 'unauthorized access',
-                    'act now', 'limited time', 'expires today', 'login failed',
-                    'security breach', 'account compromised', 'verify email',
-                    'reset password', 'billing information', 'payment method'
-                ],
-                'hindi_keywords': [
-                    'यहाँ क्लिक करें', 'अभी सत्यापित करें', 'विवरण अपडेट करें',
-                    'खाता स्थगित', 'पहचान की पुष्टि', 'सुरक्षा चेतावनी'
-                ],
-                'patterns': [
-                    r'https?://[^\s]+',  # Suspicious URLs
-                    r'bit\.ly|tinyurl|short',
-                    r'click.*here',
-                    r'verify.*account'
-                ]
-            },
-            'job_scam': {
-                'keywords': [
-                    'work from home', 'easy money', 'no experience required',
-                    'registration fee', 'security deposit', 'processing fee',
-                    'guaranteed income', 'part time job', 'copy paste work',
-                    'data entry', 'form filling', 'survey work', 'typing work',
-                    'advance payment', 'training fee', 'kit charges'
-                ],
-                'hindi_keywords': [
-                    'घर से काम', 'आसान पैसा', 'अनुभव की आवश्यकता नहीं',
-                    'पंजीकरण फीस', 'सिक्योरिटी डिपॉजिट', 'प्रसंस्करण शुल्क'
-                ],
-                'patterns': [
-                    r'earn.*\d+.*day',
-                    r'registration.*fee',
-                    r'work.*home',
-                    r'easy.*money'
-                ]
-            },
-            'lottery_scam': {
-                'keywords': [
-                    'lottery winner', 'congratulations', 'won prize', 'claim reward',
-                    'lucky draw', 'selected winner', 'cash prize', 'lottery ticket',
-                    'processing charges', 'tax payment', 'courier charges',
-                    'delivery fee', 'insurance premium'
-                ],
-                'hindi_keywords': [
-                    'लॉटरी विजेता', 'बधाई', 'पुरस्कार जीता', 'इनाम दावा',
-                    'भाग्यशाली ड्रा', 'चुने गए विजेता'
-                ],
-                'patterns': [
-                    r'won.*prize',
-                    r'lottery.*winner',
-                    r'congratulations.*selected'
-                ]
-            }
-        }
+    def __init__(self, rules_dir: str = None, check_interval: float = None,
+                 model_path: str = None, model_weight: float = None):
+        """
+        Load and compile the scam rules
         
-        # High-risk indicators
-        self.high_risk_indicators = [
-            'urgent', 'immediately', 'expire', 'suspend', 'block', 'freeze',
-            'unauthorized', 'suspicious', 'security', 'verify', 'confirm',
-            'act now', 'limited time', 'don\'t delay', 'final notice'
-        ]
+        Args:
+            rules_dir: Directory of JSON rule packs (RULES_DIR, the bundled
+                rules/ directory by default)
+            check_interval: Seconds between checks for changed rule packs
+                (RULES_CHECK_INTERVAL, 5 by default; 0 disables reloading)
+            model_path: Directory of an n-gram model trained with
+                statistical_model.py (STATISTICAL_MODEL_PATH; keyword rules only if unset)
+            model_weight: Share of the model in the blended confidence
+                (STATISTICAL_MODEL_WEIGHT, 0.5 by default)
+        """
+        self.rules_dir = rules_dir or os.environ.get('RULES_DIR') or DEFAULT_RULES_DIR
+        if check_interval is None:
+            check_interval = float(os.environ.get('RULES_CHECK_INTERVAL', 5))
+        self.check_interval = check_interval
         
-        logging.info("ScamDetector initialized with keyword patterns")
+        # Keywords added at runtime, kept so they survive reloads of the packs
+        self._custom_keywords = {}
+        self._reload_lock = threading.Lock()
+        self._identity = directory_identity(self.rules_dir)
+        self._snapshot = RuleSnapshot.from_directory(self.rules_dir)
+        self._next_check = time.monotonic() + check_interval
+        logging.info(f"ScamDetector loaded rule version {self._snapshot.version} from {self.rules_dir}")
+        
+        # Optional second stage; NumPy is only imported when a model is configured
+        self.model = None
+        self.model_weight = model_weight if model_weight is not None else float(
+            os.environ.get('STATISTICAL_MODEL_WEIGHT', 0.5)
+        )
+        model_path = model_path or os.environ.get('STATISTICAL_MODEL_PATH')
+        if model_path:
+            try:
+                from statistical_model import NGramModel
+                self.model = NGramModel(model_path)
+                logging.info(f"ScamDetector blending n-gram model {self.model.version} at weight {self.model_weight}")
+            except (RuntimeError, ValueError) as e:
+                logging.error(f"Statistical model unavailable, using keyword rules only: {str(e)}")
+    
+    @property
+    def snapshot(self) -> RuleSnapshot:
+        """Current compiled rules; read it once and use it for a whole analysis"""
+        self._maybe_reload()
+        return self._snapshot
+    
+    @property
+    def rule_version(self) -> str:
+        """Content digest of the current rules, identical across workers with the same packs"""
+        return self._version(self.snapshot)
+    
+    def _version(self, snapshot: RuleSnapshot) -> str:
+        """Version of the rules plus, when one is loaded, the statistical model"""
+        if self.model is None:
+            return snapshot.version
+        return f"{snapshot.version}+{self.model.version}"
+    
+    @property
+    def scam_patterns(self) -> Dict[str, Dict[str, Any]]:
+        """Keyword lists and patterns per scam category"""
+        return self.snapshot.scam_patterns
     
-    def analyze_text(self, text: str) -> Dict[str, Any]:
+    @property
+    def high_risk_indicators(self) -> List[str]:
+        """Phrases that add to the confidence of any category"""
+        return list(self.snapshot.high_risk_indicators)
+    
+    def analyze_text(self, text: Union[str, NormalizedText]) -> Dict[str, Any]:
         """
         Analyze text for scam indicators
         
         Args:
-            text: Text to analyze
+            text: Text to analyze, or its normalized view if the caller already built one
             
         Returns:
             Dictionary with analysis results
         """
+        with time_stage('scam_detector'):
+            view = normalize(text)
+            result = self._analyze(view, self.snapshot, self._model_scores([view])[0])
+        logging.info("Scam analysis result: %s", result, extra={'event': 'scam_analysis'})
+        return result
+    
+    def analyze_batch(self, texts: List[Union[str, NormalizedText]]) -> List[Dict[str, Any]]:
+        """
+        Analyze many texts for scam indicators in one call
+        
+        The rule snapshot is fetched once for the whole batch, so a batch
+        never mixes results from two rule sets, and repeated texts within
+        the batch are only analyzed once. The statistical model, if any,
+        scores all distinct texts in one vectorized call.
+        
+        Args:
+            texts: Texts to analyze, or their normalized views
+            
+        Returns:
+            List of analysis results, in the same order and shape as analyze_text
+        """
+        snapshot = self.snapshot
+        seen = {}
+        
+        with time_stage('scam_detector_batch'):
+            views = [normalize(text) for text in texts]
+            unique_views = list({view.original: view for view in views}.values())
+            model_scores = self._model_scores(unique_views)
+            for view, model_score in zip(unique_views, model_scores):
+                seen[view.original] = self._analyze(view, snapshot, model_score)
+            results = [seen[view.original] for view in views]
+        
+        logging.info("Scam batch analysis: %d texts, %d unique", len(results), len(seen),
+                     extra={'event': 'scam_batch_analysis'})
+        return results
+    
+    def _model_scores(self, texts: List[NormalizedText]) -> List[Any]:
+        """
+        Score texts with the statistical model in one vectorized batch
+        
+        Returns:
+            (scam probability, scam type) per text, or None for every text
+            when no model is loaded or scoring fails
+        """
+        if self.model is None or not texts:
+            return [None] * len(texts)
+        try:
+            with time_stage('statistical_model'):
+                return self.model.score(texts)
+        except Exception as e:
+            logging.error(f"Statistical model scoring failed: {str(e)}")
+            return [None] * len(texts)
+    
+    def _analyze(self, view: NormalizedText, snapshot: RuleSnapshot, model_score: Any = None) -> Dict[str, Any]:
+        """Score a normalized message against one rule snapshot, blending in the model score if there is one"""
+        text = view.text
         if not text or not text.strip():
             return {
                 'is_scam': False,
                 'scam_type': 'none',
                 'confidence': 0.0,
-                'keywords_found': []
+                'keywords_found': [],
+                'rule_version': self._version(snapshot)
             }
         
-        text_lower = text.lower()
+        keyword_hits, pattern_hits, risk_hits, _, _ = self._match(snapshot, text,
+                                                                  matcher=snapshot.matcher_for(view.scripts))
+        return self._score(snapshot, keyword_hits, pattern_hits, risk_hits, model_score)
+    
+    @staticmethod
+    def _match(snapshot: RuleSnapshot, text: str, state: int = 0, context: str = '',
+               pending: Dict[int, int] = None,
+               matcher: KeywordMatcher = None) -> Tuple[Dict[str, set], Dict[str, set], set, int, Dict[int, int]]:
+        """
+        Collect the rule evidence in one stretch of normalized text
+        
+        Args:
+            snapshot: Rules to match
+            text: Normalized text to scan
+            state: Matcher state to resume from, so keywords may begin before text
+            context: Text just before text, searched by patterns whose trigger
+                begins in it
+            pending: Patterns triggered earlier but not yet matched, by trigger
+                position relative to the start of text (negative inside context)
+            matcher: Automaton to scan with, a shard for the scripts of text
+                (the full automaton if None; matcher states are only
+                meaningful for the automaton that produced them)
+        
+        Returns:
+            Tuple of (keywords per category, pattern indexes per category,
+            risk indicators, final matcher state, patterns still unmatched
+            by trigger position relative to the start of text)
+        """
+        # Single pass over the message; scores are built from the match events
+        matches, state = (matcher or snapshot.matcher).scan(text, state)
+        keyword_hits = {}
+        risk_hits = set()
+        pattern_starts = dict(pending) if pending else {}
+        for start, payload in matches:
+            kind = payload[0]
+            if kind == 'keyword':
+                keyword_hits.setdefault(payload[1], set()).add(payload[2:])
+            elif kind == 'pattern':
+                pattern_starts[payload[1]] = min(start, pattern_starts.get(payload[1], start))
+            else:
+                risk_hits.add(payload[2:])
+        
+        # Verify regex patterns whose trigger literal was seen
+        if context:
+            text = context + text
+        pattern_hits = {}
+        unmatched = {}
+        for pattern_index in snapshot.untriggered:
+            pattern_starts.setdefault(pattern_index, -len(context))
+        for pattern_index in sorted(pattern_starts):
+            scam_type, _, regex = snapshot.patterns[pattern_index]
+            start = pattern_starts[pattern_index]
+            if regex.search(text, max(start + len(context), 0)):
+                pattern_hits.setdefault(scam_type, set()).add(pattern_index)
+            elif pattern_index not in snapshot.untriggered:
+                unmatched[pattern_index] = start
+        return keyword_hits, pattern_hits, risk_hits, state, unmatched
+    
+    def _score(self, snapshot: RuleSnapshot, keyword_hits: Dict[str, set], pattern_hits: Dict[str, set],
+               risk_hits: set, model_score: Any = None) -> Dict[str, Any]:
+        """Turn the rule evidence of a message or conversation into a verdict"""
         total_score = 0
         max_category_score = 0
         detected_scam_type = 'none'
         all_keywords_found = []
         
-        # Check each scam category
-        for scam_type, patterns in self.scam_patterns.items():
-            category_score = 0
-            category_keywords = []
+        # Score each scam category
+        for scam_type in snapshot.categories:
+            category_keywords = [keyword for _, keyword in sorted(keyword_hits.get(scam_type, ()))]
+            category_score = len(category_keywords)
             
-            # Check English keywords
-            for keyword in patterns['keywords']:
-                if keyword.lower() in text_lower:
-                    category_score += 1
-                    category_keywords.append(keyword)
-            
-            # Check Hindi keywords
-            for keyword in patterns.get('hindi_keywords', []):
-                if keyword in text:
-                    category_score += 1
-                    category_keywords.append(keyword)
-            
-            # Check regex patterns
-            for pattern in patterns.get('patterns', []):
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    category_score += 2  # Patterns get higher weight
-                    category_keywords.append(f"Pattern: {pattern}")
+            for pattern_index in sorted(pattern_hits.get(scam_type, ())):
+                category_score += 2  # Patterns get higher weight
+                category_keywords.append(f"Pattern: {snapshot.patterns[pattern_index][1]}")
             
             # Update maximum category
             if category_score > max_category_score:
@@ -150,15 +301,19 @@ class ScamDetector:
             
             total_score += category_score
         
-        # Check high-risk indicators
+        # Apply high-risk indicators
         risk_bonus = 0
-        for indicator in self.high_risk_indicators:
-            if indicator.lower() in text_lower:
-                risk_bonus += 0.5
-                all_keywords_found.append(f"Risk: {indicator}")
+        for _, indicator in sorted(risk_hits):
+            risk_bonus += 0.5
+            all_keywords_found.append(f"Risk: {indicator}")
         
         # Calculate confidence
         confidence = min((total_score + risk_bonus) / 10.0, 1.0)
+        if model_score is not None:
+            model_probability, model_scam_type = model_score
+            confidence = (1 - self.model_weight) * confidence + self.model_weight * model_probability
+            if detected_scam_type == 'none':
+                detected_scam_type = model_scam_type
         
         # Determine if it's a scam
         is_scam = confidence > 0.3 or max_category_score >= 2
@@ -167,18 +322,202 @@ class ScamDetector:
             'is_scam': is_scam,
             'scam_type': detected_scam_type if is_scam else 'none',
             'confidence': round(confidence, 2),
-            'keywords_found': all_keywords_found[:10]  # Limit to top 10
+            'keywords_found': all_keywords_found[:10],  # Limit to top 10
+            'rule_version': self._version(snapshot)
         }
+        if model_score is not None:
+            result['model_score'] = round(model_probability, 3)
         
-        logging.info(f"Scam analysis result: {result}")
+        return result
+    
+    def start_conversation(self) -> 'ConversationState':
+        """Empty evidence for a new conversation, scored against the current rules"""
+        return ConversationState(self.snapshot)
+    
+    def resume_conversation(self, saved: Dict[str, Any]) -> Optional['ConversationState']:
+        """
+        Rebuild a conversation from ConversationState.to_dict
+        
+        Lets another worker process continue a conversation. Saved state
+        reaches the server through clients, so it is checked against the
+        current rules before use.
+        
+        Args:
+            saved: Dictionary returned by to_dict
+        
+        Returns:
+            The conversation, or None if it was saved under other rules or is malformed
+        """
+        snapshot = self.snapshot
+        if not isinstance(saved, dict) or saved.get('rules') != snapshot.version:
+            return None
+        
+        def evidence(values):
+            hits = {tuple(value) for value in values}
+            if not all(len(hit) == 2 and isinstance(hit[0], int) and isinstance(hit[1], str) for hit in hits):
+                raise ValueError("Malformed evidence")
+            return hits
+        
+        def pattern_indexes(values):
+            if not all(isinstance(index, int) and 0 <= index < len(snapshot.patterns) for index in values):
+                raise ValueError("Unknown pattern")
+            return set(values)
+        
+        try:
+            conversation = ConversationState(snapshot)
+            matcher_state = saved['matcher_state']
+            if not isinstance(matcher_state, int) or not 0 <= matcher_state < snapshot.matcher.state_count:
+                raise ValueError("Unknown matcher state")
+            conversation.matcher_state = matcher_state
+            conversation.context = str(saved['context'])[-CONVERSATION_CONTEXT:]
+            conversation.length = int(saved['length'])
+            conversation.pending = {index: int(start) for index, start in saved['pending']}
+            pattern_indexes(conversation.pending)
+            categories = set(snapshot.categories)
+            if not set(saved['keyword_hits']) <= categories or not set(saved['pattern_hits']) <= categories:
+                raise ValueError("Unknown scam type")
+            conversation.keyword_hits = {scam_type: evidence(hits) for scam_type, hits in saved['keyword_hits'].items()}
+            conversation.pattern_hits = {
+                scam_type: pattern_indexes(hits) for scam_type, hits in saved['pattern_hits'].items()
+            }
+            conversation.risk_hits = evidence(saved['risk_hits'])
+            if saved['model_score'] is not None:
+                probability, scam_type = saved['model_score']
+                conversation.model_score = (float(probability), str(scam_type))
+            conversation.turns = int(saved['turns'])
+            conversation.is_scam = bool(saved['is_scam'])
+        except (KeyError, TypeError, ValueError) as e:
+            logging.warning(f"Ignoring malformed conversation state: {str(e)}")
+            return None
+        return conversation
+    
+    def analyze_turn(self, conversation: 'ConversationState', text: Union[str, NormalizedText]) -> Dict[str, Any]:
+        """
+        Add one message to a conversation and score the conversation so far
+        
+        Only the new message is scanned: the matcher resumes from the state
+        the previous message left it in, and patterns get a short window of
+        the earlier text, so a turn costs time proportional to its own
+        length while keywords, patterns and risk indicators spread over
+        several turns still add up. The statistical model scores each turn
+        on its own and the conversation keeps the highest score.
+        
+        Args:
+            conversation: State from start_conversation, updated in place;
+                the caller serializes turns of one conversation
+            text: The new message, or its normalized view
+        
+        Returns:
+            Dictionary shaped like analyze_text plus the number of 'turns' and
+            'became_scam', True on the turn the verdict first flips to scam
+        """
+        view = normalize(text)
+        snapshot = conversation.snapshot
+        with time_stage('scam_detector_turn'):
+            if view.text.strip():
+                # Turns are joined by a space, so a phrase split across two messages still matches
+                chunk = ' ' + view.text if conversation.turns else view.text
+                pending = {index: start - conversation.length for index, start in conversation.pending.items()}
+                keyword_hits, pattern_hits, risk_hits, state, unmatched = self._match(
+                    snapshot, chunk, conversation.matcher_state, conversation.context, pending
+                )
+                for scam_type, hits in keyword_hits.items():
+                    conversation.keyword_hits.setdefault(scam_type, set()).update(hits)
+                for scam_type, hits in pattern_hits.items():
+                    conversation.pattern_hits.setdefault(scam_type, set()).update(hits)
+                conversation.risk_hits.update(risk_hits)
+                conversation.matcher_state = state
+                
+                # Triggers that slide out of the context window can no longer match
+                context = (conversation.context + chunk)[-CONVERSATION_CONTEXT:]
+                conversation.pending = {
+                    index: conversation.length + start for index, start in unmatched.items()
+                    if start >= len(chunk) - len(context)
+                }
+                conversation.context = context
+                conversation.length += len(chunk)
+                
+                model_score = self._model_scores([view])[0]
+                if model_score is not None and (conversation.model_score is None
+                                                or model_score[0] > conversation.model_score[0]):
+                    conversation.model_score = model_score
+            conversation.turns += 1
+            
+            result = self._score(snapshot, conversation.keyword_hits, conversation.pattern_hits,
+                                 conversation.risk_hits, conversation.model_score)
+            result['turns'] = conversation.turns
+            result['became_scam'] = result['is_scam'] and not conversation.is_scam
+            conversation.is_scam = result['is_scam']
+        
+        logging.info("Conversation turn %d result: %s", conversation.turns, result,
+                     extra={'event': 'scam_conversation_turn'})
         return result
     
     def get_scam_types(self) -> List[str]:
         """Get list of supported scam types"""
-        return list(self.scam_patterns.keys())
+        return list(self.snapshot.categories)
     
     def add_custom_keywords(self, scam_type: str, keywords: List[str]):
-        """Add custom keywords to a scam type"""
-        if scam_type in self.scam_patterns:
-            self.scam_patterns[scam_type]['keywords'].extend(keywords)
-            logging.info(f"Added {len(keywords)} keywords to {scam_type}")
+        """
+        Add custom keywords to a scam type in this process
+        
+        A new snapshot is compiled and swapped in; the keywords are re-applied
+        whenever the rule packs are reloaded. To change the rules of every
+        worker, edit the rule packs instead.
+        """
+        with self._reload_lock:
+            if scam_type not in self._snapshot.scam_patterns:
+                return
+            self._custom_keywords.setdefault(scam_type, []).extend(keywords)
+            self._snapshot = self._snapshot.with_keywords(scam_type, keywords)
+        logging.info(f"Added {len(keywords)} keywords to {scam_type}, rule version {self._snapshot.version}")
+    
+    def reload(self) -> bool:
+        """
+        Load and compile the rule packs now, swapping in the new snapshot
+        
+        Returns:
+            True if the rules changed
+        
+        Raises:
+            RulePackError: If a pack is invalid; the current rules stay in place
+        """
+        with self._reload_lock:
+            return self._reload()
+    
+    def _reload(self) -> bool:
+        """Build a snapshot from the packs plus the custom keywords; caller holds the reload lock"""
+        identity = directory_identity(self.rules_dir)
+        snapshot = RuleSnapshot.from_directory(self.rules_dir)
+        for scam_type, keywords in self._custom_keywords.items():
+            if scam_type in snapshot.scam_patterns:
+                snapshot = snapshot.with_keywords(scam_type, keywords)
+        self._identity = identity
+        if snapshot.version == self._snapshot.version:
+            return False
+        # Analyses already holding the old snapshot finish with it
+        self._snapshot = snapshot
+        logging.info(f"ScamDetector reloaded rules from {self.rules_dir}: version {snapshot.version}")
+        return True
+    
+    def _maybe_reload(self):
+        """Pick up changed rule packs; analyses never wait on this"""
+        now = time.monotonic()
+        if self.check_interval <= 0 or now < self._next_check or not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = now + self.check_interval
+            identity = directory_identity(self.rules_dir)
+            if identity != self._identity:
+                try:
+                    self._reload()
+                except RulePackError:
+                    # Not retried until the packs change again
+                    self._identity = identity
+                    raise
+        except RulePackError as e:
+            logging.error(f"Rule pack reload failed, keeping rule version {self._snapshot.version}: {str(e)}")
+        except Exception as e:
+            logging.error(f"Rule reload failed, keeping rule version {self._snapshot.version}: {str(e)}")
+        finally:
+            self._reload_lock.release()
@@ -7,6 +7,8 @@ class CyberRakshakChatbot {
         this.chatInput = document.getElementById('chat-input');
         this.sendButton = document.getElementById('send-button');
         this.speechSynthesis = window.speechSynthesis;
+        this.sessionId = null;  // Conversation id issued by the server
+        this.sessionToken = null;  // Signed conversation state, lets any server worker continue it
         
         this.init();
     }
@@ -82,7 +84,9 @@ class CyberRakshakChatbot {
                 },
                 body: JSON.stringify({
                     query: message,
-                    language: this.currentLanguage
+                    language: this.currentLanguage,
+                    session_id: this.sessionId,
+                    session_token: this.sessionToken
                 })
             });
 
@@ -92,6 +96,9 @@ class CyberRakshakChatbot {
             this.hideTypingIndicator();
             
             if (result.success) {
+                this.sessionId = result.session_id;
+                this.sessionToken = result.session_token;
+                
                 // Add bot response
                 this.addMessage(result.response, 'bot');
                 
@@ -206,8 +213,8 @@ class CyberRakshakChatbot {
         utterance.volume = 0.7;
 
         // Set language
-        if (this.currentLanguage === 'hi') {
-            utterance.lang = 'hi-IN';
+        if (this.currentLanguage && this.currentLanguage !== 'en') {
+            utterance.lang = `${this.currentLanguage}-IN`;
         } else {
             utterance.lang = 'en-US';
         }
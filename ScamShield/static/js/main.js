@@ -412,8 +412,8 @@ class CyberRakshakApp {
         utterance.volume = 0.8;
 
         // Set language
-        if (this.currentLanguage === 'hi') {
-            utterance.lang = 'hi-IN';
+        if (this.currentLanguage && this.currentLanguage !== 'en') {
+            utterance.lang = `${this.currentLanguage}-IN`;
         } else {
             utterance.lang = 'en-US';
         }
@@ -0,0 +1,382 @@
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from text_normalizer import NormalizedText, normalize
+
+try:
+    import numpy as np
+except ImportError:  # Optional: without NumPy the detector runs on keyword evidence alone
+    np = None
+
+NEGATIVE_LABEL = 'none'  # Label of legitimate messages
+METADATA_FILE = 'model.json'
+WEIGHTS_FILE = 'weights.npy'
+FORMAT_VERSION = 1
+
+DEFAULT_FEATURE_BITS = 18
+DEFAULT_NGRAM_RANGE = (3, 5)
+
+# Multiplier of the polynomial rolling hash over code points (the 64-bit FNV
+# prime) and the golden-ratio multiplier folding it into the feature space
+ROLLING_MULTIPLIER = 0x100000001B3
+MIXING_MULTIPLIER = 0x9E3779B97F4A7C15
+
+def require_numpy():
+    """Raise a clear error where the statistical stage is used without NumPy"""
+    if np is None:
+        raise RuntimeError("The statistical model needs NumPy: pip install numpy")
+
+class NGramHasher:
+    """
+    Hash the character n-grams of a whole batch of texts in one vectorized pass
+
+    Texts are normalized the way the keyword rules see them, padded with a
+    space on each side and joined by a separator. Rolling hashes for every position are computed with NumPy,
+    n-grams that would span a separator are dropped, and the rest are folded
+    into 2**feature_bits buckets. Hashes depend only on the code points, so
+    features are identical across processes, platforms and Python versions.
+    """
+
+    def __init__(self, feature_bits: int = DEFAULT_FEATURE_BITS, ngram_range: Tuple[int, int] = DEFAULT_NGRAM_RANGE):
+        """
+        Args:
+            feature_bits: log2 of the number of feature buckets
+            ngram_range: Smallest and largest n-gram length, in characters
+        """
+        require_numpy()
+        self.feature_bits = feature_bits
+        self.n_features = 1 << feature_bits
+        self.ngram_range = tuple(ngram_range)
+
+    def transform(self, texts: Sequence[Union[str, NormalizedText]]) -> Tuple[Any, Any, Any]:
+        """
+        Vectorize texts as a sparse matrix in coordinate form
+
+        Every n-gram occurrence is one entry valued 1/sqrt(n-grams in its
+        text), so repeated n-grams add up and long texts do not dominate.
+
+        Args:
+            texts: Texts to vectorize, or their normalized views
+
+        Returns:
+            Tuple of (row, feature, value) arrays of equal length
+        """
+        padded = '\0'.join(f" {normalize(text).text.replace(chr(0), ' ')} " for text in texts) + '\0'
+        codes = np.frombuffer(padded.encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+        # separators[i] counts separators in codes[:i], which is also the row of position i
+        separators = np.concatenate(([0], np.cumsum(codes == 0)))
+
+        min_n, max_n = self.ngram_range
+        shift = np.uint64(64 - self.feature_bits)
+        rows, features = [], []
+        hashes = np.zeros(len(codes), dtype=np.uint64)
+        # Array arithmetic on uint64 wraps around silently, which the hashes rely on
+        for n in range(1, max_n + 1):
+            # hashes[i] becomes the hash of codes[i:i + n]
+            count = len(codes) - n + 1
+            if count <= 0:
+                break
+            hashes = hashes[:count] * np.uint64(ROLLING_MULTIPLIER) + codes[n - 1:n - 1 + count]
+            if n < min_n:
+                continue
+            starts = np.flatnonzero(separators[n:n + count] == separators[:count])
+            rows.append(separators[starts])
+            mixed = (hashes[starts] ^ np.uint64(n)) * np.uint64(MIXING_MULTIPLIER)
+            features.append((mixed >> shift).astype(np.int64))
+
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        features = np.concatenate(features) if features else np.zeros(0, dtype=np.int64)
+        lengths = np.bincount(rows, minlength=len(texts))
+        values = (1.0 / np.sqrt(np.maximum(lengths, 1)))[rows].astype(np.float32)
+        return rows, features, values
+
+def _linear_scores(weights, bias, rows, features, values, n_rows: int):
+    """Logits of a sparse batch: one gather of weight rows, one sum per class"""
+    contributions = np.asarray(weights[features], dtype=np.float32) * values[:, None]
+    logits = np.empty((n_rows, weights.shape[1]), dtype=np.float64)
+    for column in range(weights.shape[1]):
+        logits[:, column] = np.bincount(rows, weights=contributions[:, column], minlength=n_rows)
+    return logits + bias
+
+def _softmax(logits):
+    """Row-wise softmax"""
+    exponentials = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exponentials / exponentials.sum(axis=1, keepdims=True)
+
+class NGramModel:
+    """
+    Multinomial logistic regression over hashed character n-grams
+
+    The metadata is read when the model is opened; the weight matrix is
+    memory-mapped on first use, so idle processes never touch it and all
+    processes on a host share the same page-cache copy.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a model saved by save_model
+
+        Args:
+            path: Model directory holding model.json and weights.npy
+
+        Raises:
+            RuntimeError: If NumPy is not installed
+            ValueError: If the metadata is missing or from another format version
+        """
+        require_numpy()
+        self.path = path
+        try:
+            with open(os.path.join(path, METADATA_FILE)) as metadata_file:
+                self.metadata = json.load(metadata_file)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read model metadata in {path}: {str(e)}") from e
+        if self.metadata.get('format') != FORMAT_VERSION:
+            raise ValueError(f"{path} holds a model of format {self.metadata.get('format')}, expected {FORMAT_VERSION}")
+
+        self.version = self.metadata['version']
+        self.classes = list(self.metadata['classes'])
+        self.hasher = NGramHasher(self.metadata['feature_bits'], self.metadata['ngram_range'])
+        self._bias = np.asarray(self.metadata['bias'], dtype=np.float64)
+        self._negative = self.classes.index(NEGATIVE_LABEL)
+        self._weights = None
+        self._lock = threading.Lock()
+
+    @property
+    def weights(self):
+        """Weight matrix of shape (features, classes), mapped read-only on first use"""
+        if self._weights is None:
+            with self._lock:
+                if self._weights is None:
+                    weights = np.load(os.path.join(self.path, WEIGHTS_FILE), mmap_mode='r')
+                    if weights.shape != (self.hasher.n_features, len(self.classes)):
+                        raise ValueError(f"Weights in {self.path} have shape {weights.shape}, "
+                                         f"expected {(self.hasher.n_features, len(self.classes))}")
+                    # A plain ndarray view of the map skips np.memmap's per-index bookkeeping
+                    self._weights = weights.view(np.ndarray)
+                    logging.info(f"Mapped n-gram model {self.version} from {self.path}")
+        return self._weights
+
+    def predict_proba(self, texts: Sequence[Union[str, NormalizedText]]):
+        """
+        Class probabilities for a batch of texts
+
+        Returns:
+            Array of shape (len(texts), len(classes))
+        """
+        rows, features, values = self.hasher.transform(texts)
+        return _softmax(_linear_scores(self.weights, self._bias, rows, features, values, len(texts)))
+
+    def score(self, texts: Sequence[Union[str, NormalizedText]]) -> List[Tuple[float, str]]:
+        """
+        Scam probability and most likely scam type of each text
+
+        Returns:
+            List of (probability the text is not legitimate, scam class with
+            the highest probability) tuples
+        """
+        if not texts:
+            return []
+        probabilities = self.predict_proba(texts)
+        scam_probabilities = 1.0 - probabilities[:, self._negative]
+        probabilities[:, self._negative] = -1.0
+        best = probabilities.argmax(axis=1)
+        return [(float(probability), self.classes[index]) for probability, index in zip(scam_probabilities, best)]
+
+def train(texts: Sequence[str], labels: Sequence[str], feature_bits: int = DEFAULT_FEATURE_BITS,
+          ngram_range: Tuple[int, int] = DEFAULT_NGRAM_RANGE, epochs: int = 5, learning_rate: float = 0.5,
+          l2: float = 1e-6, batch_size: int = 256, seed: int = 42) -> Dict[str, Any]:
+    """
+    Fit the model with mini-batch AdaGrad on the softmax cross-entropy
+
+    Args:
+        texts: Training messages
+        labels: Scam type of each message, NEGATIVE_LABEL for legitimate ones
+        feature_bits: log2 of the number of hashed features
+        ngram_range: Smallest and largest n-gram length
+        epochs: Passes over the training data
+        learning_rate: AdaGrad step size
+        l2: L2 penalty on the weights
+        batch_size: Messages per gradient step
+        seed: Seed for the shuffling
+
+    Returns:
+        Dictionary with 'weights', 'bias', 'classes' and the 'hasher' used
+    """
+    require_numpy()
+    classes = [NEGATIVE_LABEL] + sorted(set(labels) - {NEGATIVE_LABEL})
+    if len(classes) < 2 or NEGATIVE_LABEL not in labels:
+        raise ValueError(f"Training data needs '{NEGATIVE_LABEL}' messages and at least one scam type")
+
+    hasher = NGramHasher(feature_bits, ngram_range)
+    targets = np.array([classes.index(label) for label in labels])
+    weights = np.zeros((hasher.n_features, len(classes)), dtype=np.float32)
+    bias = np.zeros(len(classes), dtype=np.float64)
+    weight_history = np.full_like(weights, 1e-8)
+    bias_history = np.full_like(bias, 1e-8)
+    generator = np.random.default_rng(seed)
+
+    for epoch in range(epochs):
+        order = generator.permutation(len(texts))
+        total_loss = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            rows, features, values = hasher.transform([texts[index] for index in batch])
+            probabilities = _softmax(_linear_scores(weights, bias, rows, features, values, len(batch)))
+            total_loss -= np.log(probabilities[np.arange(len(batch)), targets[batch]] + 1e-12).sum()
+
+            errors = probabilities
+            errors[np.arange(len(batch)), targets[batch]] -= 1.0
+            errors /= len(batch)
+            # Only the features present in the batch get a gradient
+            touched, inverse = np.unique(features, return_inverse=True)
+            gradient = np.empty((len(touched), len(classes)), dtype=np.float64)
+            for column in range(len(classes)):
+                gradient[:, column] = np.bincount(inverse, weights=values * errors[rows, column],
+                                                  minlength=len(touched))
+            gradient += l2 * weights[touched]
+            weight_history[touched] += gradient ** 2
+            weights[touched] -= (learning_rate * gradient / np.sqrt(weight_history[touched])).astype(np.float32)
+
+            bias_gradient = errors.sum(axis=0)
+            bias_history += bias_gradient ** 2
+            bias -= learning_rate * bias_gradient / np.sqrt(bias_history)
+        logging.info(f"Epoch {epoch + 1}/{epochs}: loss {total_loss / len(texts):.4f}")
+
+    return {'weights': weights, 'bias': bias, 'classes': classes, 'hasher': hasher}
+
+def evaluate(predict: Sequence[str], labels: Sequence[str]) -> Dict[str, float]:
+    """Accuracy over all classes plus precision and recall of 'scam' versus legitimate"""
+    pairs = list(zip(predict, labels))
+    true_positive = sum(1 for guess, label in pairs if guess != NEGATIVE_LABEL and label != NEGATIVE_LABEL)
+    predicted_positive = sum(1 for guess, _ in pairs if guess != NEGATIVE_LABEL)
+    actual_positive = sum(1 for _, label in pairs if label != NEGATIVE_LABEL)
+    return {
+        'messages': len(pairs),
+        'accuracy': round(sum(1 for guess, label in pairs if guess == label) / max(len(pairs), 1), 4),
+        'scam_precision': round(true_positive / predicted_positive, 4) if predicted_positive else 0.0,
+        'scam_recall': round(true_positive / actual_positive, 4) if actual_positive else 0.0
+    }
+
+def save_model(path: str, model: Dict[str, Any], extra: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Write a trained model for NGramModel to map
+
+    The weights are written first and the metadata last, each through a
+    temporary file and an atomic rename, so readers never see a half-written
+    model.
+
+    Returns:
+        Version of the saved model, a digest of its parameters
+    """
+    os.makedirs(path, exist_ok=True)
+    weights = np.ascontiguousarray(model['weights'], dtype=np.float32)
+    digest = hashlib.sha256(weights.tobytes())
+    digest.update(json.dumps([list(model['bias']), model['classes'], model['hasher'].feature_bits,
+                              list(model['hasher'].ngram_range)]).encode('utf-8'))
+    version = digest.hexdigest()[:12]
+
+    weights_path = os.path.join(path, WEIGHTS_FILE)
+    with open(weights_path + '.tmp', 'wb') as weights_file:
+        np.save(weights_file, weights)
+    os.replace(weights_path + '.tmp', weights_path)
+
+    metadata = {
+        'format': FORMAT_VERSION,
+        'version': version,
+        'classes': model['classes'],
+        'bias': [float(value) for value in model['bias']],
+        'feature_bits': model['hasher'].feature_bits,
+        'ngram_range': list(model['hasher'].ngram_range),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        **(extra or {})
+    }
+    metadata_path = os.path.join(path, METADATA_FILE)
+    with open(metadata_path + '.tmp', 'w') as metadata_file:
+        json.dump(metadata, metadata_file, indent=2)
+    os.replace(metadata_path + '.tmp', metadata_path)
+    return version
+
+def iter_labeled_messages(path: str, text_field: str = 'text',
+                          label_field: str = 'label') -> Iterator[Tuple[str, str]]:
+    """Read (text, label) pairs from a JSONL or CSV file, skipping incomplete records"""
+    with open(path, encoding='utf-8', newline='') as stream:
+        if path.lower().endswith('.csv'):
+            csv.field_size_limit(sys.maxsize)
+            records = csv.DictReader(stream)
+        else:
+            records = (json.loads(line) for line in stream if line.strip())
+        for record in records:
+            text, label = record.get(text_field), record.get(label_field)
+            if isinstance(text, str) and label not in (None, ''):
+                yield text, str(label)
+
+def main():
+    """Train or evaluate the n-gram model from the command line"""
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram scam model on labeled messages")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = commands.add_parser('train', help="Train a model and save it to a directory")
+    train_parser.add_argument('input', help="JSONL or CSV file of labeled messages")
+    train_parser.add_argument('-o', '--output', required=True, help="Model directory to write")
+    train_parser.add_argument('--feature-bits', type=int, default=DEFAULT_FEATURE_BITS,
+                              help="log2 of the number of hashed features")
+    train_parser.add_argument('--ngram-min', type=int, default=DEFAULT_NGRAM_RANGE[0], help="Shortest n-gram")
+    train_parser.add_argument('--ngram-max', type=int, default=DEFAULT_NGRAM_RANGE[1], help="Longest n-gram")
+    train_parser.add_argument('--epochs', type=int, default=5, help="Passes over the training data")
+    train_parser.add_argument('--learning-rate', type=float, default=0.5, help="AdaGrad step size")
+    train_parser.add_argument('--l2', type=float, default=1e-6, help="L2 penalty")
+    train_parser.add_argument('--holdout', type=float, default=0.1, help="Fraction held out for evaluation")
+    train_parser.add_argument('--seed', type=int, default=42, help="Seed for shuffling and the holdout split")
+
+    evaluate_parser = commands.add_parser('evaluate', help="Score a saved model on labeled messages")
+    evaluate_parser.add_argument('model', help="Model directory")
+    evaluate_parser.add_argument('input', help="JSONL or CSV file of labeled messages")
+
+    for command_parser in (train_parser, evaluate_parser):
+        command_parser.add_argument('--text-field', default='text', help="Field holding the message text")
+        command_parser.add_argument('--label-field', default='label',
+                                    help=f"Field holding the scam type ('{NEGATIVE_LABEL}' for legitimate)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    require_numpy()
+
+    messages = list(iter_labeled_messages(args.input, args.text_field, args.label_field))
+    texts = [text for text, _ in messages]
+    labels = [label for _, label in messages]
+
+    if args.command == 'evaluate':
+        model = NGramModel(args.model)
+        guesses = [model.classes[index] for index in model.predict_proba(texts).argmax(axis=1)]
+        print(json.dumps({'version': model.version, **evaluate(guesses, labels)}, indent=2))
+        return
+
+    order = np.random.default_rng(args.seed).permutation(len(texts))
+    held_out = set(order[:int(len(texts) * args.holdout)].tolist())
+    train_texts = [text for index, text in enumerate(texts) if index not in held_out]
+    train_labels = [label for index, label in enumerate(labels) if index not in held_out]
+
+    started = time.perf_counter()
+    model = train(train_texts, train_labels, args.feature_bits, (args.ngram_min, args.ngram_max),
+                  args.epochs, args.learning_rate, args.l2, seed=args.seed)
+    training_seconds = time.perf_counter() - started
+
+    extra = {'training_messages': len(train_texts), 'training_seconds': round(training_seconds, 1)}
+    if held_out:
+        test_texts = [texts[index] for index in sorted(held_out)]
+        rows, features, values = model['hasher'].transform(test_texts)
+        logits = _linear_scores(model['weights'], model['bias'], rows, features, values, len(test_texts))
+        guesses = [model['classes'][index] for index in logits.argmax(axis=1)]
+        extra['holdout'] = evaluate(guesses, [labels[index] for index in sorted(held_out)])
+
+    version = save_model(args.output, model, extra)
+    print(json.dumps({'output': args.output, 'version': version, **extra}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+import traceback
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+DEFAULT_LEVEL = 'WARNING'
+
+# Attributes every LogRecord has; anything else was passed through extra=
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with extra= fields as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of the records of chatty events, chosen by their 'event' field"""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            rates: Fraction of records kept per event name; unlisted events are all kept
+        """
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    @classmethod
+    def parse(cls, spec: str) -> 'SamplingFilter':
+        """Build a filter from an 'event=rate,event=rate' specification"""
+        rates = {}
+        for part in filter(None, (part.strip() for part in spec.split(','))):
+            event, _, rate = part.partition('=')
+            rates[event.strip()] = float(rate)
+        return cls(rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(getattr(record, 'event', None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Hand records to a background writer thread without blocking the caller
+
+    The message is neither formatted nor written on the calling thread, and
+    when the writer falls behind records are dropped and counted instead of
+    stalling requests. The writer is restarted in processes forked after
+    configuration, such as preloaded gunicorn workers.
+    """
+
+    def __init__(self, handler: logging.Handler, max_queue: int = 10000):
+        self.max_queue = max_queue
+        self.handler = handler
+        self.dropped = 0
+        self.listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+        super().__init__(queue.Queue(max_queue))
+        self.start()
+
+    def start(self):
+        """Start the writer thread for this process"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.max_queue)
+            self.listener = QueueListener(self.queue, self.handler, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """Write the records still queued and stop the writer thread"""
+        with self._lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+                self.listener = None
+                self._pid = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The writer runs in this process, so the record is passed on as-is and
+        # its message is only built if and when the writer formats it
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self._pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None,
+                      sampling: Optional[str] = None, max_queue: Optional[int] = None) -> BackgroundQueueHandler:
+    """
+    Route the root logger through a background JSON writer
+
+    Args:
+        level: Root level name (LOG_LEVEL, WARNING by default)
+        log_format: 'json' or 'text' (LOG_FORMAT, json by default)
+        sampling: Per-event sampling rates, e.g. 'scam_analysis=0.01' (LOG_SAMPLING)
+        max_queue: Records buffered before new ones are dropped (LOG_QUEUE_SIZE)
+
+    Returns:
+        The installed queue handler
+    """
+    level = (level or os.environ.get('LOG_LEVEL', DEFAULT_LEVEL)).upper()
+    log_format = (log_format or os.environ.get('LOG_FORMAT', 'json')).lower()
+    sampling = sampling if sampling is not None else os.environ.get('LOG_SAMPLING', '')
+    max_queue = max_queue or int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+    writer = logging.StreamHandler(sys.stderr)
+    if log_format == 'json':
+        writer.setFormatter(JSONFormatter())
+    else:
+        writer.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    handler = BackgroundQueueHandler(writer, max_queue=max_queue)
+    handler.addFilter(SamplingFilter.parse(sampling))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+        if isinstance(existing, BackgroundQueueHandler):
+            existing.stop()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    atexit.register(handler.stop)
+    return handler
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app's modules are top-level modules of this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,47 @@
+import pytest
+from app import create_app
+from link_analyzer import LinkAnalyzer
+from scam_detector import ScamDetector
+
+TEXTS = [
+    "URGENT: your account will be blocked, verify now at http://sbi-kyc-update.tk/login",
+    "are we meeting for lunch tomorrow",
+    "Congratulations you won a lottery prize of 25 lakh, claim reward at bit.ly/claim-now",
+    "",
+    "आपका खाता बंद हो जाएगा, तुरंत OTP भेजें",
+    "URGENT: your account will be blocked, verify now at http://sbi-kyc-update.tk/login",
+    "see https://www.amazon.in/orders and http://192.168.1.20/pay"
+]
+
+def test_detector_batch_matches_single_analysis():
+    detector = ScamDetector()
+
+    assert detector.analyze_batch(TEXTS) == [detector.analyze_text(text) for text in TEXTS]
+
+def test_link_batch_matches_single_analysis():
+    analyzer = LinkAnalyzer(check_reputation=False)
+
+    assert analyzer.analyze_links_in_batch(TEXTS) == [analyzer.analyze_links_in_text(text) for text in TEXTS]
+
+@pytest.mark.parametrize('language', ['en', 'hi'])
+def test_batch_endpoint_matches_analyze_text(language):
+    # Separate apps, so neither side is served from the other's analysis cache
+    single_client = create_app().test_client()
+    batch_client = create_app().test_client()
+
+    response = batch_client.post('/analyze_batch', json={'texts': TEXTS, 'language': language}).get_json()
+
+    assert response['success']
+    assert response['count'] == len(TEXTS)
+    for text, result in zip(TEXTS, response['results']):
+        single = single_client.post('/analyze_text', json={'text': text, 'language': language}).get_json()
+        assert result == single
+
+def test_oversized_batch_is_rejected(monkeypatch):
+    monkeypatch.setattr('app.MAX_BATCH_SIZE', 2)
+    client = create_app().test_client()
+
+    response = client.post('/analyze_batch', json={'texts': TEXTS})
+
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False
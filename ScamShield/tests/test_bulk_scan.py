@@ -0,0 +1,77 @@
+import io
+import os
+import sys
+import json
+import subprocess
+from bulk_scan import BulkScanner, iter_messages
+from scam_detector import ScamDetector
+
+SCANNER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MESSAGES = [
+    "URGENT: your account will be blocked, verify now at http://sbi-kyc-update.tk/login",
+    "are we meeting for lunch tomorrow",
+    "Congratulations you won a lottery prize, claim reward now",
+    "please send the report by evening",
+    "Share the OTP to receive cashback on your UPI account"
+]
+
+def test_jsonl_records_strings_and_errors():
+    lines = [
+        json.dumps({'msg_id': 'a1', 'text': MESSAGES[0]}),
+        json.dumps(MESSAGES[1]),
+        '',
+        '{not json',
+        json.dumps({'msg_id': 'a5', 'body': 'no text field'})
+    ]
+
+    records = list(iter_messages(io.StringIO('\n'.join(lines)), 'jsonl', id_field='msg_id'))
+
+    assert records[0] == ('a1', MESSAGES[0], None)
+    assert records[1] == (2, MESSAGES[1], None)
+    assert records[2][0] == 4 and records[2][1] is None and records[2][2].startswith('Invalid JSON')
+    assert records[3] == (5, None, "Missing field 'text'")
+
+def test_csv_records():
+    data = 'id,message\n7,"hello, friend"\n8,"multi\nline"\n'
+
+    records = list(iter_messages(io.StringIO(data, newline=''), 'csv', text_field='message', id_field='id'))
+
+    assert records == [('7', 'hello, friend', None), ('8', 'multi\nline', None)]
+    assert list(iter_messages(io.StringIO(data), 'csv'))[0] == (1, None, "Missing field 'text'")
+
+def test_scan_in_process_matches_detector():
+    output = io.StringIO()
+    messages = [(number, text, None) for number, text in enumerate(MESSAGES, 1)] + [(6, None, 'Invalid JSON')]
+
+    summary = BulkScanner(workers=1, chunk_size=2, progress_interval=0).scan(messages, output)
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    detector = ScamDetector()
+    assert [record['id'] for record in records] == [1, 2, 3, 4, 5, 6]
+    for record, text in zip(records, MESSAGES):
+        assert record['is_scam'] == detector.analyze_text(text)['is_scam']
+    assert records[0]['links'][0]['domain'] == 'sbi-kyc-update.tk'
+    assert records[5] == {'id': 6, 'error': 'Invalid JSON'}
+    assert summary['messages'] == 6
+    assert summary['errors'] == 1
+    assert summary['scams'] + summary['clean'] == 5
+
+def test_cli_keeps_input_order_across_workers(tmp_path):
+    source = tmp_path / 'dump.jsonl'
+    source.write_text('\n'.join(json.dumps({'text': text}) for text in MESSAGES * 4), encoding='utf-8')
+    output = tmp_path / 'results.jsonl'
+
+    completed = subprocess.run(
+        [sys.executable, 'bulk_scan.py', str(source), '-o', str(output), '--workers', '2',
+         '--chunk-size', '3', '--no-links', '--progress-interval', '0'],
+        cwd=SCANNER_DIR, capture_output=True, text=True, timeout=120
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    records = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert [record['id'] for record in records] == list(range(1, len(MESSAGES) * 4 + 1))
+    assert all(record['links'] == [] for record in records)
+    summary = json.loads(completed.stderr.strip().splitlines()[-1])
+    assert summary['messages'] == len(MESSAGES) * 4
+    assert summary['scams'] == sum(record['is_scam'] for record in records)
@@ -0,0 +1,59 @@
+import pytest
+from app import create_app
+
+TURNS = [
+    "Hello sir, this is the bank helpdesk",
+    "Your account will be blocked today",
+    "Please share the OTP you received",
+    "It is urgent, verify immediately"
+]
+
+@pytest.fixture
+def workers():
+    """Two apps with their own services, like two gunicorn workers behind one port"""
+    return [create_app().test_client() for _ in range(2)]
+
+def chat(client, query, session=None):
+    payload = {'query': query, 'language': 'en'}
+    if session:
+        payload.update(session_id=session['session_id'], session_token=session['session_token'])
+    response = client.post('/chatbot_query', json=payload).get_json()
+    assert response['success']
+    return response
+
+def test_conversation_continues_across_workers(workers):
+    single = None
+    for query in TURNS:
+        single = chat(workers[0], query, single)
+
+    session = None
+    for turn, query in enumerate(TURNS):
+        previous = session
+        session = chat(workers[turn % 2], query, session)
+        assert not session['session_reset']
+        if previous:
+            assert session['session_id'] == previous['session_id']
+
+    assert session['conversation'] == single['conversation']
+    assert session['conversation']['turns'] == len(TURNS)
+
+def test_older_token_does_not_roll_back_local_state(workers):
+    first = chat(workers[0], TURNS[0])
+    second = chat(workers[0], TURNS[1], first)
+    third = chat(workers[0], TURNS[2], dict(second, session_token=first['session_token']))
+
+    assert third['conversation']['turns'] == 3
+
+@pytest.mark.parametrize('token', [None, 'forged', 'tampered'])
+def test_unknown_session_is_reported_as_reset(workers, token):
+    first = chat(workers[0], TURNS[0])
+    if token == 'tampered':
+        token = first['session_token'][:-2] + ('AA' if not first['session_token'].endswith('AA') else 'BB')
+    response = chat(workers[1], TURNS[1], dict(first, session_token=token))
+
+    assert response['session_reset']
+    assert response['session_id'] != first['session_id']
+    assert response['conversation']['turns'] == 1
+
+def test_new_conversation_is_not_a_reset(workers):
+    assert not chat(workers[0], TURNS[0])['session_reset']
@@ -0,0 +1,105 @@
+import os
+import pytest
+from app import analyze_message, create_app
+from domain_blocklist import DomainBlocklist, build_blocklist, main, normalize_domain
+
+MESSAGE = "Claim your refund at https://refund-portal.example/claim"
+
+FEED = [
+    '# threat feed',
+    'evil.example',
+    '*.Wildcard.Example.',
+    '0.0.0.0 hosts-entry.example',
+    'https://user@url-entry.example:8443/login',
+    '',
+    'evil.example  # listed twice'
+]
+
+@pytest.mark.parametrize('entry, expected', [
+    ('evil.example', 'evil.example'),
+    ('*.Wildcard.Example.', 'wildcard.example'),
+    ('127.0.0.1 hosts-entry.example', 'hosts-entry.example'),
+    ('https://user@url-entry.example:8443/login', 'url-entry.example'),
+    ('# comment only', None),
+    ('   ', None)
+])
+def test_feed_lines_are_normalized(entry, expected):
+    assert normalize_domain(entry) == expected
+
+def test_build_and_lookup(tmp_path):
+    path = str(tmp_path / 'blocklist.idx')
+
+    assert build_blocklist(FEED, path) == 4
+    blocklist = DomainBlocklist(path)
+
+    assert blocklist.size == 4
+    assert blocklist.contains('evil.example')
+    assert blocklist.contains('url-entry.example')
+    assert not blocklist.contains('login.evil.example')  # contains() is exact
+    assert blocklist.match('login.evil.example', 'evil.example') == 'evil.example'
+    assert blocklist.match('evil.example.attacker.com', 'attacker.com') is None
+    assert blocklist.match('safe.example', 'safe.example') is None
+
+def test_empty_blocklist(tmp_path):
+    path = str(tmp_path / 'blocklist.idx')
+
+    assert build_blocklist([], path) == 0
+    assert DomainBlocklist(path).match('evil.example', 'evil.example') is None
+
+def test_rebuilt_index_is_reloaded(tmp_path):
+    path = str(tmp_path / 'blocklist.idx')
+    build_blocklist(['evil.example'], path)
+    blocklist = DomainBlocklist(path, check_interval=0)
+    version = blocklist.version
+
+    build_blocklist(['evil.example', 'new-threat.example'], path)
+
+    assert blocklist.contains('new-threat.example')
+    assert blocklist.size == 2
+    assert blocklist.version != version
+
+@pytest.mark.parametrize('truncate', [None, 12, 4096])
+def test_broken_rebuild_keeps_the_current_index(tmp_path, truncate):
+    path = tmp_path / 'blocklist.idx'
+    build_blocklist(['evil.example'], str(path))
+    blocklist = DomainBlocklist(str(path), check_interval=0)
+
+    broken = tmp_path / 'broken.idx'
+    broken.write_bytes(path.read_bytes()[:truncate] if truncate else b'')
+    os.replace(broken, path)  # Replaced like a build does; the mapped file is never modified
+
+    assert blocklist.contains('evil.example')
+    with pytest.raises(ValueError):
+        DomainBlocklist(str(path))
+
+def test_cli_builds_from_feed_files(tmp_path, monkeypatch, capsys):
+    feed = tmp_path / 'feed.txt'
+    feed.write_text('\n'.join(FEED), encoding='utf-8')
+    output = tmp_path / 'blocklist.idx'
+    monkeypatch.setattr('sys.argv', ['domain_blocklist.py', str(feed), '-o', str(output)])
+
+    main()
+
+    assert 'Indexed 4 domains' in capsys.readouterr().out
+    assert DomainBlocklist(str(output)).contains('hosts-entry.example')
+
+@pytest.fixture
+def blocklist_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'blocklist.idx')
+    build_blocklist(['known-bad.example'], path)
+    monkeypatch.setenv('DOMAIN_BLOCKLIST_PATH', path)
+    monkeypatch.setenv('DOMAIN_BLOCKLIST_CHECK_INTERVAL', '0')
+    return path
+
+def test_cached_analysis_sees_reloaded_blocklist(blocklist_path):
+    app = create_app()
+    with app.app_context():
+        _, before = analyze_message(MESSAGE)
+        _, cached = analyze_message(MESSAGE)
+        build_blocklist(['known-bad.example', 'refund-portal.example'], blocklist_path)
+        _, after = analyze_message(MESSAGE)
+
+    assert app.extensions['scamshield'].analysis_cache.hits == 1
+    assert not any(factor.startswith('Known malicious domain') for factor in before[0]['risk_factors'])
+    assert cached == before
+    assert 'Known malicious domain: refund-portal.example' in after[0]['risk_factors']
@@ -0,0 +1,64 @@
+import pytest
+from domain_classifier import DomainClassifier, DomainTrie, PublicSuffixList, normalize_host
+
+@pytest.fixture(scope='module')
+def suffix_list():
+    return PublicSuffixList()
+
+@pytest.mark.parametrize('host, expected', [
+    ('www.sbi.co.in', 'sbi.co.in'),
+    ('sbi.co.in', 'sbi.co.in'),
+    ('login.secure.example.com', 'example.com'),
+    ('news.bbc.co.uk', 'bbc.co.uk'),
+    ('someone.github.io', 'someone.github.io'),  # Private-section suffix
+    ('shop.example.zzz', 'example.zzz'),  # Unknown TLD falls back to the implicit '*' rule
+    ('bar.foo.ck', 'bar.foo.ck'),  # Wildcard rule *.ck
+    ('www.ck', 'www.ck'),  # Exception rule !www.ck
+    ('co.in', None),
+    ('in', None),
+    ('foo.ck', None),
+    ('192.168.1.20', None),
+    ('2001:db8::1', None),
+    ('', None)
+])
+def test_registered_domain(suffix_list, host, expected):
+    assert suffix_list.registered_domain(host) == expected
+
+@pytest.mark.parametrize('netloc, expected', [
+    ('user:pass@WWW.Bit.ly.:443', 'www.bit.ly'),
+    ('[2001:DB8::1]:8080', '2001:db8::1'),
+    ('example.com', 'example.com')
+])
+def test_normalize_host(netloc, expected):
+    assert normalize_host(netloc) == expected
+
+def test_trie_matches_domain_and_subdomains_only():
+    trie = DomainTrie([('bit.ly', 'shortener'), ('evil.example', 'blocklist')])
+
+    assert trie.match('bit.ly') == ('bit.ly', 'shortener')
+    assert trie.match('go.bit.ly') == ('bit.ly', 'shortener')
+    assert trie.match('notbit.ly') is None
+    assert trie.match('bit.ly.evil.example') == ('evil.example', 'blocklist')
+    assert trie.size == 2
+
+def test_classifier_reports_lists_patterns_and_registered_domain(suffix_list):
+    classifier = DomainClassifier(['bit.ly'], [r'\d{4,}', r'secure-?login', r'\.tk$'], ['verify', 'login'],
+                                  blocked_domains=['bad.example'], suffix_list=suffix_list)
+
+    shortener = classifier.classify_host('go.bit.ly')
+    overlapping = classifier.classify_host('secure-login-20240.tk')
+    blocked = classifier.classify_host('cdn.bad.example')
+
+    assert shortener['list_match'] == ('bit.ly', 'shortener')
+    assert overlapping['patterns'] == [r'\d{4,}', r'secure-?login', r'\.tk$']
+    assert overlapping['registered_domain'] == 'secure-login-20240.tk'
+    assert blocked['list_match'] == ('bad.example', 'blocklist')
+    assert classifier.path_keywords('/login/verify?next=/login') == ['verify', 'login']
+
+def test_added_blocked_domains_bypass_the_cache(suffix_list):
+    classifier = DomainClassifier([], [], [], suffix_list=suffix_list)
+    assert classifier.classify_host('pay.new-bad.example')['list_match'] is None
+
+    classifier.add_blocked_domains(['new-bad.example'])
+
+    assert classifier.classify_host('pay.new-bad.example')['list_match'] == ('new-bad.example', 'blocklist')
@@ -0,0 +1,133 @@
+import io
+import pytest
+from PIL import Image, ImageDraw
+from app import create_app
+from image_hash_cache import PerceptualHashCache, image_signature
+
+BENIGN_TEXT = "Hi mom dinner at 8 tonight"
+SCAM_TEXT = "Your account blocked share OTP 123456 urgent verify"
+
+def chat_screenshot(text: str) -> bytes:
+    """PNG of a chat screen with one message bubble; only the text differs between calls"""
+    image = Image.new('RGB', (720, 1280), (236, 229, 221))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 720, 110), fill=(7, 94, 84))
+    draw.rounded_rectangle((40, 300, 680, 420), radius=18, fill=(255, 255, 255))
+    draw.text((64, 350), text, fill=(0, 0, 0))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+class FakeOCRQueue:
+    """Stands in for the OCR pool, returning the text each screenshot was drawn with"""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.calls = 0
+
+    def run(self, image_data, languages=None, timeout=None):
+        self.calls += 1
+        return {'text': self.texts[image_data], 'stats': {'ocr_language': languages}}
+
+    def depth(self):
+        return 0
+
+def jpeg_copy(image_data: bytes, quality: int = 80, scale: float = 1.0) -> bytes:
+    """The screenshot re-encoded as JPEG, as messaging apps forward it"""
+    image = Image.open(io.BytesIO(image_data)).convert('RGB')
+    if scale != 1.0:
+        image = image.resize((int(image.size[0] * scale), int(image.size[1] * scale)), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+def test_same_layout_different_text_is_a_rejected_candidate():
+    cache = PerceptualHashCache()
+    benign, scam = image_signature(chat_screenshot(BENIGN_TEXT)), image_signature(chat_screenshot(SCAM_TEXT))
+    cache.add(benign, BENIGN_TEXT)
+
+    assert (benign.image_hash ^ scam.image_hash).bit_count() <= cache.max_distance
+    assert cache.lookup(scam) is None
+    assert cache.stats()['rejected_candidates'] == 1
+
+@pytest.mark.parametrize('quality,scale', [(80, 1.0), (50, 1.0), (85, 0.75)])
+def test_reencoded_copy_hits(quality, scale):
+    cache = PerceptualHashCache()
+    png = chat_screenshot(SCAM_TEXT)
+    cache.add(image_signature(png), SCAM_TEXT)
+
+    hit = cache.lookup(image_signature(jpeg_copy(png, quality, scale)))
+
+    assert hit is not None and hit[0] == SCAM_TEXT
+
+def test_languages_are_part_of_the_match():
+    cache = PerceptualHashCache()
+    png = chat_screenshot(SCAM_TEXT)
+    cache.add(image_signature(png, 'eng+hin'), SCAM_TEXT)
+
+    assert cache.lookup(image_signature(png, 'eng+hin')) is not None
+    assert cache.lookup(image_signature(png, 'eng+tam')) is None
+
+def test_cache_is_lru_bounded():
+    cache = PerceptualHashCache(max_entries=2)
+    first, second, third = (image_signature(chat_screenshot(text)) for text in ('one', 'two two', 'three three three'))
+    cache.add(first, 1)
+    cache.add(second, 2)
+    assert cache.lookup(first)[0] == 1
+    cache.add(third, 3)
+
+    assert cache.lookup(second) is None
+    assert cache.lookup(first)[0] == 1
+    assert cache.stats()['evictions'] == 1
+
+@pytest.fixture
+def client():
+    app = create_app()
+    return app.test_client(), app.extensions['scamshield']
+
+def post_image(test_client, image_data):
+    return test_client.post('/analyze_image', data={
+        'file': (io.BytesIO(image_data), 'screenshot.png'),
+        'language': 'en'
+    }, content_type='multipart/form-data').get_json()
+
+def test_scam_screenshot_after_benign_one_with_same_layout_is_ocrd(client):
+    test_client, services = client
+    benign, scam = chat_screenshot(BENIGN_TEXT), chat_screenshot(SCAM_TEXT)
+    services._ocr_job_queue = FakeOCRQueue({benign: BENIGN_TEXT, scam: SCAM_TEXT})
+
+    first = post_image(test_client, benign)
+    second = post_image(test_client, scam)
+
+    assert first['extracted_text'] == BENIGN_TEXT
+    assert second['extracted_text'] == SCAM_TEXT
+    assert second['ocr_stats']['image_cache_hit'] is False
+    assert second['is_scam'] is True
+    assert services._ocr_job_queue.calls == 2
+
+def test_repeated_screenshot_reuses_ocr_text(client):
+    test_client, services = client
+    scam = chat_screenshot(SCAM_TEXT)
+    services._ocr_job_queue = FakeOCRQueue({scam: SCAM_TEXT})
+
+    post_image(test_client, scam)
+    repeat = post_image(test_client, scam)
+
+    assert repeat['extracted_text'] == SCAM_TEXT
+    assert repeat['ocr_stats']['image_cache_hit'] is True
+    assert services._ocr_job_queue.calls == 1
+
+def test_jpeg_of_cached_png_hits_and_other_screenshot_misses(client):
+    test_client, services = client
+    benign, scam = chat_screenshot(BENIGN_TEXT), chat_screenshot(SCAM_TEXT)
+    services._ocr_job_queue = FakeOCRQueue({benign: BENIGN_TEXT, scam: SCAM_TEXT})
+
+    post_image(test_client, benign)
+    copy = post_image(test_client, jpeg_copy(benign))
+    other = post_image(test_client, scam)
+
+    assert copy['extracted_text'] == BENIGN_TEXT
+    assert copy['ocr_stats']['image_cache_hit'] is True
+    assert other['extracted_text'] == SCAM_TEXT
+    assert other['ocr_stats']['image_cache_hit'] is False
+    assert services._ocr_job_queue.calls == 2
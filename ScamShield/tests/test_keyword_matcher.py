@@ -0,0 +1,84 @@
+import random
+import pytest
+from keyword_matcher import KeywordMatcher
+from rule_packs import KEYWORD_FIELDS
+from scam_detector import ScamDetector
+from text_normalizer import normalize_text
+
+MESSAGES = [
+    "Dear customer your KYC has expired, update now or your account will be blocked",
+    "Congratulations! You have won a lottery prize, share the OTP to claim",
+    "आपका खाता बंद हो जाएगा, तुरंत OTP भेजें",
+    "Invest now and get guaranteed returns of 30% every month",
+    "are we meeting for lunch tomorrow"
+]
+
+def occurrences(text, keywords):
+    """Every (start, keyword) the old per-keyword scan would see"""
+    found = []
+    for keyword in keywords:
+        start = text.find(keyword)
+        while start != -1:
+            found.append((start, keyword))
+            start = text.find(keyword, start + 1)
+    return sorted(found)
+
+def random_case(seed):
+    generator = random.Random(seed)
+    keywords = list({''.join(generator.choice('ab ') for _ in range(generator.randint(1, 4)))
+                     for _ in range(generator.randint(1, 12))})
+    text = ''.join(generator.choice('abc ') for _ in range(generator.randint(0, 60)))
+    matcher = KeywordMatcher()
+    for keyword in keywords:
+        matcher.add(keyword, keyword)
+    return matcher.build(), keywords, text
+
+@pytest.mark.parametrize('seed', range(50))
+def test_matches_equal_per_keyword_scan(seed):
+    matcher, keywords, text = random_case(seed)
+
+    matches, _ = matcher.scan(text)
+
+    assert sorted(matches) == occurrences(text, keywords)
+
+@pytest.mark.parametrize('seed', range(20))
+def test_resumed_scan_finds_keywords_spanning_the_split(seed):
+    matcher, keywords, text = random_case(seed)
+    expected = occurrences(text, keywords)
+
+    for split in range(len(text) + 1):
+        first, state = matcher.scan(text[:split])
+        second, _ = matcher.scan(text[split:], state)
+        assert sorted(first + [(start + split, keyword) for start, keyword in second]) == expected
+
+def test_empty_keyword_is_ignored():
+    matcher = KeywordMatcher()
+    matcher.add('', 'empty')
+    matcher.add('otp', 'otp')
+
+    assert list(matcher.iter_matches('share otp')) == [(6, 'otp')]
+    assert matcher.keyword_count == 1
+
+@pytest.mark.parametrize('message', MESSAGES)
+def test_detector_keywords_equal_per_keyword_scan(message):
+    snapshot = ScamDetector().snapshot
+    text = normalize_text(message)
+
+    keyword_hits, _, _, _, _ = ScamDetector._match(snapshot, text)
+
+    for scam_type, rules in snapshot.scam_patterns.items():
+        keywords = {keyword for field in KEYWORD_FIELDS for keyword in rules.get(field, ())}
+        expected = {keyword for keyword in keywords if normalize_text(keyword) in text}
+        assert {keyword for _, keyword in keyword_hits.get(scam_type, ())} == expected
+
+def test_keyword_split_across_turns_matches():
+    detector = ScamDetector()
+    conversation = detector.start_conversation()
+
+    detector.analyze_turn(conversation, "Your account will be blocked, please send")
+    result = detector.analyze_turn(conversation, "money and your upi pin to verify account")
+
+    single = detector.analyze_text("Your account will be blocked, please send money and your upi pin to verify account")
+    assert 'send money' in single['keywords_found']
+    assert result['keywords_found'] == single['keywords_found']
+    assert result['confidence'] == single['confidence']
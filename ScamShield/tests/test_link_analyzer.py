@@ -0,0 +1,34 @@
+import pytest
+from link_analyzer import LinkAnalyzer
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return LinkAnalyzer(check_reputation=False)
+
+def disguised(result):
+    return [factor for factor in result['risk_factors'] if factor.startswith('Disguised domain')]
+
+@pytest.mark.parametrize('url,domain', [
+    ('https://münchen.de/', 'münchen.de'),
+    ('https://www.société-générale.fr/', 'société-générale.fr'),
+    ('https://пример.рф/', 'пример.рф')
+])
+def test_accented_and_native_script_hosts_are_not_disguised(analyzer, url, domain):
+    result = analyzer.analyze_url(url)
+
+    assert disguised(result) == []
+    assert result['registered_domain'] == domain
+    assert not result['is_suspicious']
+
+@pytest.mark.parametrize('url,looks_like', [
+    ('https://раураl.com/', 'paypal.com'),  # Cyrillic а, р, у
+    ('https://gооgle.com/', 'google.com'),  # Cyrillic о
+    ('https://αpple.com/', 'apple.com'),  # Greek α
+    ('https://pay​pal.com/', 'paypal.com')  # Zero-width space
+])
+def test_cross_script_lookalikes_and_invisible_characters_are_disguised(analyzer, url, looks_like):
+    result = analyzer.analyze_url(url)
+
+    assert disguised(result) == [f"Disguised domain: looks like {looks_like}"]
+    assert result['registered_domain'] == looks_like
+    assert result['is_suspicious']
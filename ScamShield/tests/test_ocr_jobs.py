@@ -0,0 +1,79 @@
+import os
+import stat
+import threading
+import pytest
+import ocr_jobs
+from concurrent.futures import ThreadPoolExecutor
+from ocr_jobs import OCRJobQueue
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def test_job_states_are_private(tmp_path):
+    queue = OCRJobQueue(max_workers=1, job_dir=str(tmp_path / 'jobs'))
+    queue._write_state('abc123', {'job_id': 'abc123', 'status': 'done', 'extracted_text': 'OTP 4821'})
+
+    assert mode(queue.job_dir) == 0o700
+    assert mode(queue.pending_dir) == 0o700
+    assert mode(queue._state_path('abc123')) == 0o600
+    assert queue._read_state('abc123')['extracted_text'] == 'OTP 4821'
+
+def test_existing_job_directory_is_made_private(tmp_path):
+    job_dir = tmp_path / 'jobs'
+    job_dir.mkdir(mode=0o777)
+    job_dir.chmod(0o777)
+
+    OCRJobQueue(max_workers=1, job_dir=str(job_dir))
+
+    assert mode(job_dir) == 0o700
+
+def test_symlinked_job_directory_is_rejected(tmp_path):
+    (tmp_path / 'elsewhere').mkdir()
+    (tmp_path / 'jobs').symlink_to(tmp_path / 'elsewhere')
+
+    with pytest.raises(PermissionError):
+        OCRJobQueue(max_workers=1, job_dir=str(tmp_path / 'jobs'))
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='No file ownership')
+def test_job_directory_of_another_user_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, 'getuid', lambda: os.stat(tmp_path).st_uid + 1)
+
+    with pytest.raises(PermissionError):
+        OCRJobQueue(max_workers=1, job_dir=str(tmp_path / 'jobs'))
+
+@pytest.fixture
+def blocked_queue(tmp_path, monkeypatch):
+    """Queue whose only OCR worker is a thread that blocks until released"""
+    release = threading.Event()
+
+    def slow_ocr(image_data, languages):
+        release.wait(5)
+        return {'text': '', 'stats': {}}
+
+    monkeypatch.setattr(ocr_jobs, 'ocr_image', slow_ocr)
+    queue = OCRJobQueue(max_workers=1, max_pending=2, job_dir=str(tmp_path / 'jobs'))
+    queue._executor = ThreadPoolExecutor(max_workers=1)
+    yield queue, release
+    release.set()
+    queue._executor.shutdown()
+
+def test_timed_out_queued_job_is_cancelled(blocked_queue):
+    queue, _ = blocked_queue
+    queue.submit(b'first')  # Occupies the only worker
+
+    with pytest.raises(TimeoutError):
+        queue.run(b'second', timeout=0.05)
+
+    assert queue.server_depth() == 1
+    assert queue.depth() == 1
+
+def test_timed_out_running_job_stops_counting(blocked_queue):
+    queue, release = blocked_queue
+
+    with pytest.raises(TimeoutError):
+        queue.run(b'slow', timeout=0.05)
+    assert queue.server_depth() == 0  # Freed while the OCR is still running
+
+    queue.submit(b'next')
+    queue.submit(b'after')  # Would exceed max_pending if the abandoned job still counted
+    release.set()
@@ -0,0 +1,31 @@
+from ocr import stitch_band_texts
+
+def test_overlap_is_joined_once_and_garbled_edge_lines_dropped():
+    top = "Alice: hi\nBob: your KYC expired\nAlice: what do I do\nBob: share the OTP now\nBo#: cl~ck"
+    bottom = "Al1c: wh_t\nAlice: what do I do\nBob: share the OTP now\nBob: click bit.ly/kyc"
+
+    assert stitch_band_texts([top, bottom]).splitlines() == [
+        "Alice: hi",
+        "Bob: your KYC expired",
+        "Alice: what do I do",
+        "Bob: share the OTP now",
+        "Bob: click bit.ly/kyc"
+    ]
+
+def test_repeated_short_line_is_not_taken_for_the_overlap():
+    top = "Alice: hi\nRead\nBob: send money\nRead\nBob: to this UPI id\n10:42"
+    bottom = "Read\nBob: scammer@upi\nBob: quickly"
+
+    lines = stitch_band_texts([top, bottom]).splitlines()
+
+    assert "Bob: send money" in lines
+    assert "Bob: to this UPI id" in lines
+    assert "Bob: scammer@upi" in lines
+
+def test_match_away_from_the_band_edges_drops_nothing():
+    top = "Bob: pay the fee\nAlice: ok\nBob: pay the fee\nBob: line four\nBob: line five\nBob: line six"
+    bottom = "Carol: new\nDan: text\nBob: pay the fee\nAlice: ok\nEve: end"
+
+    lines = stitch_band_texts([top, bottom]).splitlines()
+
+    assert lines == top.splitlines() + bottom.splitlines()
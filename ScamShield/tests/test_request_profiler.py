@@ -0,0 +1,15 @@
+from request_profiler import RequestProfiler
+
+def test_token_check_handles_non_ascii_tokens(tmp_path):
+    profiler = RequestProfiler(directory=str(tmp_path), token='secret')
+
+    assert profiler.is_authorized('secret') is True
+    assert profiler.is_authorized('café') is False
+    assert profiler.is_authorized('caf\udce9') is False
+    assert profiler.is_authorized(None) is False
+
+def test_non_ascii_configured_token(tmp_path):
+    profiler = RequestProfiler(directory=str(tmp_path), token='clé-secrète')
+
+    assert profiler.is_authorized('clé-secrète') is True
+    assert profiler.is_authorized('cle-secrete') is False
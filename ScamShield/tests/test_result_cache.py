@@ -0,0 +1,88 @@
+import os
+import json
+import shutil
+import pytest
+from app import analyze_message, analyze_messages, create_app
+from link_analyzer import LinkAnalyzer
+from result_cache import AnalysisCache
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rules')
+MESSAGE = "Your parcel is held, pay the customs fee at https://parcel-desk.example/pay"
+
+class FakeReputationChecker:
+    """Reports the configured finding for every link"""
+
+    def __init__(self):
+        self.findings = []
+        self.calls = 0
+
+    def check_urls(self, urls):
+        self.calls += 1
+        return {url: {'url': url, 'final_url': url, 'suspicious_headers': list(self.findings)} for url in urls}
+
+def test_cache_keys_on_version():
+    cache = AnalysisCache()
+    cache.put(MESSAGE, 'v1', 'result')
+
+    assert cache.get(f"  {MESSAGE}\n", 'v1') == 'result'
+    assert cache.get(MESSAGE, 'v2') is None
+    assert cache.get(MESSAGE, 'v1') is None  # Cleared when the version changed
+
+@pytest.fixture
+def rules_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'rules'
+    shutil.copytree(RULES_DIR, directory)
+    monkeypatch.setenv('RULES_DIR', str(directory))
+    monkeypatch.setenv('RULES_CHECK_INTERVAL', '0.000001')
+    return directory
+
+def test_rule_change_invalidates_cached_analysis(rules_dir):
+    app = create_app()
+    with app.app_context():
+        before, _ = analyze_message(MESSAGE)
+        pack_path = rules_dir / '30-job_scam.json'
+        pack = json.loads(pack_path.read_text(encoding='utf-8'))
+        pack['categories']['job_scam']['keywords'] += ['customs fee', 'parcel is held', 'pay the customs']
+        pack_path.write_text(json.dumps(pack), encoding='utf-8')
+        after, _ = analyze_message(MESSAGE)
+
+    assert 'customs fee' not in before['keywords_found']
+    assert 'customs fee' in after['keywords_found']
+    assert after['rule_version'] != before['rule_version']
+
+def test_custom_keywords_invalidate_cached_analysis():
+    app = create_app()
+    detector = app.extensions['scamshield'].scam_detector
+    with app.app_context():
+        before, _ = analyze_message(MESSAGE)
+        detector.add_custom_keywords('job_scam', ['customs fee', 'parcel is held', 'pay the customs'])
+        [(after, _)] = analyze_messages([MESSAGE])
+
+    assert 'customs fee' not in before['keywords_found']
+    assert 'customs fee' in after['keywords_found']
+
+def test_stale_result_is_not_stored_under_new_rules():
+    cache = AnalysisCache()
+    cache.get(MESSAGE, 'v2')  # A request already saw the new rules
+    cache.put(MESSAGE, 'v1', 'computed with the old rules')
+
+    assert cache.get(MESSAGE, 'v1') is None
+    assert cache.stats()['entries'] == 0
+
+def test_live_reputation_is_not_served_from_cache():
+    app = create_app()
+    services = app.extensions['scamshield']
+    checker = FakeReputationChecker()
+    services.link_analyzer = LinkAnalyzer(reputation_checker=checker, check_reputation=True)
+
+    with app.app_context():
+        _, before = analyze_message(MESSAGE)
+        checker.findings = ['Suspicious redirect headers']
+        _, after = analyze_message(MESSAGE)
+        [(_, batch)] = analyze_messages([MESSAGE])
+
+    assert services.analysis_cache.hits == 2  # The scam verdicts
+    assert checker.calls == 3
+    assert 'Suspicious redirect headers' not in before[0]['risk_factors']
+    assert 'Suspicious redirect headers' in after[0]['risk_factors']
+    assert batch == after
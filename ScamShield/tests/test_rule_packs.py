@@ -0,0 +1,84 @@
+import os
+import json
+import shutil
+import pytest
+from rule_packs import RulePackError, RuleSnapshot, load_rule_packs
+from scam_detector import ScamDetector
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rules')
+MESSAGE = "Your parcel is held at customs, pay the clearance fee today"
+
+@pytest.fixture
+def rules_dir(tmp_path):
+    directory = tmp_path / 'rules'
+    shutil.copytree(RULES_DIR, directory)
+    return directory
+
+def write_pack(directory, name, categories):
+    (directory / name).write_text(json.dumps({'name': name[:-5], 'categories': categories}), encoding='utf-8')
+
+def test_packs_merge_in_file_order(rules_dir):
+    write_pack(rules_dir, '35-parcel.json', {
+        'parcel_scam': {'keywords': ['parcel is held', 'clearance fee']},
+        'job_scam': {'keywords': ['work from home', 'daily payout']}
+    })
+
+    rules = load_rule_packs(str(rules_dir))
+
+    categories = list(rules['scam_patterns'])
+    assert categories.index('job_scam') < categories.index('parcel_scam') < categories.index('lottery_scam')
+    job_keywords = rules['scam_patterns']['job_scam']['keywords']
+    assert job_keywords.count('work from home') == 1
+    assert job_keywords[-1] == 'daily payout'
+
+def test_new_pack_is_picked_up_without_restart(rules_dir):
+    detector = ScamDetector(rules_dir=str(rules_dir), check_interval=0.000001)
+    before = detector.analyze_text(MESSAGE)
+
+    write_pack(rules_dir, '35-parcel.json', {
+        'parcel_scam': {'keywords': ['parcel is held', 'clearance fee', 'pay the clearance']}
+    })
+    after = detector.analyze_text(MESSAGE)
+
+    assert before['scam_type'] == 'none'
+    assert after['scam_type'] == 'parcel_scam'
+    assert after['rule_version'] != before['rule_version']
+
+@pytest.mark.parametrize('content', [
+    '{"categories": {"broken": {"keywords": ["unterminated"',
+    '{"categories": {"broken": {"patterns": ["(unclosed"]}}}',
+    '{"categories": {"broken": {"keywords": "not a list"}}}',
+    '["not", "an", "object"]'
+])
+def test_malformed_pack_keeps_the_current_rules(rules_dir, content):
+    detector = ScamDetector(rules_dir=str(rules_dir), check_interval=0.000001)
+    write_pack(rules_dir, '35-parcel.json', {'parcel_scam': {'keywords': ['parcel is held', 'clearance fee']}})
+    good = detector.analyze_text(MESSAGE)
+
+    (rules_dir / '36-broken.json').write_text(content, encoding='utf-8')
+    during = detector.analyze_text(MESSAGE)
+    (rules_dir / '36-broken.json').unlink()
+    write_pack(rules_dir, '35-parcel.json', {'parcel_scam': {'keywords': ['parcel is held']}})
+    fixed = detector.analyze_text(MESSAGE)
+
+    assert during == good
+    assert fixed['rule_version'] != good['rule_version']  # Reloading resumes once the packs are valid
+
+def test_invalid_pack_at_startup_raises(rules_dir, tmp_path):
+    (rules_dir / '36-broken.json').write_text('{"categories": []}', encoding='utf-8')
+
+    with pytest.raises(RulePackError):
+        ScamDetector(rules_dir=str(rules_dir))
+    with pytest.raises(RulePackError):
+        ScamDetector(rules_dir=str(tmp_path / 'empty'))
+
+def test_snapshot_version_depends_only_on_content():
+    rules = load_rule_packs(RULES_DIR)
+
+    first = RuleSnapshot(rules['scam_patterns'], rules['high_risk_indicators'])
+    second = RuleSnapshot.from_directory(RULES_DIR)
+
+    assert first.version == second.version
+    assert first.with_keywords('phishing', ['new phrase']).version != first.version
+    with pytest.raises(AttributeError):
+        first.version = 'changed'
@@ -0,0 +1,78 @@
+import os
+import json
+import pytest
+from language_support import LANGUAGE_SCRIPTS, LanguageSupport
+from rule_packs import DEFAULT_RULES_DIR
+from scam_detector import ScamDetector
+from text_normalizer import normalize
+
+# Rule pack, language code and script of each language added with its own pack
+PACKS = [
+    ('50-marathi.json', 'mr', 'Devanagari'),
+    ('51-bengali.json', 'bn', 'Bengali'),
+    ('52-gujarati.json', 'gu', 'Gujarati'),
+    ('53-tamil.json', 'ta', 'Tamil'),
+    ('54-telugu.json', 'te', 'Telugu')
+]
+
+@pytest.fixture(scope='module')
+def detector():
+    return ScamDetector(check_interval=0)
+
+def pack_keywords(pack_file):
+    """Keywords of a pack by category"""
+    with open(os.path.join(DEFAULT_RULES_DIR, pack_file), encoding='utf-8') as pack:
+        categories = json.load(pack)['categories']
+    return {scam_type: next(values for field, values in rules.items() if field.endswith('_keywords'))
+            for scam_type, rules in categories.items()}
+
+def message_for(pack_file):
+    """A message using the first two upi_fraud keywords of a pack"""
+    return 'Urgent: ' + ', '.join(pack_keywords(pack_file)['upi_fraud'][:2])
+
+@pytest.mark.parametrize('pack_file, language, script', PACKS)
+def test_message_is_scanned_by_its_script_shard(detector, pack_file, language, script):
+    snapshot = detector.snapshot
+    view = normalize(message_for(pack_file))
+
+    assert LANGUAGE_SCRIPTS[language] == script
+    assert view.scripts == {script}
+    assert snapshot.matcher_for(view.scripts) is snapshot.shards[script]
+
+@pytest.mark.parametrize('pack_file, language, script', PACKS)
+def test_shard_finds_what_the_full_automaton_finds(detector, pack_file, language, script):
+    snapshot = detector.snapshot
+    text = normalize(message_for(pack_file)).text
+
+    shard_matches, _ = snapshot.shards[script].scan(text)
+    full_matches, _ = snapshot.matcher.scan(text)
+
+    assert sorted(shard_matches, key=repr) == sorted(full_matches, key=repr)
+    result = detector.analyze_text(message_for(pack_file))
+    assert result['scam_type'] == 'upi_fraud'
+    assert set(pack_keywords(pack_file)['upi_fraud'][:2]) <= set(result['keywords_found'])
+
+@pytest.mark.parametrize('pack_file, language, script', PACKS)
+def test_shard_leaves_out_other_scripts(detector, pack_file, language, script):
+    snapshot = detector.snapshot
+    for other_file, _, other_script in PACKS:
+        if other_script == script:
+            continue
+        text = normalize(message_for(other_file)).text
+        matches, _ = snapshot.shards[script].scan(text)
+        assert not [payload for _, payload in matches if payload[0] == 'keyword']
+
+def test_latin_and_mixed_messages(detector):
+    snapshot = detector.snapshot
+    mixed = normalize(message_for('51-bengali.json') + ' ' + message_for('53-tamil.json'))
+
+    assert snapshot.matcher_for(normalize("share the otp now").scripts) is snapshot.shards[None]
+    assert snapshot.matcher_for(mixed.scripts) is snapshot.matcher
+    assert snapshot.shard_scripts == {'Devanagari', 'Bengali', 'Gujarati', 'Tamil', 'Telugu'}
+
+@pytest.mark.parametrize('pack_file, language, script', PACKS)
+def test_warnings_are_translated(pack_file, language, script):
+    support = LanguageSupport()
+
+    assert support.get_warning_message('upi_fraud', language) != support.get_warning_message('upi_fraud', 'en')
+    assert support.get_scam_explanation('upi_fraud', language) != support.get_scam_explanation('upi_fraud', 'en')
@@ -0,0 +1,83 @@
+import json
+import pytest
+import statistical_model
+from scam_detector import ScamDetector
+
+SCAMS = [
+    ("your kyc has expired update now or account will be blocked", 'phishing'),
+    ("click this link to verify your bank account immediately", 'phishing'),
+    ("congratulations you won a lottery prize claim reward today", 'lottery_scam'),
+    ("you are the lucky draw winner send fee to claim cash prize", 'lottery_scam')
+]
+LEGITIMATE = [
+    "are we meeting for lunch tomorrow",
+    "please send the report by evening",
+    "happy birthday, see you at the party",
+    "the train is running late by twenty minutes"
+]
+
+@pytest.fixture
+def model_dir(tmp_path):
+    pytest.importorskip('numpy')
+    texts = [text for text, _ in SCAMS] * 10 + LEGITIMATE * 10
+    labels = [label for _, label in SCAMS] * 10 + ['none'] * len(LEGITIMATE) * 10
+    model = statistical_model.train(texts, labels, feature_bits=12, epochs=20)
+    path = str(tmp_path / 'model')
+    version = statistical_model.save_model(path, model, {'training_messages': len(texts)})
+    return path, version, model
+
+def test_saved_model_scores_like_the_trained_one(model_dir):
+    path, version, trained = model_dir
+    texts = [SCAMS[0][0], LEGITIMATE[0], "verify your account now, it is blocked"]
+
+    model = statistical_model.NGramModel(path)
+    rows, features, values = trained['hasher'].transform(texts)
+    logits = statistical_model._linear_scores(trained['weights'], trained['bias'], rows, features, values, len(texts))
+
+    assert model.version == version
+    assert model.classes == ['none', 'lottery_scam', 'phishing']
+    assert model.predict_proba(texts) == pytest.approx(statistical_model._softmax(logits), abs=1e-6)
+
+def test_model_separates_scams_from_legitimate_messages(model_dir):
+    model = statistical_model.NGramModel(model_dir[0])
+
+    scores = model.score([SCAMS[2][0], LEGITIMATE[1]])
+
+    assert scores[0][0] > 0.5 > scores[1][0]
+    assert scores[0][1] == 'lottery_scam'
+    assert model.score([]) == []
+
+def test_same_training_gives_the_same_version(model_dir, tmp_path):
+    path, version, trained = model_dir
+
+    assert statistical_model.save_model(str(tmp_path / 'copy'), trained) == version
+
+def test_other_format_version_is_rejected(model_dir):
+    path = model_dir[0]
+    with open(f"{path}/model.json") as metadata_file:
+        metadata = json.load(metadata_file)
+    metadata['format'] = statistical_model.FORMAT_VERSION + 1
+    with open(f"{path}/model.json", 'w') as metadata_file:
+        json.dump(metadata, metadata_file)
+
+    with pytest.raises(ValueError):
+        statistical_model.NGramModel(path)
+
+def test_detector_blends_in_the_model(model_dir):
+    path, version, _ = model_dir
+    detector = ScamDetector(model_path=path)
+
+    single = detector.analyze_text(SCAMS[0][0])
+    batch = detector.analyze_batch([SCAMS[0][0], LEGITIMATE[0]])
+
+    assert single['rule_version'].endswith(f"+{version}")
+    assert single['model_score'] is not None
+    assert batch[0] == single
+
+def test_detector_without_numpy_uses_rules_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(statistical_model, 'np', None)
+
+    detector = ScamDetector(model_path=str(tmp_path / 'model'))
+
+    assert detector.model is None
+    assert detector.analyze_text(SCAMS[0][0])['is_scam']
@@ -0,0 +1,63 @@
+import pytest
+from scam_detector import ScamDetector
+from text_normalizer import (detect_scripts, fold_lookalikes, fold_pattern, has_invisible_characters, normalize,
+                             normalize_text)
+
+@pytest.mark.parametrize('text, expected', [
+    ("Share your OTP", "share your otp"),
+    ("share your O\u200bT\u200dP", "share your otp"),  # Zero-width characters
+    ("ѕhаrе уоur ОТР", "share your otp"),  # Cyrillic look-alikes
+    ("ｓｈａｒｅ your 𝐎𝐓𝐏", "share your otp"),  # Fullwidth and mathematical bold
+    ("share\u00a0your\u2009otp", "share your otp"),  # Non-breaking and thin spaces
+    ("vérifiez maintenant", "verifiez maintenant"),  # Accents
+    ("ve\u0301rifiez", "verifiez"),  # Decomposed accents
+    ("pay ₹५०००", "pay ₹5000"),  # Devanagari digits
+    ("डिपॉज़िट करें", "डिपोजिट करें"),  # Nukta and candra vowels
+])
+def test_obfuscated_spellings_fold_to_one_view(text, expected):
+    assert normalize_text(text) == expected
+
+def test_offsets_map_the_view_back_to_the_original():
+    original = "Send O\u200bT\u200bP to win ⑩ lakh"
+    view = normalize(original)
+    start = view.text.index('otp')
+
+    assert view.text == "send otp to win 10 lakh"
+    assert view.original_slice(start, start + 3) == "O\u200bT\u200bP"
+    assert view.original_slice(view.text.index('10'), view.text.index('10') + 2) == "⑩"  # One character, two in the view
+
+def test_ascii_and_same_length_text_need_no_offsets():
+    assert normalize("Plain ASCII").offsets is None
+    assert normalize("ѕhаrе").offsets is None
+    assert normalize(normalize("Already normalized")).text == "already normalized"
+
+@pytest.mark.parametrize('text, scripts', [
+    ("hello", set()),
+    ("आपका खाता", {'Devanagari'}),
+    ("তোমার অ্যাকাউন্ট and ਖਾਤਾ", {'Bengali', 'Gurmukhi'}),
+    ("உங்கள் OTP", {'Tamil'})
+])
+def test_detect_scripts(text, scripts):
+    assert detect_scripts(text) == scripts
+    assert normalize(text).scripts == scripts
+
+def test_lookalike_folding_keeps_accents_and_scripts():
+    assert fold_lookalikes("раураl.com") == "paypal.com"
+    assert fold_lookalikes("MÜNCHEN.de") == "münchen.de"
+    assert fold_lookalikes("пример.рф") == "пpимep.pф"  # Folded letter by letter; callers decide per label
+    assert fold_lookalikes("pay\u200bpal.com") == "paypal.com"
+    assert has_invisible_characters("pay\u200bpal")
+    assert not has_invisible_characters("münchen")
+
+def test_patterns_are_folded_without_losing_escapes():
+    assert fold_pattern(r"\D+\S") == r"\D+\S"
+    assert fold_pattern("डिपॉज़िट\\s+") == "डिपोजिट\\s+"
+
+def test_obfuscated_keywords_are_detected():
+    detector = ScamDetector()
+
+    plain = detector.analyze_text("Congratulations, you are the lottery winner! Claim reward now")
+    obfuscated = detector.analyze_text("Cоngrаtulаtiоns, you are the lоttеry\u200b winner! Сlаim rеwаrd now")
+
+    assert obfuscated['keywords_found'] == plain['keywords_found']
+    assert obfuscated['is_scam']
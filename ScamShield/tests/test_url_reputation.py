@@ -0,0 +1,118 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from url_reputation import PinnedAddressAdapter, ReputationChecker
+
+LOOPBACK = ['127.0.0.1/32']
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Redirect chain, slow and internal-redirect endpoints of the stub server"""
+
+    routes = {
+        '/start': (302, '/middle'),
+        '/middle': (301, '/final'),
+        '/final': (200, None),
+        '/to-metadata': (302, 'http://169.254.169.254/latest/meta-data/'),
+        '/to-private': (302, 'http://10.0.0.1/admin')
+    }
+
+    def do_HEAD(self):
+        self.server.requests.append(self.path)
+        if self.path == '/slow':
+            time.sleep(1.0)
+        status, location = self.routes.get(self.path, (200, None))
+        self.send_response(status)
+        if location:
+            self.send_header('Location', location)
+        self.send_header('Server', 'nginx/1.10.3')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_redirect_chain_is_followed_to_the_final_server(stub_server):
+    server, base = stub_server
+    checker = ReputationChecker(allowed_networks=LOOPBACK)
+
+    result = checker.check_url(f"{base}/start")
+
+    assert result['accessible'] is True
+    assert result['redirect_chain'] == [f"{base}/start", f"{base}/middle", f"{base}/final"]
+    assert result['final_url'] == f"{base}/final"
+    assert result['redirect_count'] == 2
+    assert "Outdated server version" in result['suspicious_headers']
+    assert server.requests == ['/start', '/middle', '/final']
+
+def test_slow_link_times_out_at_the_deadline(stub_server):
+    _, base = stub_server
+    checker = ReputationChecker(allowed_networks=LOOPBACK, timeout=5.0)
+
+    started = time.monotonic()
+    results = checker.check_urls([f"{base}/slow", f"{base}/final"], deadline=0.3)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.9
+    assert results[f"{base}/slow"]['timed_out'] is True
+    assert results[f"{base}/slow"]['suspicious_headers'] == []
+    assert results[f"{base}/final"]['accessible'] is True
+
+def test_internal_addresses_are_not_fetched(stub_server):
+    server, base = stub_server
+    checker = ReputationChecker()
+
+    for url in (f"{base}/final", "http://169.254.169.254/latest/meta-data/", "http://[::1]/", "http://10.1.2.3/"):
+        result = checker.check_url(url)
+        assert result['accessible'] is False
+        assert result['suspicious_headers'] == ["Link leads to a non-public network address"]
+    assert server.requests == []
+
+@pytest.mark.parametrize('path', ['/to-metadata', '/to-private'])
+def test_redirect_to_internal_address_is_blocked(stub_server, path):
+    server, base = stub_server
+    checker = ReputationChecker(allowed_networks=LOOPBACK)
+
+    result = checker.check_url(f"{base}{path}")
+
+    assert result['accessible'] is False
+    assert result['suspicious_headers'] == ["Link leads to a non-public network address"]
+    assert server.requests == [path]
+
+def test_https_to_pinned_address_verifies_the_original_host():
+    adapter = PinnedAddressAdapter()
+    request = requests.Request('HEAD', 'https://93.184.215.14:443/', headers={'Host': 'example.com'}).prepare()
+
+    host_params, pool_kwargs = adapter.build_connection_pool_key_attributes(request, True)
+
+    assert host_params['host'] == '93.184.215.14'
+    assert pool_kwargs['server_hostname'] == 'example.com'
+    assert pool_kwargs['assert_hostname'] == 'example.com'
+
+def test_slow_dns_resolution_counts_toward_the_deadline(monkeypatch):
+    def slow_getaddrinfo(*args, **kwargs):
+        time.sleep(1.0)
+        return [(None, None, None, '', ('93.184.215.14', 80))]
+
+    monkeypatch.setattr('url_reputation.socket.getaddrinfo', slow_getaddrinfo)
+    checker = ReputationChecker(timeout=5.0, deadline=0.2)
+
+    started = time.monotonic()
+    result = checker.check_url("http://slow-dns.example/")
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6
+    assert result['timed_out'] is True
+    assert result['suspicious_headers'] == []
+    assert checker.check_url("http://slow-dns.example/")['timed_out'] is True  # Not cached
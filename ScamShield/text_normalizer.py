@@ -0,0 +1,288 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+# Characters that do not render, or only steer rendering, and are used to
+# split keywords without changing how a message looks
+INVISIBLE_CHARACTERS = (
+    '\u00ad'  # Soft hyphen
+    '\u034f'  # Combining grapheme joiner
+    '\u061c'  # Arabic letter mark
+    '\u115f\u1160\u3164\uffa0'  # Hangul fillers
+    '\u17b4\u17b5'  # Khmer inherent vowels
+    '\u180e'  # Mongolian vowel separator
+    '\u200b\u200c\u200d'  # Zero-width space, non-joiner and joiner
+    '\u200e\u200f\u202a\u202b\u202c\u202d\u202e'  # Bidi marks, embeddings and overrides
+    '\u2060\u2061\u2062\u2063\u2064'  # Word joiner and invisible operators
+    '\u2066\u2067\u2068\u2069'  # Bidi isolates
+    '\ufeff'  # Zero-width no-break space
+) + ''.join(map(chr, range(0xfe00, 0xfe10)))  # Variation selectors
+
+# Spaces that look like an ordinary space but fail a literal ' ' match
+SPACE_CHARACTERS = '\u00a0\u1680' + ''.join(map(chr, range(0x2000, 0x200b))) + '\u2028\u2029\u202f\u205f\u3000'
+
+# Cyrillic and Greek letters that render like Latin ones, folded to the lowercase Latin letter
+CONFUSABLES = {
+    # Cyrillic
+    'а': 'a', 'с': 'c', 'ԁ': 'd', 'е': 'e', 'һ': 'h', 'і': 'i', 'ј': 'j', 'о': 'o', 'р': 'p',
+    'ԛ': 'q', 'ѕ': 's', 'у': 'y', 'ԝ': 'w', 'х': 'x', 'ү': 'y',
+    'А': 'a', 'В': 'b', 'С': 'c', 'Е': 'e', 'Н': 'h', 'І': 'i', 'Ј': 'j', 'К': 'k', 'М': 'm',
+    'О': 'o', 'Р': 'p', 'Ԛ': 'q', 'Ѕ': 's', 'Т': 't', 'Ԝ': 'w', 'Х': 'x', 'У': 'y', 'Ү': 'y',
+    # Greek
+    'α': 'a', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p', 'υ': 'u', 'χ': 'x',
+    'Α': 'a', 'Β': 'b', 'Ε': 'e', 'Ζ': 'z', 'Η': 'h', 'Ι': 'i', 'Κ': 'k', 'Μ': 'm', 'Ν': 'n',
+    'Ο': 'o', 'Ρ': 'p', 'Τ': 't', 'Υ': 'y', 'Χ': 'x',
+    # Latin letters outside ASCII that pass for ASCII ones
+    'ı': 'i', 'ɑ': 'a', 'ɡ': 'g', 'ꞵ': 'b',
+    # The one letter whose lowercase is two characters
+    'İ': 'i'
+}
+
+# Devanagari spellings that read the same to most users
+DEVANAGARI_VARIANTS = {
+    # Nukta consonants fold to their base letter; the nukta sign itself is dropped
+    'क़': 'क', 'ख़': 'ख', 'ग़': 'ग', 'ज़': 'ज', 'ड़': 'ड', 'ढ़': 'ढ',
+    'फ़': 'फ', 'य़': 'य', 'ऩ': 'न', 'ऱ': 'र', 'ऴ': 'ळ', '\u093c': None,
+    # Chandrabindu reads as anusvara
+    'ँ': 'ं',
+    # Candra vowels of English loanwords (डिपॉजिट, ऑफर) fold to the plain vowels
+    'ऑ': 'ओ', 'ॉ': 'ो', 'ऍ': 'ए', 'ॅ': 'े'
+}
+
+# First code point of each run of ten native digits folded to ASCII 0-9
+DIGIT_BLOCKS = (
+    0x0660, 0x06f0,  # Arabic-Indic
+    0x0966, 0x09e6, 0x0a66, 0x0ae6, 0x0b66,  # Devanagari, Bengali, Gurmukhi, Gujarati, Oriya
+    0x0be6, 0x0c66, 0x0ce6, 0x0d66  # Tamil, Telugu, Kannada, Malayalam
+)
+
+# Blocks of styled letters and digits whose compatibility form is plain ASCII,
+# such as fullwidth 'ｏｔｐ', mathematical bold '𝐨𝐭𝐩' or circled 'ⓞⓣⓟ'
+COMPATIBILITY_RANGES = (
+    (0x2070, 0x20a0),  # Superscripts and subscripts
+    (0x2100, 0x2150),  # Letterlike symbols
+    (0x2460, 0x2500),  # Enclosed alphanumerics
+    (0xff01, 0xff5f),  # Fullwidth ASCII
+    (0x1d400, 0x1d800),  # Mathematical alphanumerics
+    (0x1f100, 0x1f150)  # Enclosed alphanumeric supplement
+)
+
+# Indic scripts by Unicode block; each block is 128 code points, so a
+# character's block is its code point shifted right by seven
+SCRIPT_BLOCKS = {
+    0x0900 >> 7: 'Devanagari',
+    0x0980 >> 7: 'Bengali',
+    0x0a00 >> 7: 'Gurmukhi',
+    0x0a80 >> 7: 'Gujarati',
+    0x0b00 >> 7: 'Oriya',
+    0x0b80 >> 7: 'Tamil',
+    0x0c00 >> 7: 'Telugu',
+    0x0c80 >> 7: 'Kannada',
+    0x0d00 >> 7: 'Malayalam'
+}
+
+NO_SCRIPTS = frozenset()
+
+def _build_table() -> Dict[int, Optional[str]]:
+    """Build the str.translate table; runs once at import"""
+    table = {}
+    # Accented Latin letters fold to their base letter
+    for code_point in range(0x00c0, 0x0250):
+        decomposed = unicodedata.normalize('NFKD', chr(code_point))
+        base = decomposed[0]
+        if base.isascii() and base.isalpha() and all(unicodedata.combining(mark) for mark in decomposed[1:]):
+            table[code_point] = base.lower()
+    for code_point in range(0x0300, 0x0370):  # Combining diacritics of decomposed text
+        table[code_point] = None
+    for start, end in COMPATIBILITY_RANGES:
+        for code_point in range(start, end):
+            folded = unicodedata.normalize('NFKC', chr(code_point)).lower()
+            if folded.isascii() and folded.isalnum():
+                table[code_point] = folded
+    for start in DIGIT_BLOCKS:
+        for digit in range(10):
+            table[start + digit] = str(digit)
+    for char, replacement in {**CONFUSABLES, **DEVANAGARI_VARIANTS}.items():
+        table[ord(char)] = replacement
+    for char in SPACE_CHARACTERS:
+        table[ord(char)] = ' '
+    for char in INVISIBLE_CHARACTERS:
+        table[ord(char)] = None
+    return table
+
+def _character_class(code_points) -> str:
+    """Regex character class matching a set of code points, with consecutive runs merged into ranges"""
+    ranges = []
+    for code_point in sorted(code_points):
+        if ranges and ranges[-1][1] == code_point - 1:
+            ranges[-1][1] = code_point
+        else:
+            ranges.append([code_point, code_point])
+    return '[' + ''.join(
+        re.escape(chr(start)) if start == end else f"{re.escape(chr(start))}-{re.escape(chr(end))}"
+        for start, end in ranges
+    ) + ']'
+
+TRANSLATION_TABLE = _build_table()
+
+# Cyrillic and Greek look-alikes: the only letters that make a name in one
+# script pass for a different name in Latin. Accented Latin letters do not;
+# 'münchen.de' and 'munchen.de' are two different, honest host names
+CROSS_SCRIPT_CONFUSABLES = {
+    char: latin for char, latin in CONFUSABLES.items() if unicodedata.name(char).startswith(('CYRILLIC', 'GREEK'))
+}
+LOOKALIKE_TABLE = {ord(char): latin for char, latin in CROSS_SCRIPT_CONFUSABLES.items()}
+LOOKALIKE_TABLE.update((ord(char), None) for char in INVISIBLE_CHARACTERS)
+_INVISIBLE = re.compile(_character_class(map(ord, INVISIBLE_CHARACTERS)))
+
+# str.translate is markedly faster on hits than on misses, so the blocks
+# messages are written in map to themselves explicitly
+_FAST_TABLE = {code_point: code_point for code_point in range(0x3000)}
+_FAST_TABLE.update(TRANSLATION_TABLE)
+
+# Characters the table deletes or expands; only text containing one needs an offset map
+_LENGTH_CHANGING = re.compile(_character_class(
+    code_point for code_point, replacement in TRANSLATION_TABLE.items()
+    if replacement is None or len(replacement) != 1
+))
+
+@lru_cache(maxsize=None)
+def _indic_search(excluded_blocks: FrozenSet[int]):
+    """search method of a regex matching any Indic character outside the given blocks"""
+    return re.compile(_character_class(
+        code_point for block in SCRIPT_BLOCKS if block not in excluded_blocks
+        for code_point in range(block << 7, (block + 1) << 7)
+    )).search
+
+class NormalizedText:
+    """
+    A message and its normalized view
+
+    The view is lowercased, with invisible characters removed and look-alike
+    letters, styled letters, native digits and Devanagari variants folded,
+    so one substring check catches the obfuscated spellings too. offsets maps
+    each position of the view back to the original; it is None when the
+    two line up one to one.
+    """
+
+    __slots__ = ('original', 'text', 'offsets', 'scripts')
+
+    def __init__(self, original: str, text: str, offsets: Optional[List[int]] = None,
+                 scripts: FrozenSet[str] = NO_SCRIPTS):
+        self.original = original
+        self.text = text
+        self.offsets = offsets
+        self.scripts = scripts  # Indic scripts present in the view
+
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """
+        Map a span of the normalized view to the span of the original it came from
+
+        Invisible characters inside the span are included, so the original
+        slice is exactly what the sender wrote.
+        """
+        if self.offsets is None:
+            return start, end
+        if start >= len(self.offsets):
+            return len(self.original), len(self.original)
+        original_start = self.offsets[start]
+        original_end = self.offsets[end - 1] + 1 if end > start else original_start
+        return original_start, original_end
+
+    def original_slice(self, start: int, end: int) -> str:
+        """Text of the original message behind a span of the normalized view"""
+        original_start, original_end = self.original_span(start, end)
+        return self.original[original_start:original_end]
+
+    def __repr__(self) -> str:
+        return f"NormalizedText({self.text!r})"
+
+def detect_scripts(text: str) -> FrozenSet[str]:
+    """
+    Indic scripts used in a text, from the Unicode block of each distinct character
+
+    Args:
+        text: Text to scan
+
+    Returns:
+        Names of the scripts, empty for text with no Indic characters
+    """
+    if text.isascii():
+        return NO_SCRIPTS
+    # Jump from one script to the next instead of looking at every character;
+    # a message in a single script costs two searches
+    blocks = frozenset()
+    match = _indic_search(blocks)(text)
+    while match is not None:
+        blocks |= {ord(match.group()) >> 7}
+        match = _indic_search(blocks)(text, match.end())
+    return frozenset(SCRIPT_BLOCKS[block] for block in blocks)
+
+def normalize(text: Union[str, NormalizedText]) -> NormalizedText:
+    """
+    Build the normalized view of a message in one pass
+
+    ASCII messages, the common case, only need lowercasing. Other messages
+    go through one str.translate call with the precomputed table, and an
+    offset map is only built when a character was dropped or expanded.
+    The Indic scripts of the view are recorded so analyzers can skip
+    rules written in other scripts.
+
+    Args:
+        text: Message, or a view that is passed through unchanged
+
+    Returns:
+        NormalizedText holding the original, the view and the offset map
+    """
+    if isinstance(text, NormalizedText):
+        return text
+    if text.isascii():
+        return NormalizedText(text, text.lower())
+
+    normalized = text.translate(_FAST_TABLE).lower()
+    scripts = detect_scripts(normalized)
+    if len(normalized) == len(text) and not _LENGTH_CHANGING.search(text):
+        return NormalizedText(text, normalized, None, scripts)
+
+    # Positions between length-changing characters map one to one
+    offsets = []
+    position = 0
+    for match in _LENGTH_CHANGING.finditer(text):
+        index = match.start()
+        offsets.extend(range(position, index))
+        replacement = TRANSLATION_TABLE[ord(text[index])]
+        if replacement:
+            offsets.extend([index] * len(replacement))
+        position = index + 1
+    offsets.extend(range(position, len(text)))
+    return NormalizedText(text, normalized, offsets, scripts)
+
+def normalize_text(text: str) -> str:
+    """Normalized view of a string, for keywords and other text without offsets"""
+    return normalize(text).text
+
+def fold_lookalikes(text: str) -> str:
+    """
+    Fold cross-script look-alike letters and drop invisible characters, nothing else
+
+    Meant for names such as hosts, where normalize folds too much: accents
+    and other scripts are kept. Styled and fullwidth forms are mapped to
+    plain letters with NFKC, as IDNA does for host names.
+    """
+    if text.isascii():
+        return text.lower()
+    return unicodedata.normalize('NFKC', text).lower().translate(LOOKALIKE_TABLE)
+
+def has_invisible_characters(text: str) -> bool:
+    """Whether text contains a character from INVISIBLE_CHARACTERS"""
+    return not text.isascii() and _INVISIBLE.search(text) is not None
+
+def fold_pattern(pattern: str) -> str:
+    """
+    Apply the character folding to a regular expression source
+
+    Only non-ASCII characters are folded and nothing is lowercased, so
+    escapes such as \\D or \\S keep their meaning.
+    """
+    return pattern if pattern.isascii() else pattern.translate(TRANSLATION_TABLE)
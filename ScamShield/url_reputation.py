@@ -0,0 +1,366 @@
+import os
+import time
+import socket
+import logging
+import ipaddress
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from result_cache import AnalysisCache
+from domain_classifier import normalize_host
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+OUTDATED_SERVERS = ['nginx/1.', 'apache/2.2']
+
+# AnalysisCache entries are versioned by rule set; reputation results are not
+CACHE_VERSION = 'reputation'
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+class BlockedAddressError(requests.RequestException):
+    """Raised when a link or one of its redirects points to a non-public address"""
+
+class PinnedAddressAdapter(HTTPAdapter):
+    """
+    Adapter for requests sent to an already resolved IP address
+
+    The URL carries the IP and the Host header the original host name; TLS
+    uses the host name for SNI and certificate checks, so HTTPS still
+    verifies the site while the connection goes to the checked address.
+    """
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        hostname = request.headers.get('Host')
+        if host_params['scheme'] == 'https' and hostname:
+            hostname = urlparse(f"//{hostname}").hostname
+            pool_kwargs['server_hostname'] = hostname
+            pool_kwargs['assert_hostname'] = hostname
+        return host_params, pool_kwargs
+
+class ReputationChecker:
+    """Concurrent link reputation checks over pooled connections with TTL caches"""
+
+    def __init__(self, session: Optional[requests.Session] = None, max_workers: int = 8,
+                 timeout: float = 3.0, deadline: float = 5.0, max_redirects: int = 10,
+                 cache_size: int = 10000, cache_ttl: float = 600,
+                 should_expand: Optional[Callable[[str], bool]] = None,
+                 allowed_networks: Iterable[str] = ()):
+        """
+        Initialize the checker
+
+        Args:
+            session: HTTP session to use (a pooled session is created if None)
+            max_workers: Links checked in parallel
+            timeout: Seconds allowed for a single HTTP request
+            deadline: Seconds allowed for all links of one message
+            max_redirects: Redirect hops followed before giving up
+            cache_size: Entries kept in each of the URL and domain caches
+            cache_ttl: Seconds a reputation result stays valid
+            should_expand: Tells whether a host is a redirector (e.g. a URL shortener)
+                whose links must always be followed; other hosts are only fetched
+                when their domain is not cached yet. Everything is fetched if None
+            allowed_networks: Non-public networks (CIDR) that may still be
+                fetched, e.g. an internal test server. Links and redirects to
+                any other loopback, private, link-local or reserved address are
+                blocked, since message senders choose them
+        """
+        self.session = session or self._create_session(max_workers)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_redirects = max_redirects
+        self.should_expand = should_expand
+        self.allowed_networks = [ipaddress.ip_network(network) for network in allowed_networks]
+
+        self.url_cache = AnalysisCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+        self.domain_cache = AnalysisCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+
+        self._executor = None
+        self._resolver = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs) -> 'ReputationChecker':
+        """Build a checker configured through URL_REPUTATION_* environment variables"""
+        return cls(
+            max_workers=int(os.environ.get('URL_REPUTATION_WORKERS', 8)),
+            timeout=float(os.environ.get('URL_REPUTATION_TIMEOUT', 3.0)),
+            deadline=float(os.environ.get('URL_REPUTATION_DEADLINE', 5.0)),
+            max_redirects=int(os.environ.get('URL_REPUTATION_MAX_REDIRECTS', 10)),
+            cache_ttl=float(os.environ.get('URL_REPUTATION_CACHE_TTL', 600)),
+            allowed_networks=[network for network in os.environ.get('URL_REPUTATION_ALLOWED_NETWORKS', '').split(',')
+                              if network.strip()],
+            **kwargs
+        )
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        """
+        Session whose connection pool fits one connection per worker and host
+
+        Proxy settings from the environment are ignored: a proxy would resolve
+        the host again, bypassing the address check. A session passed to the
+        constructor needs a PinnedAddressAdapter for HTTPS links.
+        """
+        session = requests.Session()
+        session.trust_env = False
+        adapter = PinnedAddressAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def check_urls(self, urls: Iterable[str], deadline: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Check the reputation of all links of a message concurrently
+
+        Every request is bounded by the time left before the deadline, and links
+        not checked in time are reported as timed out rather than cached.
+
+        Args:
+            urls: Links to check
+            deadline: Seconds allowed for the whole call (the configured deadline if None)
+
+        Returns:
+            Dictionary mapping each distinct link to its reputation result
+        """
+        deadline_at = time.monotonic() + (self.deadline if deadline is None else deadline)
+        results = {}
+        futures = {}
+
+        for url in dict.fromkeys(urls):
+            cached = self.url_cache.get(url, CACHE_VERSION)
+            if cached is not None:
+                results[url] = dict(cached, cached=True)
+            else:
+                futures[self._get_executor().submit(self.check_url, url, deadline_at)] = url
+
+        if futures:
+            done, _ = wait(futures, timeout=max(deadline_at - time.monotonic(), 0))
+            for future, url in futures.items():
+                if future in done:
+                    results[url] = future.result()
+                else:
+                    results[url] = self._failure(url, "Reputation check timed out", timed_out=True)
+
+        return results
+
+    def check_url(self, url: str, deadline_at: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Check one link, following its redirect chain hop by hop
+
+        Args:
+            url: Link to check
+            deadline_at: time.monotonic() value after which no request is started
+
+        Returns:
+            Reputation result with the redirect chain, final URL and suspicious findings
+        """
+        cached = self.url_cache.get(url, CACHE_VERSION)
+        if cached is not None:
+            return dict(cached, cached=True)
+
+        if deadline_at is None:
+            deadline_at = time.monotonic() + self.deadline
+
+        # A plain link to a domain checked recently needs no request at all
+        host = normalize_host(urlparse(url).netloc)
+        if self.should_expand is not None and not self.should_expand(host):
+            domain_info = self.domain_cache.get(host, CACHE_VERSION)
+            if domain_info is not None:
+                return self._result(url, [url], domain_info, cached=True)
+
+        try:
+            chain, response = self._follow_redirects(url, deadline_at)
+        except requests.Timeout as e:
+            return self._failure(url, str(e), timed_out=True)
+        except BlockedAddressError as e:
+            logging.warning(f"Blocked URL reputation check for {url}: {str(e)}")
+            result = self._failure(url, str(e), finding="Link leads to a non-public network address")
+            self.url_cache.put(url, CACHE_VERSION, result)
+            return result
+        except requests.RequestException as e:
+            logging.error(f"Could not check URL reputation for {url}: {str(e)}")
+            result = self._failure(url, str(e))
+            self.url_cache.put(url, CACHE_VERSION, result)
+            return result
+
+        final_host = normalize_host(urlparse(chain[-1]).netloc)
+        domain_info = self._domain_info(response)
+        self.domain_cache.put(final_host, CACHE_VERSION, domain_info)
+
+        result = self._result(url, chain, domain_info)
+        self.url_cache.put(url, CACHE_VERSION, result)
+        return result
+
+    def _follow_redirects(self, url: str, deadline_at: float):
+        """
+        Follow redirects manually so every hop is bounded by the deadline
+
+        Each hop is resolved and checked before connecting, and the request
+        goes to the checked address, so neither the link nor a redirect (nor
+        a DNS answer changing in between) can reach an internal host.
+
+        Returns:
+            Tuple of (list of URLs visited, last response)
+
+        Raises:
+            BlockedAddressError: If a hop resolves to a non-public address
+        """
+        chain = [url]
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout("Reputation check deadline exceeded")
+
+            timeout = min(self.timeout, remaining)
+            pinned_url, host_header = self._pin_address(chain[-1], deadline_at)
+            headers = {'Host': host_header}
+            response = self.session.head(pinned_url, headers=headers, timeout=timeout, allow_redirects=False)
+            if response.status_code in (405, 501):
+                # Some servers refuse HEAD; fetch headers only with a streamed GET
+                response = self.session.get(pinned_url, headers=headers, timeout=timeout,
+                                            allow_redirects=False, stream=True)
+            response.close()
+
+            location = response.headers.get('location')
+            if response.status_code not in REDIRECT_STATUSES or not location:
+                return chain, response
+            if len(chain) > self.max_redirects:
+                raise requests.TooManyRedirects(f"Exceeded {self.max_redirects} redirects")
+            chain.append(urljoin(chain[-1], location))
+
+    def _pin_address(self, url: str, deadline_at: float) -> Tuple[str, str]:
+        """
+        Resolve the host of a URL and check every address it resolves to
+
+        Returns:
+            Tuple of (URL with the host replaced by the checked IP, original Host header)
+
+        Raises:
+            BlockedAddressError: If any address is not a public one
+            requests.Timeout: If the host is not resolved before the deadline
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in DEFAULT_PORTS or not parsed.hostname:
+            raise requests.exceptions.InvalidURL(f"Unsupported URL: {url}")
+        port = parsed.port or DEFAULT_PORTS[parsed.scheme]
+
+        try:
+            addresses = {info[4][0] for info in self._resolve(parsed.hostname, port, deadline_at)}
+        except (socket.gaierror, UnicodeError) as e:
+            raise requests.ConnectionError(f"Could not resolve {parsed.hostname}: {str(e)}")
+
+        for address in sorted(addresses):
+            if not self._is_allowed_address(address):
+                raise BlockedAddressError(f"{parsed.hostname} resolves to non-public address {address}")
+
+        address = ipaddress.ip_address(sorted(addresses)[0].split('%')[0])
+        host = f"[{address}]" if address.version == 6 else str(address)
+        host_header = parsed.netloc.rpartition('@')[2]
+        return parsed._replace(netloc=f"{host}:{port}").geturl(), host_header
+
+    def _resolve(self, hostname: str, port: int, deadline_at: float):
+        """
+        getaddrinfo bounded by the deadline
+
+        getaddrinfo itself cannot time out and a slow DNS server can stall it
+        for many seconds, so it runs on a resolver thread and the check stops
+        waiting for it when the deadline passes.
+
+        Raises:
+            requests.Timeout: If the answer does not arrive before the deadline
+        """
+        future = self._get_resolver().submit(socket.getaddrinfo, hostname, port, type=socket.SOCK_STREAM)
+        try:
+            return future.result(timeout=max(deadline_at - time.monotonic(), 0))
+        except FutureTimeoutError:
+            future.cancel()
+            raise requests.Timeout(f"Could not resolve {hostname} before the reputation check deadline")
+
+    def _is_allowed_address(self, address: str) -> bool:
+        """Whether an address is public, or inside an explicitly allowed network"""
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if any(ip in network for network in self.allowed_networks):
+            return True
+        return ip.is_global and not ip.is_multicast
+
+    @staticmethod
+    def _domain_info(response: requests.Response) -> Dict[str, Any]:
+        """Reputation findings that hold for every link on the responding domain"""
+        suspicious_headers = []
+        server = response.headers.get('server', '').lower()
+        if any(sus in server for sus in OUTDATED_SERVERS):
+            suspicious_headers.append("Outdated server version")
+
+        return {
+            'status_code': response.status_code,
+            'suspicious_headers': suspicious_headers
+        }
+
+    @staticmethod
+    def _result(url: str, chain, domain_info: Dict[str, Any], cached: bool = False) -> Dict[str, Any]:
+        """Reputation result for a link whose chain ended at a responding server"""
+        redirect_count = len(chain) - 1
+        suspicious_headers = list(domain_info['suspicious_headers'])
+        if redirect_count > 3:
+            suspicious_headers.append("Too many redirects")
+
+        return {
+            'url': url,
+            'accessible': True,
+            'status_code': domain_info['status_code'],
+            'redirect_count': redirect_count,
+            'redirect_chain': chain,
+            'final_url': chain[-1],
+            'final_domain': normalize_host(urlparse(chain[-1]).netloc),
+            'suspicious_headers': suspicious_headers,
+            'cached': cached
+        }
+
+    @staticmethod
+    def _failure(url: str, error: str, timed_out: bool = False,
+                 finding: str = 'Connection failed') -> Dict[str, Any]:
+        """Reputation result for a link that could not be checked"""
+        return {
+            'url': url,
+            'accessible': False,
+            'error': error,
+            'timed_out': timed_out,
+            # A slow check says nothing about the link; a dead one is suspicious
+            'suspicious_headers': [] if timed_out else [finding],
+            'cached': False
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker threads on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='url-reputation')
+            return self._executor
+
+    def _get_resolver(self) -> ThreadPoolExecutor:
+        """Create the DNS resolver threads on first use"""
+        with self._lock:
+            if self._resolver is None:
+                self._resolver = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='url-resolver')
+            return self._resolver
+
+    def shutdown(self):
+        """Stop the worker and resolver threads and close pooled connections"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._resolver is not None:
+                self._resolver.shutdown(wait=False, cancel_futures=True)
+                self._resolver = None
+        self.session.close()